@@ -0,0 +1,194 @@
+"""
+Batch Trip Planning
+
+Runs planning prompts from a JSONL file through the supervisor agent, several
+at a time, and appends one JSON result per line to an output file as each
+request finishes.
+
+Input lines look like {"id": "tokyo-001", "prompt": "Plan a 5-day trip ..."}
+("message" or "query" are accepted instead of "prompt"; a missing id
+defaults to the line number). Output lines carry the id, status, answer,
+latency, attempts, model call count and tool call count.
+
+Re-running with the same output file resumes: ids that already have an "ok"
+result are skipped, failed ones are retried.
+
+Usage:
+    python batch.py requests.jsonl results.jsonl [--concurrency 8] [--retries 2]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from langchain_core.messages import AIMessage
+
+from callbacks import ModelCallCounter
+from supervisor import create_supervisor_agent
+
+
+def read_requests(path: str) -> list:
+    """Load {"id", "prompt"} requests from a JSONL file"""
+    requests = []
+    with open(path) as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            prompt = record.get("prompt") or record.get("message") or record.get("query")
+            if not prompt:
+                raise ValueError(f"{path}:{number}: no prompt")
+            requests.append({"id": str(record.get("id", number)), "prompt": prompt})
+    return requests
+
+
+def completed_ids(path: str) -> set:
+    """Ids with a successful result in an existing output file"""
+    if not os.path.exists(path):
+        return set()
+
+    done = set()
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash
+                continue
+            if result.get("status") == "ok":
+                done.add(result["id"])
+    return done
+
+
+def _end_last_line(path: str):
+    """Terminate a line left unfinished by a crash, so new results start on their own line"""
+    if not os.path.exists(path) or not os.path.getsize(path):
+        return
+
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def run_request(agent, request: dict, retries: int, backoff: float) -> dict:
+    """Plan one request, retrying failures with exponential backoff and jitter"""
+    start = time.perf_counter()
+    error = None
+
+    for attempt in range(1, retries + 2):
+        counter = ModelCallCounter()
+        try:
+            result = agent.invoke(
+                {"messages": [{"role": "user", "content": request["prompt"]}]},
+                config={"callbacks": [counter]},
+            )
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if attempt <= retries:
+                time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            continue
+
+        messages = result["messages"]
+        return {
+            "id": request["id"],
+            "status": "ok",
+            "answer": messages[-1].text,
+            "latency_s": round(time.perf_counter() - start, 3),
+            "attempts": attempt,
+            "model_calls": counter.calls,
+            "tool_calls": sum(len(m.tool_calls) for m in messages if isinstance(m, AIMessage)),
+        }
+
+    return {
+        "id": request["id"],
+        "status": "error",
+        "error": error,
+        "latency_s": round(time.perf_counter() - start, 3),
+        "attempts": retries + 1,
+    }
+
+
+def run_batch(
+    agent,
+    requests: list,
+    output_path: str,
+    concurrency: int = 8,
+    retries: int = 2,
+    backoff: float = 1.0
+) -> dict:
+    """Run requests concurrently, appending each result to output_path as it finishes.
+
+    Args:
+        agent: The supervisor agent (created without memory)
+        requests: {"id", "prompt"} dicts; ids already completed in
+            output_path are skipped
+        output_path: JSONL file results are appended to
+        concurrency: Requests in flight at once
+        retries: Extra attempts for a failing request
+        backoff: Base delay in seconds before the first retry
+
+    Returns:
+        Summary with counts, wall time and throughput
+    """
+    done = completed_ids(output_path)
+    pending = [r for r in requests if r["id"] not in done]
+    summary = {"total": len(requests), "skipped": len(requests) - len(pending), "ok": 0, "failed": 0}
+    start = time.perf_counter()
+
+    _end_last_line(output_path)
+
+    with open(output_path, "a") as out, ThreadPoolExecutor(concurrency) as pool:
+        futures = [pool.submit(run_request, agent, r, retries, backoff) for r in pending]
+
+        for finished, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+
+            summary["ok" if result["status"] == "ok" else "failed"] += 1
+            print(f"[{finished}/{len(pending)}] {result['id']}: {result['status']} "
+                  f"in {result['latency_s']:.2f}s", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    summary["wall_time_s"] = round(elapsed, 3)
+    summary["requests_per_s"] = round(len(pending) / elapsed, 3) if pending and elapsed else 0.0
+    return summary
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Smart Travel Planner - batch mode")
+    parser.add_argument("input", help="JSONL file of {\"id\", \"prompt\"} requests")
+    parser.add_argument("output", help="JSONL file results are appended to (also used to resume)")
+    parser.add_argument("--model", default="openai:gpt-4o-mini", help="Chat model to use")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--retries", type=int, default=2, help="Extra attempts for failing requests")
+    parser.add_argument("--backoff", type=float, default=1.0, help="Base retry delay in seconds")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    # Subagent slots are shared by every request in the process, so give
+    # each concurrent request room to fan out to its three searches
+    agent = create_supervisor_agent(
+        model_name=args.model,
+        use_memory=False,
+        max_concurrency=3 * args.concurrency,
+    )
+
+    summary = run_batch(
+        agent,
+        read_requests(args.input),
+        args.output,
+        concurrency=args.concurrency,
+        retries=args.retries,
+        backoff=args.backoff,
+    )
+    print(json.dumps(summary), file=sys.stderr)
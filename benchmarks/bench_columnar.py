@@ -0,0 +1,119 @@
+"""
+Columnar vs list-of-dicts benchmark
+
+Times the filter / sort / top-k work behind search_flights,
+compare_flight_prices, search_hotels and get_hotel_recommendation on
+synthetic inventories, once with the original per-row dict filtering and once
+with the NumPy column tables.
+
+Usage:
+    python -m benchmarks.bench_columnar [--sizes 1000,100000,1000000] [--repeat 5]
+"""
+
+import argparse
+import time
+
+from tools.columnar import FlightTable, HotelTable
+from tools.synthetic import generate_flights, generate_hotels
+
+
+# --- list-of-dicts reference implementations (the pre-columnar tool logic) ---
+
+def dict_search_flights(flights, budget_max, preferred_stops):
+    flights = [f for f in flights if f["price"] <= budget_max]
+    if preferred_stops == "direct":
+        flights = [f for f in flights if f["stops"] == 0]
+    return flights
+
+def dict_compare_flight_prices(flights):
+    sorted_flights = sorted(flights, key=lambda x: x["price"])
+    direct_flights = [f for f in flights if f["stops"] == 0]
+    best_value = min(direct_flights, key=lambda x: x["price"]) if direct_flights else sorted_flights[0]
+    return sorted_flights[0], best_value, sorted_flights[0]["price"], sorted_flights[-1]["price"]
+
+def dict_search_hotels(hotels, budget_per_night, traveler_type):
+    hotels = [h for h in hotels if h["price_per_night"] <= budget_per_night]
+    return [h for h in hotels if traveler_type in h.get("traveler_type", [])]
+
+def dict_hotel_recommendation(hotels, traveler_type):
+    matching = [h for h in hotels if traveler_type in h.get("traveler_type", [])] or list(hotels)
+    matching.sort(key=lambda x: x["rating"] / (x["price_per_night"] / 100), reverse=True)
+    return matching[:2]
+
+
+# --- columnar implementations (what the tools run) ---
+
+def columnar_search_flights(table, budget_max, preferred_stops):
+    return table.records(table.filter(budget_max, preferred_stops))
+
+def columnar_compare_flight_prices(table):
+    everything = table.filter()
+    direct = table.top_k(table.filter(stops="direct"))
+    return table.top_k(everything), direct, table.price_range(everything)
+
+def columnar_search_hotels(table, budget_per_night, traveler_type):
+    return table.records(table.filter(budget_per_night, traveler_type))
+
+def columnar_hotel_recommendation(table, traveler_type):
+    matching = table.filter(traveler_type=traveler_type)
+    if not len(matching):
+        matching = table.filter()
+    return table.records(table.top_k(matching, "balanced", k=2))
+
+
+def best_of(fn, repeat: int) -> float:
+    """Best wall-clock time of fn over repeat runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def run(sizes: list, repeat: int):
+    print(f"{'rows':>9} | {'operation':<26} | {'dicts (ms)':>11} | {'columnar (ms)':>13} | {'speedup':>7}")
+    print("-" * 80)
+
+    for n in sizes:
+        flights = generate_flights(n)
+        hotels = generate_hotels(n)
+
+        start = time.perf_counter()
+        flight_table = FlightTable.from_records(flights)
+        hotel_table = HotelTable.from_records(hotels)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        cases = [
+            ("search_flights",
+             lambda: dict_search_flights(flights, 800, "direct"),
+             lambda: columnar_search_flights(flight_table, 800, "direct")),
+            ("compare_flight_prices",
+             lambda: dict_compare_flight_prices(flights),
+             lambda: columnar_compare_flight_prices(flight_table)),
+            ("search_hotels",
+             lambda: dict_search_hotels(hotels, 200, "families"),
+             lambda: columnar_search_hotels(hotel_table, 200, "families")),
+            ("get_hotel_recommendation",
+             lambda: dict_hotel_recommendation(hotels, "couples"),
+             lambda: columnar_hotel_recommendation(hotel_table, "couples")),
+        ]
+
+        for name, dict_fn, columnar_fn in cases:
+            dict_ms = best_of(dict_fn, repeat)
+            columnar_ms = best_of(columnar_fn, repeat)
+            print(f"{n:>9,} | {name:<26} | {dict_ms:>11.3f} | {columnar_ms:>13.3f} | "
+                  f"{dict_ms / columnar_ms:>6.1f}x")
+
+        print(f"{n:>9,} | {'(one-time table build)':<26} | {'':>11} | {build_ms:>13.1f} |")
+        print("-" * 80)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="Comma-separated row counts (default: 1000,100000,1000000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    run([int(n) for n in args.sizes.split(",")], args.repeat)
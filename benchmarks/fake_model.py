@@ -0,0 +1,194 @@
+"""
+Scripted fake chat model
+
+A deterministic, local stand-in for the OpenAI model, so the agents can be
+benchmarked (and load-tested) without network calls or API spend. It plugs
+in anywhere a chat model does, e.g. initialize_agents(ScriptedChatModel()).
+
+The script mimics what a real model does with the planner's tools:
+
+- supervisor (has create_itinerary): call search_flights, search_hotels and
+  search_activities in one step, then create_itinerary, then answer
+- subagents: call their first tool with the destination named in the
+  request, then summarize the tool output
+- structured output (a forced tool call, e.g. TripPlan): one task per
+  subagent
+
+Tool call ids come from a per-model counter, so runs are reproducible.
+Answers can also be streamed word by word.
+
+To stand in for a provider that rate limits, give it max_concurrent and/or
+requests_per_minute: calls over either limit fail at once with a 429
+RateLimitError (with a Retry-After when the minute's requests are used up).
+For tail latency, slow_every=N makes every Nth call take slow_latency. A
+call given a timeout shorter than its latency fails with a TimeoutError
+once the timeout is up, as a provider client's would.
+"""
+
+import itertools
+import json
+import re
+import threading
+import time
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+
+DESTINATION_PATTERN = re.compile(r"\b(tokyo|paris)\b", re.IGNORECASE)
+
+SEARCH_TOOLS = ["search_flights", "search_hotels", "search_activities"]
+
+# Arguments for subagent tools that don't take a destination
+TOOL_ARGS = {
+    "create_daily_schedule": {"activities": "Senso-ji Temple, Tsukiji Market", "hotel_location": "Shinjuku"},
+    "optimize_route": {"locations": "Senso-ji Temple, Tokyo Skytree, Shibuya Crossing"},
+}
+
+
+class RateLimitError(Exception):
+    """The fake provider's 429 Too Many Requests"""
+
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic chat model that drives the planner's agents through a full plan.
+
+    Args:
+        latency: Seconds each call sleeps, to simulate provider latency
+        answer: Final answer text of the supervisor
+        max_concurrent: Calls the fake provider serves at once; more get a 429
+        requests_per_minute: Calls it accepts in any 60 seconds; more get a 429
+        slow_every: Every this many calls, one is a straggler (None = none)
+        slow_latency: Seconds a straggler sleeps instead of latency
+    """
+
+    latency: float = 0.0
+    answer: str = "Here is your trip plan: flights, hotel and activities are booked into a day-by-day itinerary."
+    max_concurrent: int | None = None
+    requests_per_minute: int | None = None
+    slow_every: int | None = None
+    slow_latency: float = 0.0
+
+    _ids: Any = PrivateAttr(default_factory=itertools.count)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+    # Provider-side state, shared with copies of the model (e.g. with a cache bound)
+    _provider: dict = PrivateAttr(default_factory=lambda: {"in_flight": 0, "recent": [], "throttled": 0})
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    @property
+    def calls(self) -> int:
+        """Number of model calls made so far"""
+        return self._calls
+
+    @property
+    def throttled(self) -> int:
+        """Calls rejected with a 429 so far"""
+        return self._provider["throttled"]
+
+    def _admit(self):
+        """Count a call in, or reject it the way a rate limited provider would"""
+        provider = self._provider
+        with self._lock:
+            now = time.monotonic()
+            provider["recent"] = [t for t in provider["recent"] if t > now - 60]
+            if self.max_concurrent is not None and provider["in_flight"] >= self.max_concurrent:
+                provider["throttled"] += 1
+                raise RateLimitError("Too many concurrent requests")
+            if self.requests_per_minute is not None and len(provider["recent"]) >= self.requests_per_minute:
+                provider["throttled"] += 1
+                raise RateLimitError("Rate limit reached for requests",
+                                     retry_after=provider["recent"][0] + 60 - now)
+            provider["recent"].append(now)
+            provider["in_flight"] += 1
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _tool_call(self, name: str, args: dict) -> dict:
+        with self._lock:
+            call_id = f"call_{next(self._ids)}"
+        return {"name": name, "args": args, "id": call_id}
+
+    def _respond(self, messages: list, kwargs: dict) -> AIMessage:
+        names = [t["function"]["name"] for t in kwargs.get("tools", [])]
+        turn_start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        query = messages[turn_start].text if messages else ""
+        tool_results = [m for m in messages[turn_start:] if isinstance(m, ToolMessage)]
+        called = {m.name for m in tool_results}
+        match = DESTINATION_PATTERN.search(query)
+        destination = match.group(1).title() if match else "Tokyo"
+
+        if names and kwargs.get("tool_choice") not in (None, "auto", "none"):
+            # Structured output (TripPlan): plan one task per subagent
+            tasks = [
+                {"id": agent, "agent": f"{agent}_agent", "request": query, "depends_on": []}
+                for agent in ("flights", "hotels", "activities")
+            ]
+            tasks.append({"id": "itinerary", "agent": "itinerary_agent", "request": query,
+                          "depends_on": ["flights", "hotels", "activities"]})
+            return AIMessage("", tool_calls=[self._tool_call(names[0], {"tasks": tasks})])
+
+        if "create_itinerary" in names:
+            if not called:
+                return AIMessage("", tool_calls=[self._tool_call(n, {"request": query}) for n in SEARCH_TOOLS])
+            if "create_itinerary" not in called:
+                return AIMessage("", tool_calls=[self._tool_call("create_itinerary", {"request": query})])
+            return AIMessage(self.answer)
+
+        if names and not called:
+            args = TOOL_ARGS.get(names[0], {"destination": destination})
+            return AIMessage("", tool_calls=[self._tool_call(names[0], args)])
+
+        summary = " ".join(tool_results[-1].text.split()[:40]) if tool_results else "No results."
+        return AIMessage(f"Summary: {summary}")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self._admit()
+        try:
+            with self._lock:
+                self._calls += 1
+                straggler = self.slow_every is not None and self._calls % self.slow_every == 0
+            latency = self.slow_latency if straggler else self.latency
+            timeout = kwargs.get("timeout")
+            if timeout is not None and latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError("Request timed out")
+            if latency:
+                time.sleep(latency)
+            message = self._respond(messages, kwargs)
+        finally:
+            with self._lock:
+                self._provider["in_flight"] -= 1
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._generate(messages, stop, **kwargs).generations[0].message
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                    for i, c in enumerate(message.tool_calls)
+                ],
+            ))
+            return
+
+        for word in re.findall(r"\S+\s*", message.text):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
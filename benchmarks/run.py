@@ -0,0 +1,280 @@
+"""
+Benchmark suite
+
+Measures the planner offline, with the scripted fake model in place of the
+real one, so runs are free, deterministic and comparable.
+
+- micro: every domain tool in subagents/ and every inventory getter in
+  tools/mock_data.py, called directly
+- macro: a full supervisor trip plan (supervisor + four subagents)
+- replay: a supervisor run replayed from a recorded cassette (see
+  cassettes.py), split into model time and framework overhead
+
+Each benchmark reports latency percentiles, model calls per run, and the
+allocations and peak traced memory of one run (measured in a separate pass,
+since tracing slows the timed runs down).
+
+Results are written as JSON. Passing --compare BASELINE.json reports every
+benchmark whose p50 or model-call count regressed by more than --threshold
+and exits non-zero if any did.
+
+Usage:
+    python -m benchmarks.run [--suite micro,macro] [--output results.json]
+                             [--compare baseline.json] [--threshold 0.2]
+                             [--cassette cassettes/tokyo.json [--latency-scale 1.0]]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+
+from benchmarks.fake_model import ScriptedChatModel
+from callbacks import ModelCallCounter
+from cassettes import CassetteChatModel
+from subagents import activities, flights, hotels, itinerary
+from supervisor import create_supervisor_agent
+from tools import mock_data
+
+
+# name -> (callable, kwargs)
+MICRO_BENCHMARKS = {
+    "tool.search_flights": (flights.search_flights.invoke,
+                            {"input": {"destination": "Tokyo", "budget_max": 900, "preferred_stops": "direct"}}),
+    "tool.compare_flight_prices": (flights.compare_flight_prices.invoke, {"input": {"destination": "Tokyo"}}),
+    "tool.search_hotels": (hotels.search_hotels.invoke,
+                           {"input": {"destination": "Tokyo", "budget_per_night": 300, "traveler_type": "couples"}}),
+    "tool.get_hotel_recommendation": (hotels.get_hotel_recommendation.invoke,
+                                      {"input": {"destination": "Tokyo", "traveler_type": "families"}}),
+    "tool.search_activities": (activities.search_activities.invoke,
+                               {"input": {"destination": "Tokyo", "interests": ["culture"], "budget_max": 50}}),
+    "tool.search_restaurants": (activities.search_restaurants.invoke,
+                                {"input": {"destination": "Tokyo", "cuisine": "Sushi"}}),
+    "tool.get_activity_recommendations": (activities.get_activity_recommendations.invoke,
+                                          {"input": {"destination": "Tokyo", "trip_style": "foodie"}}),
+    "tool.create_daily_schedule": (itinerary.create_daily_schedule.invoke,
+                                   {"input": {"activities": "Senso-ji Temple, Tsukiji Market, Tokyo Skytree",
+                                              "hotel_location": "Shinjuku"}}),
+    "tool.optimize_route": (itinerary.optimize_route.invoke,
+                            {"input": {"locations": "Senso-ji Temple, Tokyo Skytree, Shibuya Crossing"}}),
+    "tool.generate_trip_summary": (itinerary.generate_trip_summary.invoke,
+                                   {"input": {"destination": "Tokyo", "num_days": 5, "flight_info": "JL005 $850",
+                                              "hotel_info": "Park Hyatt $450/night",
+                                              "activities_info": "Temples, sushi", "total_budget": 5000}}),
+    "getter.get_flights": (mock_data.get_flights, {"destination": "Tokyo"}),
+    "getter.get_hotels": (mock_data.get_hotels, {"destination": "Tokyo"}),
+    "getter.get_activities": (mock_data.get_activities, {"destination": "Tokyo"}),
+    "getter.get_restaurants": (mock_data.get_restaurants, {"destination": "Tokyo"}),
+    "getter.query_flights": (mock_data.query_flights, {"destination": "Tokyo", "budget_max": 900, "stops": "direct"}),
+    "getter.query_hotels": (mock_data.query_hotels,
+                            {"destination": "Tokyo", "budget_max": 300, "traveler_type": "couples"}),
+    "getter.query_activities": (mock_data.query_activities,
+                                {"destination": "Tokyo", "interests": ["culture"], "budget_max": 50}),
+    "getter.query_restaurants": (mock_data.query_restaurants, {"destination": "Tokyo", "cuisine": "Sushi"}),
+}
+
+TRIP_QUERY = "Plan a 5-day trip to Tokyo for two. We love food and culture, budget around $3000."
+
+
+def percentile(samples: list, q: float) -> float:
+    """q-th percentile (0-100) with linear interpolation"""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def measure(fn, iterations: int, warmup: int = 1) -> dict:
+    """Time fn over iterations, then trace the allocations of one more call.
+
+    fn may return a number of model calls it made (or None).
+    """
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    timings, model_calls = [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        calls = fn()
+        timings.append(time.perf_counter() - start)
+        if calls is not None:
+            model_calls.append(calls)
+
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "iterations": iterations,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p90_ms": percentile(timings, 90) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "max_ms": max(timings) * 1000,
+        "allocated_kb": allocated / 1024,
+        "peak_kb": peak / 1024,
+    }
+    if model_calls:
+        result["model_calls"] = statistics.fmean(model_calls)
+    return result
+
+
+def _call(fn, kwargs: dict):
+    """fn bound to kwargs, with its result dropped"""
+    def run():
+        fn(**kwargs)
+    return run
+
+
+def run_micro(iterations: int) -> dict:
+    """Benchmark each domain tool and inventory getter"""
+    return {name: measure(_call(fn, kwargs), iterations) for name, (fn, kwargs) in MICRO_BENCHMARKS.items()}
+
+
+def run_macro(iterations: int, latency: float) -> dict:
+    """Benchmark a full supervisor trip plan on the scripted model"""
+    agent = create_supervisor_agent(
+        ScriptedChatModel(latency=latency),
+        use_memory=False,
+        cache_results=False,
+    )
+
+    def plan_trip():
+        counter = ModelCallCounter()
+        agent.invoke(
+            {"messages": [{"role": "user", "content": TRIP_QUERY}]},
+            config={"callbacks": [counter], "configurable": {"thread_id": str(uuid.uuid4())}},
+        )
+        return counter.calls
+
+    return {"macro.supervisor_trip_plan": measure(plan_trip, iterations)}
+
+
+def run_replay(iterations: int, path: str, latency_scale: float) -> dict:
+    """Benchmark a supervisor run replayed from a recorded cassette.
+
+    Besides the usual timings, reports the median time spent waiting on
+    (simulated) model calls and the framework overhead on top of it.
+    """
+    model = CassetteChatModel(path=path, latency_scale=latency_scale)
+    agent = create_supervisor_agent(model, use_memory=False, cache_results=False)
+    model_times = []
+
+    def replay():
+        model.reset_timing()
+        agent.invoke(
+            {"messages": [{"role": "user", "content": model.query}]},
+            config={"configurable": {"thread_id": str(uuid.uuid4())}},
+        )
+        model_times.append(model.model_time)
+        return model.calls
+
+    result = measure(replay, iterations)
+    result["model_ms"] = percentile(model_times, 50) * 1000
+    result["overhead_ms"] = max(result["p50_ms"] - result["model_ms"], 0.0)
+
+    scenario = os.path.splitext(os.path.basename(path))[0]
+    return {f"replay.{scenario}": result}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Benchmarks whose p50 latency or model calls grew by more than threshold"""
+    regressions = []
+    for name, current in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous is None:
+            continue
+
+        for metric in ("p50_ms", "model_calls"):
+            if metric not in current or not previous.get(metric):
+                continue
+            change = current[metric] / previous[metric] - 1
+            if change > threshold:
+                regressions.append({
+                    "benchmark": name,
+                    "metric": metric,
+                    "baseline": previous[metric],
+                    "current": current[metric],
+                    "change": change,
+                })
+    return regressions
+
+
+def print_results(results: dict):
+    print(f"{'benchmark':<36} | {'p50 ms':>9} | {'p90 ms':>9} | {'p99 ms':>9} | "
+          f"{'calls':>5} | {'alloc KB':>9} | {'peak KB':>9}")
+    print("-" * 104)
+    for name, r in results["benchmarks"].items():
+        calls = f"{r['model_calls']:.0f}" if "model_calls" in r else "-"
+        print(f"{name:<36} | {r['p50_ms']:>9.3f} | {r['p90_ms']:>9.3f} | {r['p99_ms']:>9.3f} | "
+              f"{calls:>5} | {r['allocated_kb']:>9.1f} | {r['peak_kb']:>9.1f}")
+
+    replays = {name: r for name, r in results["benchmarks"].items() if "model_ms" in r}
+    if replays:
+        print(f"\n{'replay':<36} | {'p50 ms':>9} | {'model ms':>9} | {'overhead ms':>11}")
+        print("-" * 74)
+        for name, r in replays.items():
+            print(f"{name:<36} | {r['p50_ms']:>9.3f} | {r['model_ms']:>9.3f} | {r['overhead_ms']:>11.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", default="micro,macro", help="Comma-separated suites to run")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed runs per micro-benchmark")
+    parser.add_argument("--macro-iterations", type=int, default=20, help="Timed runs per macro-benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated model latency in seconds")
+    parser.add_argument("--cassette", action="append", default=[],
+                        help="Also replay this recorded cassette (repeatable)")
+    parser.add_argument("--latency-scale", type=float, default=0.0,
+                        help="Replayed latency as a multiple of the recorded one (0 = full speed)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare with a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    suites = set(args.suite.split(","))
+    results = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_s": args.latency,
+            "latency_scale": args.latency_scale,
+        },
+        "benchmarks": {},
+    }
+    if "micro" in suites:
+        results["benchmarks"].update(run_micro(args.iterations))
+    if "macro" in suites:
+        results["benchmarks"].update(run_macro(args.macro_iterations, args.latency))
+    for path in args.cassette:
+        results["benchmarks"].update(run_replay(args.macro_iterations, path, args.latency_scale))
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for r in regressions:
+                print(f"   {r['benchmark']} {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} "
+                      f"(+{r['change']:.0%})")
+            sys.exit(1)
+        print(f"\n✅ No regressions over {args.threshold:.0%}")
@@ -0,0 +1,125 @@
+"""
+Model call scheduler benchmark
+
+Plans trips for several sessions at once against a scripted fake provider
+that throttles: calls over its concurrency limit or its requests per minute
+fail at once with a 429, as a real provider's would. Compares:
+
+- direct: every model call goes straight to the provider
+- scheduled: every model call goes through one ModelCallScheduler, which
+  queues calls fairly across sessions, adapts its concurrency limit to the
+  429s and retries throttled calls
+
+and reports completed and failed runs, 429s, run latency and, for the
+scheduler, queue waits and the limit it settled on.
+
+Usage:
+    python -m benchmarks.scheduler [--sessions 8] [--latency 0.1] [--provider-concurrency 4]
+                                   [--provider-rpm 600] [--output scheduler.json]
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_model import ScriptedChatModel
+from scheduler import ModelCallScheduler
+from supervisor import create_supervisor_agent
+
+
+QUERY = "Plan a 5-day trip to Tokyo"
+
+SETUPS = ("direct", "scheduled")
+
+
+def run_setup(setup: str, sessions: int, latency: float, provider_concurrency: int,
+              provider_rpm: int | None) -> dict:
+    """Run one trip per session concurrently and summarize the outcome"""
+    model = ScriptedChatModel(latency=latency, max_concurrent=provider_concurrency,
+                              requests_per_minute=provider_rpm)
+    # Ask for more than the provider allows, as a caller who doesn't know its limits would
+    scheduler = (
+        ModelCallScheduler(provider_rpm, initial_concurrency=provider_concurrency * 2, backoff_s=0.1)
+        if setup == "scheduled" else None
+    )
+    agent = create_supervisor_agent(model, use_memory=False, cache_results=False, max_concurrency=4,
+                                    scheduler=scheduler)
+
+    def plan(_):
+        start = time.perf_counter()
+        try:
+            agent.invoke(
+                {"messages": [{"role": "user", "content": QUERY}]},
+                config={"configurable": {"thread_id": str(uuid.uuid4())}},
+            )
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(plan, range(sessions)))
+    wall = time.perf_counter() - start
+
+    latencies = [r for r in results if r is not None]
+    report = {
+        "completed": len(latencies),
+        "failed": sessions - len(latencies),
+        "throttled_429": model.throttled,
+        "model_calls": model.calls,
+        "p50_s": round(statistics.median(latencies), 4) if latencies else None,
+        "max_s": round(max(latencies), 4) if latencies else None,
+        "wall_s": round(wall, 4),
+    }
+    if scheduler is not None:
+        stats = scheduler.stats()
+        report.update({
+            "avg_queue_wait_s": round(stats["avg_queue_wait_s"], 4),
+            "max_queue_wait_s": round(stats["max_queue_wait_s"], 4),
+            "retries": stats["throttled"],
+            "concurrency_limit": stats["concurrency_limit"],
+        })
+    return report
+
+
+def run(sessions: int = 8, latency: float = 0.1, provider_concurrency: int = 4,
+        provider_rpm: int | None = 600) -> dict:
+    """Outcome of the direct and scheduled set-ups"""
+    return {setup: run_setup(setup, sessions, latency, provider_concurrency, provider_rpm) for setup in SETUPS}
+
+
+def print_report(report: dict):
+    print(f"{'setup':<10} | {'done':>4} | {'failed':>6} | {'429s':>5} | {'p50 s':>7} | {'max s':>7} | {'wall s':>7}")
+    print("-" * 63)
+    for setup, r in report.items():
+        p50 = f"{r['p50_s']:>7.3f}" if r["p50_s"] is not None else f"{'-':>7}"
+        max_s = f"{r['max_s']:>7.3f}" if r["max_s"] is not None else f"{'-':>7}"
+        print(f"{setup:<10} | {r['completed']:>4} | {r['failed']:>6} | {r['throttled_429']:>5} | {p50} | "
+              f"{max_s} | {r['wall_s']:>7.3f}")
+
+    scheduled = report.get("scheduled")
+    if scheduled:
+        print(f"\nscheduler: queue wait avg {scheduled['avg_queue_wait_s']:.3f}s, "
+              f"max {scheduled['max_queue_wait_s']:.3f}s; {scheduled['retries']} retries; "
+              f"concurrency limit settled at {scheduled['concurrency_limit']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=8, help="Trips planned at once")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per model call")
+    parser.add_argument("--provider-concurrency", type=int, default=4, help="Calls the fake provider serves at once")
+    parser.add_argument("--provider-rpm", type=int, default=600, help="Requests per minute the fake provider accepts")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.sessions, args.latency, args.provider_concurrency, args.provider_rpm)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Wrote {args.output}")
@@ -0,0 +1,119 @@
+"""
+Startup benchmark
+
+Measures cold start in fresh interpreter processes with the scripted fake
+model, so the numbers are import and graph compilation time only:
+
+- time to prompt: process start until the CLI could accept a query
+- TTFA (time to first answer): the first query is submitted until its answer
+  is back
+- first answer: process start until the first answer is back, less the
+  think time
+
+for three ways of starting:
+
+- eager: import everything, build the supervisor and compile every subagent
+  before the prompt (how main.py used to start)
+- lazy: show the prompt at once and build everything when the first query
+  arrives
+- prewarmed: show the prompt at once and build on a background thread while
+  the user types (main.py today; see startup.LazyAgent)
+
+--think is how long the simulated user takes to type the first query. With
+a realistic think time the prewarmed start has the prompt of the lazy one
+and the TTFA of the eager one.
+
+Usage:
+    python -m benchmarks.startup [--runs 5] [--think 2.0] [--output startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# Runs in a fresh interpreter; STARTED is the parent's time.time() at spawn
+CHILD = """
+import json, os, sys, time
+started = float(os.environ["STARTUP_BENCH_STARTED"])
+mode, think = sys.argv[1], float(sys.argv[2])
+
+def build():
+    from benchmarks.fake_model import ScriptedChatModel
+    from supervisor import create_supervisor_agent, get_agents
+    agent = create_supervisor_agent(ScriptedChatModel(), use_memory=False, cache_results=False)
+    get_agents().prewarm()
+    return agent
+
+from startup import LazyAgent
+agent = LazyAgent(build)
+if mode == "eager":
+    agent.get()
+elif mode == "prewarmed":
+    agent.prewarm()
+prompt = time.time()
+
+time.sleep(think)
+submitted = time.time()
+agent.invoke({"messages": [{"role": "user", "content": "Plan a 5-day trip to Tokyo"}]})
+answered = time.time()
+
+print(json.dumps({
+    "prompt_s": prompt - started,
+    "ttfa_s": answered - submitted,
+    "first_answer_s": answered - started - think,
+}))
+"""
+
+MODES = ("eager", "lazy", "prewarmed")
+
+
+def measure(mode: str, think: float) -> dict:
+    """Timings of one fresh process starting in the given mode"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root, "STARTUP_BENCH_STARTED": repr(time.time())}
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, mode, str(think)],
+        cwd=root, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int = 5, think: float = 2.0) -> dict:
+    """Median timings per start mode over runs fresh processes each"""
+    report = {}
+    for mode in MODES:
+        samples = [measure(mode, think) for _ in range(runs)]
+        report[mode] = {
+            key: round(statistics.median(sample[key] for sample in samples), 4)
+            for key in samples[0]
+        }
+    return report
+
+
+def print_report(report: dict, think: float):
+    print(f"{'start':<10} | {'prompt':>8} | {'TTFA':>8} | {'first answer':>12}   (think time {think:g}s)")
+    print("-" * 50)
+    for mode, r in report.items():
+        print(f"{mode:<10} | {r['prompt_s'] * 1000:>6.0f}ms | {r['ttfa_s'] * 1000:>6.0f}ms | "
+              f"{r['first_answer_s'] * 1000:>10.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per start mode")
+    parser.add_argument("--think", type=float, default=2.0, help="Seconds before the first query")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.runs, args.think)
+    print_report(report, args.think)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"think_s": args.think, "runs": args.runs, "results": report}, f, indent=2)
+        print(f"\n✅ Wrote {args.output}")
@@ -0,0 +1,123 @@
+"""
+Tail latency benchmark
+
+Plans trips one after another with a scripted fake model whose calls are
+fast except for an occasional straggler, and compares:
+
+- baseline: every straggler holds up its plan
+- hedged: a model call running past the 90th latency percentile for its
+  agent gets a duplicate, and the first answer wins (deadline.HedgePolicy)
+- deadline: each plan has a deadline; a plan out of time answers with what
+  it has found so far (deadline.deadline)
+- hedged+deadline: both
+
+and reports latency percentiles, plans answered partially and model calls
+per plan (hedging's extra load). The first --warmup plans of each set-up
+aren't timed; they give the hedging policy its latency samples.
+
+Usage:
+    python -m benchmarks.tail_latency [--runs 60] [--latency 0.05] [--slow-every 25]
+                                      [--slow-latency 1.5] [--timeout 1.0] [--output tail.json]
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+from benchmarks.fake_model import ScriptedChatModel
+from deadline import HedgePolicy, deadline
+from supervisor import create_supervisor_agent
+
+
+QUERY = "Plan a 5-day trip to Tokyo"
+
+SETUPS = ("baseline", "hedged", "deadline", "hedged+deadline")
+
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def run_setup(setup: str, runs: int, warmup: int, latency: float, slow_every: int, slow_latency: float,
+              timeout: float) -> dict:
+    """Time runs plans with one set-up"""
+    model = ScriptedChatModel(latency=latency, slow_every=slow_every, slow_latency=slow_latency)
+    hedging = HedgePolicy(percentile=90, min_samples=10) if "hedged" in setup else None
+    agent = create_supervisor_agent(model, use_memory=False, cache_results=False, max_concurrency=4,
+                                    hedging=hedging)
+    limit = timeout if "deadline" in setup else None
+
+    samples, partial = [], 0
+    for i in range(warmup + runs):
+        start = time.perf_counter()
+        with deadline(limit):
+            result = agent.invoke(
+                {"messages": [{"role": "user", "content": QUERY}]},
+                config={"configurable": {"thread_id": str(uuid.uuid4())}},
+            )
+        elapsed = time.perf_counter() - start
+        if i < warmup:
+            continue
+        samples.append(elapsed)
+        partial += bool(result["messages"][-1].response_metadata.get("deadline_exceeded"))
+
+    report = {
+        "p50_s": round(statistics.median(samples), 4),
+        "p95_s": round(percentile(samples, 95), 4),
+        "p99_s": round(percentile(samples, 99), 4),
+        "max_s": round(max(samples), 4),
+        "partial": partial,
+        "calls_per_plan": round(model.calls / (warmup + runs), 1),
+    }
+    if hedging is not None:
+        stats = hedging.stats()
+        report.update({"hedged": stats["hedged"], "hedge_wins": stats["hedge_wins"]})
+    return report
+
+
+def run(runs: int = 60, warmup: int = 10, latency: float = 0.05, slow_every: int = 25, slow_latency: float = 1.5,
+        timeout: float = 1.0) -> dict:
+    """Latency percentiles, partial answers and model calls per set-up"""
+    return {
+        setup: run_setup(setup, runs, warmup, latency, slow_every, slow_latency, timeout)
+        for setup in SETUPS
+    }
+
+
+def print_report(report: dict):
+    print(f"{'setup':<16} | {'p50 s':>6} | {'p95 s':>6} | {'p99 s':>6} | {'max s':>6} | {'partial':>7} | "
+          f"{'calls/plan':>10} | {'hedged (won)':>12}")
+    print("-" * 93)
+    for setup, r in report.items():
+        hedged = f"{r['hedged']} ({r['hedge_wins']})" if "hedged" in r else "-"
+        print(f"{setup:<16} | {r['p50_s']:>6.3f} | {r['p95_s']:>6.3f} | {r['p99_s']:>6.3f} | {r['max_s']:>6.3f} | "
+              f"{r['partial']:>7} | {r['calls_per_plan']:>10.1f} | {hedged:>12}")
+
+    baseline = report["baseline"]["p99_s"]
+    print()
+    for setup in SETUPS[1:]:
+        p99 = report[setup]["p99_s"]
+        print(f"{setup} vs baseline: p99 {p99 - baseline:+.3f}s ({p99 / baseline - 1:+.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=60, help="Timed plans per set-up")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed plans per set-up before the timed ones")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per model call")
+    parser.add_argument("--slow-every", type=int, default=25, help="One model call in this many is a straggler")
+    parser.add_argument("--slow-latency", type=float, default=1.5, help="Seconds per straggler")
+    parser.add_argument("--timeout", type=float, default=1.0, help="Deadline per plan in seconds")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.runs, args.warmup, args.latency, args.slow_every, args.slow_latency, args.timeout)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Wrote {args.output}")
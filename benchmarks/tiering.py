@@ -0,0 +1,113 @@
+"""
+Model tiering benchmark
+
+Plans trips end to end with two scripted fake models standing in for a
+large, slow model and a small, fast one, and compares three set-ups:
+
+- single: the strong model for the supervisor and every subagent
+- per-agent: the strong model for the supervisor, the fast one for every
+  subagent (tiering.tiered_models)
+- policy: the strong model for the supervisor; each subagent model call
+  goes to the tier a TieringPolicy picks from the request's complexity
+
+Queries range from a simple request to one asking for comparisons and
+recommendations under several constraints, which the policy sends to the
+strong tier.
+
+Usage:
+    python -m benchmarks.tiering [--iterations 5] [--strong-latency 0.6] [--fast-latency 0.15]
+                                 [--latency-budget SECONDS] [--output tiering.json]
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+
+from benchmarks.fake_model import ScriptedChatModel
+from supervisor import create_supervisor_agent
+from tiering import tiered_models, two_tier_policy
+
+
+QUERIES = {
+    "simple": "Plan a 5-day trip to Tokyo",
+    "complex": "Compare direct and one-stop flights to Tokyo under $900, then recommend the best balance "
+               "of price, location and schedule for 2 adults over 7 days with a $5000 budget",
+}
+
+SETUPS = ("single", "per-agent", "policy")
+
+
+def build(setup: str, strong: ScriptedChatModel, fast: ScriptedChatModel, latency_budget_s: float | None):
+    """A supervisor for one set-up, and its tiering policy if it has one"""
+    kwargs = {"use_memory": False, "cache_results": False, "max_concurrency": 4}
+    if setup == "single":
+        return create_supervisor_agent(strong, **kwargs), None
+    if setup == "per-agent":
+        return create_supervisor_agent(strong, agent_models=tiered_models(strong, fast), **kwargs), None
+
+    policy = two_tier_policy(strong, fast, latency_budget_s=latency_budget_s)
+    return create_supervisor_agent(strong, tiering=policy, **kwargs), policy
+
+
+def run(iterations: int = 5, strong_latency: float = 0.6, fast_latency: float = 0.15,
+        latency_budget_s: float | None = None) -> dict:
+    """End-to-end latency and model calls per tier for every set-up and query"""
+    report = {}
+    for setup in SETUPS:
+        for name, query in QUERIES.items():
+            strong = ScriptedChatModel(latency=strong_latency)
+            fast = ScriptedChatModel(latency=fast_latency)
+            agent, policy = build(setup, strong, fast, latency_budget_s)
+
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                agent.invoke(
+                    {"messages": [{"role": "user", "content": query}]},
+                    config={"configurable": {"thread_id": str(uuid.uuid4())}},
+                )
+                samples.append(time.perf_counter() - start)
+
+            report[f"{setup}.{name}"] = {
+                "p50_s": round(statistics.median(samples), 4),
+                "max_s": round(max(samples), 4),
+                "strong_calls": strong.calls / iterations,
+                "fast_calls": fast.calls / iterations,
+                **({"rerouted": policy.stats()["rerouted"]} if policy else {}),
+            }
+    return report
+
+
+def print_report(report: dict):
+    print(f"{'benchmark':<20} | {'p50 s':>7} | {'max s':>7} | {'strong calls':>12} | {'fast calls':>10}")
+    print("-" * 68)
+    for name, r in report.items():
+        print(f"{name:<20} | {r['p50_s']:>7.3f} | {r['max_s']:>7.3f} | {r['strong_calls']:>12.1f} | "
+              f"{r['fast_calls']:>10.1f}")
+
+    print()
+    for query in QUERIES:
+        single = report[f"single.{query}"]["p50_s"]
+        for setup in SETUPS[1:]:
+            tiered = report[f"{setup}.{query}"]["p50_s"]
+            print(f"{setup} vs single ({query}): p50 {tiered - single:+.3f}s ({tiered / single - 1:+.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5, help="Timed runs per set-up and query")
+    parser.add_argument("--strong-latency", type=float, default=0.6, help="Seconds per strong model call")
+    parser.add_argument("--fast-latency", type=float, default=0.15, help="Seconds per fast model call")
+    parser.add_argument("--latency-budget", type=float, help="Policy latency budget per call in seconds")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.iterations, args.strong_latency, args.fast_latency, args.latency_budget)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Wrote {args.output}")
@@ -0,0 +1,122 @@
+"""
+Tool output token report
+
+Calls each domain tool on representative requests in pretty and in compact
+output mode (see tools.formatting) and reports the tokens each returns.
+Tool output is read by the subagent model and again by the supervisor, so
+every token saved here is saved at least twice per plan.
+
+Tokens are counted with tiktoken's o200k_base encoding (gpt-4o family) when
+tiktoken and its encoding file are available, otherwise estimated at 4
+characters per token.
+
+Usage:
+    python -m benchmarks.tool_tokens [--top-k 5] [--output tokens.json]
+"""
+
+import argparse
+import json
+import math
+
+from subagents import activities, flights, hotels, itinerary
+from tools.formatting import get_output_mode, set_output_mode
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except (ImportError, OSError):
+    # Not installed, or the encoding can't be downloaded (offline)
+    _encoding = None
+
+
+# tool name -> (tool, list of argument sets)
+CASES = {
+    "search_flights": (flights.search_flights, [
+        {"destination": "Tokyo"},
+        {"destination": "Paris", "budget_max": 900},
+        {"destination": "Tokyo", "preferred_stops": "direct"},
+    ]),
+    "search_hotels": (hotels.search_hotels, [
+        {"destination": "Tokyo"},
+        {"destination": "Paris", "traveler_type": "couples"},
+        {"destination": "Tokyo", "budget_per_night": 300},
+    ]),
+    "search_activities": (activities.search_activities, [
+        {"destination": "Tokyo"},
+        {"destination": "Paris", "interests": ["culture", "art"]},
+        {"destination": "Tokyo", "interests": ["food"], "budget_max": 50},
+    ]),
+    "search_restaurants": (activities.search_restaurants, [
+        {"destination": "Tokyo"},
+        {"destination": "Paris", "price_range": "$$"},
+        {"destination": "Tokyo", "cuisine": "Sushi"},
+    ]),
+    "generate_trip_summary": (itinerary.generate_trip_summary, [
+        {"destination": "Tokyo", "num_days": 5, "flight_info": "JL005 LAX-NRT $850 direct",
+         "hotel_info": "Park Hyatt Tokyo, Shinjuku, $450/night",
+         "activities_info": "Senso-ji Temple, Tsukiji Market, teamLab Planets", "total_budget": 5000},
+        {"destination": "Paris", "num_days": 3, "flight_info": "AF065 LAX-CDG $780",
+         "hotel_info": "Hotel Le Marais, $220/night", "activities_info": "Louvre, Seine cruise"},
+    ]),
+}
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text (tiktoken if available, else ~4 characters per token)"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def measure_tool(tool, cases: list, mode: str, top_k: int) -> int:
+    """Total tokens the tool returns over the cases in one output mode"""
+    set_output_mode(mode, top_k)
+    return sum(count_tokens(tool.invoke(args)) for args in cases)
+
+
+def run(top_k: int = 5) -> dict:
+    """Pretty vs compact tokens per tool, summed over its cases"""
+    previous = get_output_mode()
+    report = {}
+    try:
+        for name, (tool, cases) in CASES.items():
+            pretty = measure_tool(tool, cases, "pretty", top_k)
+            compact = measure_tool(tool, cases, "compact", top_k)
+            report[name] = {
+                "calls": len(cases),
+                "pretty_tokens": pretty,
+                "compact_tokens": compact,
+                "reduction": 1 - compact / pretty if pretty else 0.0,
+            }
+    finally:
+        set_output_mode(previous)
+    return report
+
+
+def print_report(report: dict):
+    print(f"{'tool':<24} | {'calls':>5} | {'pretty':>7} | {'compact':>7} | {'saved':>6}")
+    print("-" * 62)
+    for name, r in report.items():
+        print(f"{name:<24} | {r['calls']:>5} | {r['pretty_tokens']:>7} | {r['compact_tokens']:>7} | "
+              f"{r['reduction']:>6.0%}")
+
+    pretty = sum(r["pretty_tokens"] for r in report.values())
+    compact = sum(r["compact_tokens"] for r in report.values())
+    print("-" * 62)
+    print(f"{'total':<24} | {'':>5} | {pretty:>7} | {compact:>7} | {1 - compact / pretty:>6.0%}")
+    print(f"\nTokens counted with {'tiktoken o200k_base' if _encoding else 'a 4 characters/token estimate'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=5, help="Records kept per compact result")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.top_k)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Wrote {args.output}")
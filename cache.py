@@ -0,0 +1,182 @@
+"""
+Result Cache
+
+A bounded TTL + LRU cache for subagent results, shared by every session in
+the process. Popular destinations are asked about over and over, so caching
+the answer to "flights to Tokyo under $800" skips a whole subagent run.
+
+Keys are normalized requests rather than raw text: the destination,
+budget and preferences are extracted with the fast router's slot extractor,
+so "Find flights to TOKYO under $800" and "flights to tokyo, under $800"
+share an entry. Only words that carry no constraint (articles, "find",
+"please", the domain's own nouns) are dropped: every number (dates, party
+size, nights, prices), ranking word ("cheapest", "top rated") and comparator
+("under", "max") stays in the key, so "June 3-10" never shares an entry
+with "June 20-27", nor "2 adults" with "6 adults".
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from router import INTENT_WORDS, extract_slots
+
+
+# Seconds a result stays fresh, per domain (0 disables caching)
+DEFAULT_TTLS = {
+    "flights": 5 * 60,
+    "hotels": 15 * 60,
+    "activities": 60 * 60,
+    "itinerary": 0,
+}
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# Words that can be dropped without changing what a request asks for. Unlike
+# the router's FILLER_WORDS this keeps ranking words and comparators.
+_IGNORED_WORDS = {
+    "a", "an", "the", "to", "in", "at", "for", "me", "my", "us", "we", "i", "find", "show",
+    "search", "get", "list", "give", "want", "need", "looking", "look", "please", "can",
+    "what", "are", "is", "there", "where", "which", "of", "some", "any", "options", "option",
+}.union(*INTENT_WORDS.values())
+
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,:]\d+)*")
+
+
+def normalize_request(domain: str, request: str, model_name: str = "", **structured) -> tuple | None:
+    """Build a cache key for a subagent request.
+
+    Args:
+        domain: "flights", "hotels", "activities" or "itinerary"
+        request: The free-text request passed to the subagent
+        model_name: Model the subagent runs on (results differ per model)
+        **structured: Structured arguments the supervisor passed alongside
+            the request; these override what was parsed from the text
+
+    Returns:
+        A hashable key, or None if no destination could be identified
+    """
+    slots, rest = extract_slots(request)
+
+    for name, value in structured.items():
+        if value is not None and hasattr(slots, name):
+            setattr(slots, name, value)
+
+    if not slots.destination:
+        return None
+
+    remaining = tuple(sorted({w for w in rest.split() if w not in _IGNORED_WORDS}))
+    # The leftover words are a set; keep the numbers in the order they were written too
+    numbers = tuple(NUMBER_PATTERN.findall(request))
+
+    return (
+        domain,
+        model_name,
+        slots.destination.lower(),
+        slots.budget,
+        slots.stops,
+        slots.traveler_type,
+        slots.cuisine.lower() if slots.cuisine else None,
+        slots.price_range,
+        tuple(sorted({i.lower() for i in slots.interests})),
+        remaining,
+        numbers,
+    )
+
+
+class ResultCache:
+    """Thread-safe TTL + LRU cache bounded by the total size of cached text.
+
+    Args:
+        max_bytes: Evict least recently used entries beyond this many bytes
+        ttls: Seconds an entry stays fresh, per domain (missing or 0 = not cached)
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttls: dict | None = None):
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._entries = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: tuple) -> str | None:
+        """Return a fresh cached value, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, value: str):
+        """Cache a value under its domain's TTL, evicting LRU entries to fit"""
+        ttl = self.ttls.get(key[0], 0)
+        size = len(value.encode())
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_run(self, key: tuple | None, run) -> str:
+        """Return the cached value for key, or run() and cache its result.
+
+        run() returns the value and whether it may be cached; a value that
+        is only good for the current request (a partial answer, an error)
+        is returned without caching it.
+        """
+        if key is None or self.ttls.get(key[0], 0) <= 0:
+            return run()[0]
+
+        value = self.get(key)
+        if value is None:
+            value, cacheable = run()
+            if cacheable:
+                self.put(key, value)
+        return value
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Hit, miss, eviction and size counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
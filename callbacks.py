@@ -0,0 +1,39 @@
+"""
+Callbacks
+
+Lightweight LangChain callback handlers shared by the orchestration modes.
+
+- ModelCallCounter: counts model calls made during a run (including the
+  nested calls made by subagents)
+"""
+
+import threading
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class ModelCallCounter(BaseCallbackHandler):
+    """Count every chat/LLM model call made while this handler is attached.
+
+    Pass it in the run config (``{"callbacks": [counter]}``); child runs such
+    as subagent invocations inherit it, so nested calls are counted as well.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _record(self):
+        with self._lock:
+            self.calls += 1
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._record()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._record()
+
+    def reset(self):
+        """Reset the counter to zero"""
+        with self._lock:
+            self.calls = 0
@@ -0,0 +1,270 @@
+"""
+LLM Cassettes
+
+Record every model call the supervisor and subagents make while planning a
+scenario, then replay the scenario later without the network.
+
+- record: a CassetteChatModel wraps the real model, forwards each call and
+  stores the request, the response and how long the provider took
+- replay: the same class serves the recorded responses for matching
+  requests, at full speed or with the recorded latency (scaled)
+
+Requests are matched on their messages and bound tools (with ids and usage
+metadata stripped, as in llm_cache), so replays are deterministic even with
+subagents running in parallel. A request with no recording raises
+CassetteMiss.
+
+model_time is the wall-clock time during which at least one model call was
+in flight (real calls when recording, simulated latency when replaying), so
+wall time minus model_time is framework overhead even when subagents call
+the model in parallel.
+
+Usage:
+    python cassettes.py record tokyo "Plan a 5-day trip to Tokyo" [--model openai:gpt-4o-mini]
+    python cassettes.py replay tokyo [--latency-scale 1.0]
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Literal
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+from llm_cache import cache_key
+
+
+DEFAULT_DIR = "cassettes"
+
+
+class CassetteMiss(LookupError):
+    """A replayed run made a model request that was never recorded"""
+
+
+def cassette_path(scenario: str, directory: str = DEFAULT_DIR) -> str:
+    """File a scenario's cassette is stored in"""
+    return os.path.join(directory, f"{scenario}.json")
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records to, or replays from, a cassette file.
+
+    Args:
+        path: Cassette file
+        mode: "record" (call inner and store) or "replay" (serve stored)
+        inner: The real model, required when recording
+        latency_scale: In replay, sleep for the recorded latency times this
+            (0 = full speed, 1 = as recorded)
+        query: The scenario's user query, stored in the cassette when recording
+    """
+
+    path: str
+    mode: Literal["record", "replay"] = "replay"
+    inner: BaseChatModel | None = None
+    latency_scale: float = 0.0
+    query: str | None = None
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _interactions: list = PrivateAttr(default_factory=list)
+    _by_key: dict = PrivateAttr(default_factory=lambda: defaultdict(list))
+    _served: dict = PrivateAttr(default_factory=lambda: defaultdict(int))
+    _model_time: float = PrivateAttr(default=0.0)
+    _calls: int = PrivateAttr(default=0)
+    _in_flight: int = PrivateAttr(default=0)
+    _busy_since: float = PrivateAttr(default=0.0)
+
+    def model_post_init(self, context):
+        if self.mode == "record":
+            if self.inner is None:
+                raise ValueError("Recording needs the real model as inner")
+            return
+
+        with open(self.path) as f:
+            cassette = json.load(f)
+        self.query = self.query or cassette.get("query")
+        self._interactions = cassette["interactions"]
+        for interaction in self._interactions:
+            self._by_key[interaction["key"]].append(interaction)
+
+    @property
+    def _llm_type(self) -> str:
+        return f"cassette-{self.mode}"
+
+    @property
+    def model_time(self) -> float:
+        """Seconds with at least one model call in flight"""
+        return self._model_time
+
+    @property
+    def calls(self) -> int:
+        """Model calls made or served so far"""
+        return self._calls
+
+    def reset_timing(self):
+        """Zero model_time and calls, and replay from the first recording again"""
+        with self._lock:
+            self._model_time = 0.0
+            self._calls = 0
+            self._served.clear()
+
+    def _call_started(self):
+        with self._lock:
+            if not self._in_flight:
+                self._busy_since = time.perf_counter()
+            self._in_flight += 1
+            self._calls += 1
+
+    def _call_finished(self):
+        with self._lock:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._model_time += time.perf_counter() - self._busy_since
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _key(self, messages: list, kwargs: dict) -> str:
+        request = json.dumps({k: v for k, v in kwargs.items() if k != "stop"}, sort_keys=True, default=str)
+        return cache_key(dumps(messages), request)
+
+    def _record(self, messages: list, stop, kwargs: dict):
+        tools = kwargs.pop("tools", None)
+        model = self.inner.bind_tools(tools, **kwargs) if tools else self.inner.bind(**kwargs)
+
+        start = time.perf_counter()
+        self._call_started()
+        try:
+            response = model.invoke(messages, stop=stop)
+        finally:
+            self._call_finished()
+        return response, time.perf_counter() - start
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self._key(messages, kwargs)
+
+        if self.mode == "record":
+            response, latency = self._record(messages, stop, dict(kwargs))
+            with self._lock:
+                self._interactions.append({
+                    "key": key,
+                    "request": {
+                        "messages": [message_to_dict(m) for m in messages],
+                        "tools": [t["function"]["name"] for t in kwargs.get("tools", [])],
+                    },
+                    "response": message_to_dict(response),
+                    "latency_s": round(latency, 4),
+                })
+            return ChatResult(generations=[ChatGeneration(message=response)])
+
+        with self._lock:
+            recorded = self._by_key.get(key)
+            if not recorded:
+                raise CassetteMiss(f"No recorded response in {self.path} for this request "
+                                   f"({len(messages)} messages, key {key[:12]})")
+            # Identical requests are served in recorded order, repeating the last
+            interaction = recorded[min(self._served[key], len(recorded) - 1)]
+            self._served[key] += 1
+
+        latency = interaction["latency_s"] * self.latency_scale
+        if latency:
+            self._call_started()
+            try:
+                time.sleep(latency)
+            finally:
+                self._call_finished()
+        else:
+            with self._lock:
+                self._calls += 1
+        response = messages_from_dict([interaction["response"]])[0]
+        return ChatResult(generations=[ChatGeneration(message=response)])
+
+    def save(self):
+        """Write the recorded interactions to the cassette file"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            cassette = {
+                "query": self.query,
+                "model": getattr(self.inner, "model_name", None) or self.inner._llm_type,
+                "recorded_at": time.time(),
+                "model_time_s": round(self._model_time, 4),
+                "interactions": self._interactions,
+            }
+        with open(self.path, "w") as f:
+            json.dump(cassette, f, indent=1)
+
+
+def record_scenario(scenario: str, query: str, model_name: str = "openai:gpt-4o-mini",
+                    directory: str = DEFAULT_DIR) -> dict:
+    """Plan a query with the real model and save every model call to a cassette"""
+    from langchain.chat_models import init_chat_model
+
+    model = CassetteChatModel(
+        path=cassette_path(scenario, directory),
+        mode="record",
+        inner=init_chat_model(model_name),
+        query=query,
+    )
+    return _run(model, query, save=True)
+
+
+def replay_scenario(scenario: str, latency_scale: float = 0.0, directory: str = DEFAULT_DIR) -> dict:
+    """Replay a recorded scenario and split its time into model time and overhead"""
+    model = CassetteChatModel(path=cassette_path(scenario, directory), latency_scale=latency_scale)
+    return _run(model, model.query, save=False)
+
+
+def _run(model: CassetteChatModel, query: str, save: bool) -> dict:
+    from supervisor import create_supervisor_agent
+
+    agent = create_supervisor_agent(model, use_memory=False, cache_results=False)
+
+    start = time.perf_counter()
+    agent.invoke(
+        {"messages": [{"role": "user", "content": query}]},
+        config={"configurable": {"thread_id": str(uuid.uuid4())}},
+    )
+    wall_time = time.perf_counter() - start
+
+    if save:
+        model.save()
+
+    return {
+        "model_calls": model.calls,
+        "wall_time_s": round(wall_time, 4),
+        "model_time_s": round(model.model_time, 4),
+        "overhead_s": round(max(wall_time - model.model_time, 0.0), 4),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or replay model calls for a planning scenario")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="Cassette directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Plan a query with the real model and record it")
+    record.add_argument("scenario", help="Cassette name")
+    record.add_argument("query", help="The user's planning request")
+    record.add_argument("--model", default="openai:gpt-4o-mini", help="Model to record")
+
+    replay = commands.add_parser("replay", help="Replay a recorded scenario offline")
+    replay.add_argument("scenario", help="Cassette name")
+    replay.add_argument("--latency-scale", type=float, default=0.0,
+                        help="Simulated latency as a multiple of the recorded one (0 = full speed)")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        report = record_scenario(args.scenario, args.query, args.model, args.dir)
+    else:
+        report = replay_scenario(args.scenario, args.latency_scale, args.dir)
+
+    print(json.dumps(report, indent=2))
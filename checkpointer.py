@@ -0,0 +1,409 @@
+"""
+Compact SQLite Checkpointer
+
+A file-backed LangGraph checkpointer for long-running deployments, as an
+alternative to InMemorySaver (which keeps every checkpoint of every thread in
+process memory until the process exits).
+
+- Checkpoints are serialized with the graph's serializer and zlib-compressed
+- Only the latest ``keep_last`` checkpoints of each thread are kept
+- Threads idle for longer than ``thread_ttl`` seconds are deleted
+- The database runs in WAL mode with a busy timeout, so several worker
+  processes can share one file and a session can resume on any of them
+
+Usage:
+    checkpointer = CompactSqliteSaver(".cache/checkpoints.sqlite", keep_last=5, thread_ttl=86400)
+    agent = create_agent(model, tools, checkpointer=checkpointer)
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+"""
+
+
+class CompactSqliteSaver(BaseCheckpointSaver):
+    """SQLite checkpointer with compression, per-thread retention and idle expiry.
+
+    Args:
+        path: SQLite database file
+        keep_last: Checkpoints kept per thread and namespace (older ones are
+            deleted after each save); None keeps them all
+        thread_ttl: Seconds without activity after which a thread is deleted;
+            None keeps threads forever
+        compression_level: zlib level for checkpoint and write blobs (0-9)
+        busy_timeout: Seconds to wait for another process's write lock
+    """
+
+    # How often expired threads are swept, at most
+    EXPIRE_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        path: str = ".cache/checkpoints.sqlite",
+        keep_last: int | None = 10,
+        thread_ttl: float | None = None,
+        compression_level: int = 6,
+        busy_timeout: float = 30.0,
+        serde=None
+    ):
+        super().__init__(serde=serde)
+
+        if keep_last is not None and keep_last < 1:
+            raise ValueError("keep_last must be at least 1")
+
+        self.path = path
+        self.keep_last = keep_last
+        self.thread_ttl = thread_ttl
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._last_expired = 0.0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        """Serialize access within the process and take the write lock up front"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    # --- compact serialization ---
+
+    def _dump(self, value: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        return type_, zlib.compress(data, self.compression_level)
+
+    def _load(self, type_: str, data: bytes) -> Any:
+        return self.serde.loads_typed((type_, zlib.decompress(data)))
+
+    # --- reads ---
+
+    def _to_tuple(self, row: tuple, writes: list) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint=self._load(type_, checkpoint),
+            metadata=self._load(metadata_type, metadata),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": parent_id,
+                }}
+                if parent_id else None
+            ),
+            pending_writes=[(task_id, channel, self._load(t, v)) for task_id, channel, t, v in writes],
+        )
+
+    def _writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        return self.conn.execute(
+            "SELECT task_id, channel, type, value FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?"
+            " ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Get the requested checkpoint of a thread, or its latest one"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints"
+                    " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                    " ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+
+            if row is None:
+                return None
+            writes = self._writes(thread_id, checkpoint_ns, row[2])
+
+        return self._to_tuple(row, writes)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first, optionally filtered by metadata"""
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint,"
+                f" metadata_type, metadata FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+                params,
+            ).fetchall()
+
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+
+            metadata = self._load(row[6], row[7])
+            if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                continue
+
+            with self._lock:
+                writes = self._writes(row[0], row[1], row[2])
+            yield self._to_tuple(row, writes)
+
+            if limit is not None:
+                limit -= 1
+
+    # --- writes ---
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        """Save a checkpoint, then drop the thread's checkpoints beyond keep_last"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, data = self._dump(checkpoint)
+        metadata_type, metadata_data = self._dump(get_checkpoint_metadata(config, metadata))
+
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, data, metadata_type, metadata_data),
+            )
+            conn.execute("INSERT OR REPLACE INTO threads VALUES (?, ?)", (thread_id, time.time()))
+            if self.keep_last is not None:
+                self._compact(conn, thread_id, checkpoint_ns)
+
+        self._expire_if_due()
+
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ):
+        """Save the pending writes of a task"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special channels (errors, interrupts) replace earlier writes of the same task
+        verb = "INSERT OR REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "INSERT OR IGNORE"
+
+        rows = [
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, task_path,
+             WRITES_IDX_MAP.get(channel, idx), channel, *self._dump(value))
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self._transaction() as conn:
+            conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_thread(self, thread_id: str):
+        """Delete every checkpoint and write of a thread"""
+        with self._transaction() as conn:
+            self._delete_threads(conn, [thread_id])
+
+    # --- retention ---
+
+    def _compact(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str):
+        """Delete a thread's checkpoints (and their writes) beyond keep_last"""
+        stale = [row[0] for row in conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+            " ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.keep_last),
+        )]
+        for table in ("checkpoints", "writes"):
+            conn.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in stale],
+            )
+
+        # Subagents invoked from tools checkpoint into their own namespaces,
+        # one per call. Drop those older than the oldest root checkpoint kept.
+        if checkpoint_ns == "" and stale:
+            oldest_kept = conn.execute(
+                "SELECT MIN(checkpoint_id) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ''",
+                (thread_id,),
+            ).fetchone()[0]
+            for table in ("checkpoints", "writes"):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns != '' AND checkpoint_id < ?",
+                    (thread_id, oldest_kept),
+                )
+
+    def _delete_threads(self, conn: sqlite3.Connection, thread_ids: list):
+        for table in ("checkpoints", "writes", "threads"):
+            conn.executemany(f"DELETE FROM {table} WHERE thread_id = ?", [(t,) for t in thread_ids])
+
+    def expire_idle_threads(self, max_idle: float | None = None) -> int:
+        """Delete threads with no checkpoint saved for max_idle seconds.
+
+        Args:
+            max_idle: Idle time in seconds (defaults to thread_ttl)
+
+        Returns:
+            Number of threads deleted
+        """
+        max_idle = self.thread_ttl if max_idle is None else max_idle
+        if max_idle is None:
+            return 0
+
+        with self._transaction() as conn:
+            expired = [row[0] for row in conn.execute(
+                "SELECT thread_id FROM threads WHERE updated_at < ?", (time.time() - max_idle,)
+            )]
+            self._delete_threads(conn, expired)
+        return len(expired)
+
+    def _expire_if_due(self):
+        if self.thread_ttl is None or time.monotonic() - self._last_expired < self.EXPIRE_INTERVAL:
+            return
+        self._last_expired = time.monotonic()
+        self.expire_idle_threads()
+
+    def stats(self) -> dict:
+        """Number of threads, checkpoints and writes, and the database size"""
+        with self._lock:
+            count = lambda table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            return {
+                "threads": count("threads"),
+                "checkpoints": count("checkpoints"),
+                "writes": count("writes"),
+                "bytes": os.path.getsize(self.path),
+            }
+
+    # --- async API (SQLite calls run in a worker thread) ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ):
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str):
+        await asyncio.to_thread(self.delete_thread, thread_id)
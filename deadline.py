@@ -0,0 +1,326 @@
+"""
+Deadlines and Hedged Model Calls
+
+A deadline is set once at the entry point and applies to everything the
+request does. It lives in a context variable, so the supervisor, its tool
+calls, the subagents they run and every model call see it without being
+passed it. LangGraph copies the context into its worker threads and tasks.
+
+DeadlineMiddleware (on the supervisor and every subagent) enforces it per
+model call:
+
+- a call is cut off when the deadline expires: it is sent with the time
+  left as the provider request's timeout, so the client stops it, and async
+  calls are cancelled as well. Sync calls run on the caller's thread; only
+  hedged ones use a small shared pool
+- instead of failing, an agent out of time answers with what its tools have
+  returned this turn. A subagent's partial answer becomes the supervisor's
+  tool result, and the supervisor's becomes the reply
+- with a HedgePolicy, a call still running after the policy's latency
+  percentile for that agent gets a duplicate. Whichever returns first wins,
+  which takes most stragglers out of p99. A budget caps duplicates at a
+  fraction of calls, so a slow provider doesn't get twice the load. Without
+  a deadline, a sync duplicate that loses runs to completion in the pool
+
+Usage:
+    with deadline(30):
+        agent.invoke(...)
+
+    agent = create_supervisor_agent(hedging=HedgePolicy(percentile=95))
+
+main.py takes --timeout and --hedge; server.py takes the same flags and a
+per-request "timeout_s".
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from langchain.agents.middleware import AgentMiddleware, ModelResponse
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from streaming import emit
+
+
+# time.monotonic() by which the current request must finish, or None
+_deadline: contextvars.ContextVar = contextvars.ContextVar("deadline", default=None)
+
+# Sync model calls running on the shared pool at once; a hedge that can't get
+# a slot isn't sent, and a call that can't runs on the caller's thread unhedged
+MAX_POOLED_CALLS = 32
+
+_pool = ThreadPoolExecutor(max_workers=MAX_POOLED_CALLS, thread_name_prefix="model-call")
+_pool_slots = threading.BoundedSemaphore(MAX_POOLED_CALLS)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline expired"""
+
+
+@contextlib.contextmanager
+def deadline(seconds: float | None):
+    """Run the block under a deadline seconds from now (None = no deadline).
+
+    A deadline inside another one can only shorten it.
+    """
+    if seconds is None:
+        yield
+        return
+
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left before the current deadline (None = no deadline)"""
+    at = _deadline.get()
+    return None if at is None else max(0.0, at - time.monotonic())
+
+
+def check():
+    """Raise DeadlineExceeded if the current deadline has expired"""
+    if remaining() == 0.0:
+        raise DeadlineExceeded("Deadline exceeded")
+
+
+def sleep(seconds: float):
+    """time.sleep(), cut short by the deadline; raises DeadlineExceeded if it expired"""
+    left = remaining()
+    time.sleep(seconds if left is None else min(seconds, left))
+    check()
+
+
+async def asleep(seconds: float):
+    """asyncio.sleep(), cut short by the deadline; raises DeadlineExceeded if it expired"""
+    left = remaining()
+    await asyncio.sleep(seconds if left is None else min(seconds, left))
+    check()
+
+
+def timeout_kwargs() -> dict:
+    """Model call kwargs making the provider request time out with the deadline ({} without one)"""
+    check()
+    left = remaining()
+    return {} if left is None else {"timeout": left}
+
+
+def with_timeout(request):
+    """A middleware model request whose provider call times out with the deadline"""
+    timeout = timeout_kwargs()
+    return request.override(model_settings={**request.model_settings, **timeout}) if timeout else request
+
+
+def partial_answer(results: list) -> str:
+    """What an agent out of time answers with, given the results it has so far"""
+    results = [r for r in results if r]
+    if not results:
+        return "I ran out of time before finding anything. Please try again, or narrow the request."
+    return "I ran out of time before finishing. Here is what I found so far:\n\n" + "\n\n".join(results)
+
+
+def _percentile(samples, percentile: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+
+class HedgePolicy:
+    """When to send a duplicate of a slow model call.
+
+    Args:
+        percentile: A call running longer than this percentile of recent
+            latencies (per agent) is hedged
+        min_samples: Latencies to observe before hedging anything
+        window: Recent latencies kept per agent
+        max_ratio: Duplicates allowed as a fraction of calls
+    """
+
+    def __init__(self, percentile: float = 95, min_samples: int = 20, window: int = 200, max_ratio: float = 0.1):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.max_ratio = max_ratio
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._calls = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    def threshold(self, key: str) -> float | None:
+        """Seconds after which a call for key is hedged (None = don't hedge it)"""
+        with self._lock:
+            self._calls += 1
+            samples = self._latencies.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            return _percentile(samples, self.percentile)
+
+    def allow(self) -> bool:
+        """Take a duplicate from the budget, if there is one left"""
+        with self._lock:
+            if self._hedged + 1 > self.max_ratio * self._calls:
+                return False
+            self._hedged += 1
+            return True
+
+    def observe(self, key: str, seconds: float, hedge_won: bool = False):
+        """Record how long a call for key took (to its first result)"""
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(seconds)
+            self._hedge_wins += hedge_won
+
+    def stats(self) -> dict:
+        """Calls, duplicates sent and won, and the current threshold per agent"""
+        with self._lock:
+            stats = {"calls": self._calls, "hedged": self._hedged, "hedge_wins": self._hedge_wins}
+            for key, samples in self._latencies.items():
+                if len(samples) >= self.min_samples:
+                    stats[f"{key}_threshold_s"] = _percentile(samples, self.percentile)
+        return stats
+
+
+def _submit(fn) -> Future | None:
+    """Run fn() on the shared pool in the current context, or None if the pool is full"""
+    if not _pool_slots.acquire(blocking=False):
+        return None
+    future = _pool.submit(contextvars.copy_context().run, fn)
+    future.add_done_callback(lambda _: _pool_slots.release())
+    return future
+
+
+class DeadlineMiddleware(AgentMiddleware):
+    """Bounds an agent's model calls by the request deadline, and hedges slow ones.
+
+    Args:
+        agent: The agent, for events and per-agent hedging thresholds
+        hedging: A HedgePolicy (optional)
+    """
+
+    def __init__(self, agent: str, hedging: HedgePolicy | None = None):
+        super().__init__()
+        self.agent = agent
+        self.hedging = hedging
+
+    def _timed_out(self, request) -> ModelResponse:
+        """This turn's tool results as the agent's answer"""
+        turn_start = max((i for i, m in enumerate(request.messages) if isinstance(m, HumanMessage)), default=0)
+        results = [m.text for m in request.messages[turn_start:] if isinstance(m, ToolMessage)]
+        emit({"type": "deadline_exceeded", "agent": self.agent})
+        message = AIMessage(partial_answer(results), response_metadata={"deadline_exceeded": True})
+        return ModelResponse(result=[message])
+
+    def _call(self, request, handler):
+        """One call on the caller's thread, stopped by the provider timeout at the deadline"""
+        start = time.perf_counter()
+        try:
+            response = handler(with_timeout(request))
+        except Exception:
+            # The provider's timeout, or a scheduler dropping the call for the deadline
+            if remaining() == 0.0:
+                return self._timed_out(request)
+            raise
+        if self.hedging:
+            self.hedging.observe(self.agent, time.perf_counter() - start)
+        return response
+
+    def wrap_model_call(self, request, handler):
+        if remaining() == 0.0:
+            return self._timed_out(request)
+
+        hedge_after = self.hedging.threshold(self.agent) if self.hedging else None
+        primary = _submit(lambda: handler(with_timeout(request))) if hedge_after is not None else None
+        if primary is None:
+            return self._call(request, handler)
+
+        start = time.perf_counter()
+        calls = [primary]
+        while True:
+            timeout = remaining()
+            if hedge_after is not None and len(calls) == 1:
+                hedge_in = max(0.0, hedge_after - (time.perf_counter() - start))
+                timeout = hedge_in if timeout is None else min(timeout, hedge_in)
+
+            done, _ = wait(calls, timeout=timeout, return_when=FIRST_COMPLETED)
+            winner = next((call for call in done if call.exception() is None), None)
+            if winner is not None:
+                self.hedging.observe(self.agent, time.perf_counter() - start, hedge_won=winner is not primary)
+                return winner.result()
+            if done and len(done) == len(calls):
+                # Every call failed; it may have timed out or a scheduler dropped it for the deadline
+                if remaining() == 0.0:
+                    return self._timed_out(request)
+                return next(iter(done)).result()
+            if done:
+                # One failed while the other is still running: wait for that one
+                calls = [call for call in calls if call not in done]
+                hedge_after = None
+                continue
+            if remaining() == 0.0:
+                # The calls still running stop at their provider timeout
+                return self._timed_out(request)
+            hedge = None
+            if hedge_after is not None and len(calls) == 1 and self.hedging.allow():
+                hedge = _submit(lambda: handler(with_timeout(request)))
+            if hedge is not None:
+                calls.append(hedge)
+            else:
+                hedge_after = None
+
+    async def awrap_model_call(self, request, handler):
+        left = remaining()
+        if left == 0.0:
+            return self._timed_out(request)
+
+        hedge_after = self.hedging.threshold(self.agent) if self.hedging else None
+        if left is None and hedge_after is None:
+            start = time.perf_counter()
+            response = await handler(request)
+            if self.hedging:
+                self.hedging.observe(self.agent, time.perf_counter() - start)
+            return response
+
+        request = with_timeout(request)
+        start = time.perf_counter()
+        calls = [asyncio.ensure_future(handler(request))]
+        primary = calls[0]
+        try:
+            while True:
+                timeout = remaining()
+                if hedge_after is not None and len(calls) == 1:
+                    hedge_in = max(0.0, hedge_after - (time.perf_counter() - start))
+                    timeout = hedge_in if timeout is None else min(timeout, hedge_in)
+
+                done, _ = await asyncio.wait(calls, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((call for call in done if call.exception() is None), None)
+                if winner is not None:
+                    if self.hedging:
+                        self.hedging.observe(self.agent, time.perf_counter() - start,
+                                             hedge_won=winner is not primary)
+                    return winner.result()
+                if done and len(done) == len(calls):
+                    if remaining() == 0.0:
+                        return self._timed_out(request)
+                    return next(iter(done)).result()
+                if done:
+                    calls = [call for call in calls if call not in done]
+                    hedge_after = None
+                    continue
+                if remaining() == 0.0:
+                    return self._timed_out(request)
+                if hedge_after is not None and len(calls) == 1 and self.hedging.allow():
+                    calls.append(asyncio.ensure_future(handler(request)))
+                else:
+                    hedge_after = None
+        finally:
+            for call in calls:
+                call.cancel()
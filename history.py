@@ -0,0 +1,197 @@
+"""
+History Compaction
+
+Keeps the supervisor's prompt size roughly constant over long planning
+sessions. Before every model call:
+
+1. Tool outputs from earlier turns are collapsed into one-line structured
+   summaries (header plus item names and prices) - the model already used
+   the full text when that turn was answered.
+2. If the history is still over the token budget, the oldest turns are
+   dropped whole (cuts only happen at user messages, so tool calls are never
+   separated from their results) and folded into a short digest message at
+   the top of the conversation.
+
+The current turn is never touched. Everything here is deterministic and makes
+no model calls.
+"""
+
+import re
+import threading
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+
+PRICE_PATTERN = re.compile(r"\$\d[\d,]*(?:\.\d+)?")
+
+DIGEST_HEADER = "Summary of earlier conversation turns:"
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[:max_chars - 3].rstrip() + "..."
+
+
+def summarize_tool_output(name: str, text: str, max_items: int = 5) -> str:
+    """Collapse a formatted tool result into a one-line summary.
+
+    Tool results are a header line followed by items, each an unindented
+    title line with indented detail lines. The summary keeps the header and
+    each item's title and first price.
+    """
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return f"[{name}] (no output)"
+
+    items = []
+    for line in lines[1:]:
+        if not line[0].isspace():
+            items.append([_truncate(line.strip(" *-•"), 60), None])
+        elif items and items[-1][1] is None and (match := PRICE_PATTERN.search(line)):
+            items[-1][1] = match.group(0)
+
+    parts = [f"{title} ({price})" if price else title for title, price in items[:max_items]]
+    if len(items) > max_items:
+        parts.append(f"+{len(items) - max_items} more")
+
+    summary = f"[{name}] {_truncate(lines[0], 100)}"
+    if parts:
+        summary += " " + "; ".join(parts)
+    return summary
+
+
+def _split_turns(messages: list) -> list:
+    """Group messages into turns, each starting at a user message"""
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _is_digest(message) -> bool:
+    return isinstance(message, HumanMessage) and message.additional_kwargs.get("history_digest", False)
+
+
+def _digest_turn(turn: list) -> str:
+    """One line per dropped turn: the question, tools used and the final answer"""
+    question = next((m.text for m in turn if isinstance(m, HumanMessage)), "")
+    tools = sorted({m.name for m in turn if isinstance(m, ToolMessage) and m.name})
+    answer = next((m.text for m in reversed(turn) if isinstance(m, AIMessage) and m.text), "")
+
+    line = f"- User: {_truncate(question, 150)}"
+    if tools:
+        line += f" | Tools: {', '.join(tools)}"
+    if answer:
+        line += f" | Assistant: {_truncate(answer, 200)}"
+    return line
+
+
+class HistoryCompactionMiddleware(AgentMiddleware):
+    """Compacts the conversation before each model call to stay under a token budget.
+
+    Args:
+        max_tokens: Approximate token budget for the whole history; the current
+            turn is always kept, even when it alone is over budget
+        max_summary_items: Items listed per collapsed tool output
+        max_digest_chars: Size cap of the digest of dropped turns (the oldest
+            lines after the first are dropped to fit)
+    """
+
+    def __init__(self, max_tokens: int = 3000, max_summary_items: int = 5, max_digest_chars: int = 2000):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.max_summary_items = max_summary_items
+        self.max_digest_chars = max_digest_chars
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.compactions = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.last_tokens = None
+
+    def _collapse_tools(self, turn: list) -> list:
+        compacted = []
+        for message in turn:
+            if isinstance(message, ToolMessage) and not message.additional_kwargs.get("compacted"):
+                summary = summarize_tool_output(message.name or "tool", message.text, self.max_summary_items)
+                if len(summary) < len(message.text):
+                    message = message.model_copy(update={
+                        "content": summary,
+                        "additional_kwargs": {**message.additional_kwargs, "compacted": True},
+                    })
+            compacted.append(message)
+        return compacted
+
+    def _build_digest(self, previous, dropped: list) -> HumanMessage:
+        lines = previous.text.splitlines()[1:] if previous is not None else []
+        lines += [_digest_turn(turn) for turn in dropped]
+
+        # Keep the first turn (it usually states the trip) and the most recent ones
+        while len(lines) > 2 and sum(len(line) + 1 for line in lines) > self.max_digest_chars:
+            del lines[1]
+
+        return HumanMessage(
+            content="\n".join([DIGEST_HEADER, *lines]),
+            additional_kwargs={"history_digest": True},
+        )
+
+    def compact(self, messages: list) -> list | None:
+        """Return the compacted history, or None if nothing needed to change"""
+        digest = messages[0] if messages and _is_digest(messages[0]) else None
+        turns = _split_turns(messages[1:] if digest is not None else messages)
+        if len(turns) < 2:
+            return None
+
+        *earlier, current = turns
+        earlier = [self._collapse_tools(turn) for turn in earlier]
+
+        dropped = []
+        head = [digest] if digest is not None else []
+        while earlier and count_tokens_approximately(
+            head + [m for turn in earlier for m in turn] + current
+        ) > self.max_tokens:
+            dropped.append(earlier.pop(0))
+            head = [self._build_digest(digest, dropped)]
+
+        compacted = head + [m for turn in earlier for m in turn] + current
+        changed = dropped or any(
+            a is not b for a, b in zip(compacted[len(head):], messages[len(head):])
+        )
+        return compacted if changed else None
+
+    def before_model(self, state, runtime) -> dict | None:
+        messages = state["messages"]
+        before = count_tokens_approximately(messages)
+        compacted = self.compact(messages)
+        after = before if compacted is None else count_tokens_approximately(compacted)
+
+        with self._lock:
+            self.calls += 1
+            self.tokens_before += before
+            self.tokens_after += after
+            self.last_tokens = after
+            if compacted is not None:
+                self.compactions += 1
+
+        if compacted is None:
+            return None
+        return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *compacted]}
+
+    async def abefore_model(self, state, runtime) -> dict | None:
+        return self.before_model(state, runtime)
+
+    def stats(self) -> dict:
+        """Approximate context tokens per model call, before and after compaction"""
+        with self._lock:
+            return {
+                "model_calls": self.calls,
+                "compactions": self.compactions,
+                "avg_tokens_before": self.tokens_before / self.calls if self.calls else 0.0,
+                "avg_tokens_after": self.tokens_after / self.calls if self.calls else 0.0,
+                "last_tokens": self.last_tokens,
+            }
@@ -0,0 +1,322 @@
+"""
+Instrumentation
+
+A callback handler that times the parts of each plan and exports what it
+saw:
+
+- spans: every model call, subagent invocation and tool call, tagged with
+  the agent it ran in (supervisor or a subagent), with token usage and LLM
+  cache hits for model calls and output size for tools
+- metrics: Prometheus text format, with latency histograms and token,
+  output size, cache hit and error counters, plus gauges from any
+  registered stats() source (result cache, LLM cache, router, ...)
+- traces: the span tree of each finished request, nested as the calls were
+
+The handler is attached to the supervisor run, and subagent and tool runs
+inherit it. When it isn't attached nothing is recorded and there is no
+overhead.
+
+Usage:
+    instrumentation = Instrumentation()
+    agent = create_supervisor_agent(instrumentation=instrumentation)
+    agent.invoke(...)
+    print(format_trace(instrumentation.traces(1)[0]))
+    print(instrumentation.render_prometheus())
+"""
+
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+AGENTS = ("flights_agent", "hotels_agent", "activities_agent", "itinerary_agent")
+
+# Latency histogram bucket bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+@dataclass
+class Span:
+    """One timed model call, subagent invocation, tool call or request"""
+    kind: str
+    name: str
+    agent: str
+    start: float
+    duration_s: float | None = None
+    status: str = "ok"
+    attributes: dict = field(default_factory=dict)
+    children: list = field(default_factory=list)
+
+    def to_dict(self, origin: float) -> dict:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "agent": self.agent,
+            "offset_s": round(self.start - origin, 6),
+            "duration_s": round(self.duration_s, 6) if self.duration_s is not None else None,
+            "status": self.status,
+            **({"attributes": self.attributes} if self.attributes else {}),
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+
+
+class _Histogram:
+    """Cumulative Prometheus-style histogram"""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _agent_of(tags: list | None) -> str:
+    """The subagent a run belongs to (subagent runs are tagged with it), else the supervisor"""
+    for tag in tags or ():
+        if tag in AGENTS:
+            return tag
+    return "supervisor"
+
+
+def _labels(**labels) -> str:
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+class Instrumentation(BaseCallbackHandler):
+    """Record spans, metrics and traces for every run it is attached to.
+
+    Args:
+        max_traces: Finished request traces kept in memory (oldest dropped)
+        namespace: Prefix of the exported metric names
+    """
+
+    # Time events as they happen, also in async runs
+    run_inline = True
+
+    def __init__(self, max_traces: int = 100, namespace: str = "travel"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._open = {}     # run_id -> Span still running
+        self._parents = {}  # run_id -> parent run_id, for runs without a span
+        self._roots = {}    # run_id -> root Span of a request in progress
+        self._traces = deque(maxlen=max_traces)
+        self._durations = defaultdict(_Histogram)
+        self._counters = defaultdict(float)
+        self._stats_sources = {}
+        self.finished_requests = 0
+
+    # Span bookkeeping
+
+    def _owner(self, parent_run_id):
+        """Nearest open span above a run"""
+        while parent_run_id is not None and parent_run_id not in self._open:
+            parent_run_id = self._parents.get(parent_run_id)
+        return self._open.get(parent_run_id)
+
+    def _start(self, run_id, parent_run_id, kind: str, name: str, agent: str, **attributes):
+        span = Span(kind, name, agent, time.perf_counter(), attributes=attributes)
+        with self._lock:
+            parent = self._owner(parent_run_id)
+            if parent is not None:
+                parent.children.append(span)
+            self._open[run_id] = span
+            if parent_run_id is None:
+                self._roots[run_id] = span
+
+    def _end(self, run_id, status: str = "ok", **attributes) -> Span | None:
+        with self._lock:
+            self._parents.pop(run_id, None)
+            span = self._open.pop(run_id, None)
+            if span is None:
+                return None
+
+            span.duration_s = time.perf_counter() - span.start
+            span.status = status
+            span.attributes.update(attributes)
+
+            labels = (span.kind, span.agent, span.name)
+            self._durations[labels].observe(span.duration_s)
+            if status != "ok":
+                self._counters[("errors_total", *labels)] += 1
+
+            if self._roots.pop(run_id, None) is not None:
+                self._traces.append(span)
+                self.finished_requests += 1
+            return span
+
+    def _track(self, run_id, parent_run_id):
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+
+    # Callback hooks
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "chain")
+        if parent_run_id is None:
+            self._start(run_id, None, "request", name, _agent_of(tags))
+        elif name in AGENTS:
+            self._start(run_id, parent_run_id, "subagent", name, name)
+        else:
+            self._track(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error", error=type(error).__name__)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None,
+                            metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or kwargs.get("name") or "model"
+        self._start(run_id, parent_run_id, "model", model, _agent_of(tags))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, metadata=None,
+                     **kwargs):
+        model = (metadata or {}).get("ls_model_name") or kwargs.get("name") or "llm"
+        self._start(run_id, parent_run_id, "model", model, _agent_of(tags))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        attributes = {}
+        message = getattr(response.generations[0][0], "message", None) if response.generations else None
+        usage = getattr(message, "usage_metadata", None) or {}
+        if "input_tokens" in usage:
+            attributes["input_tokens"] = usage["input_tokens"]
+            attributes["output_tokens"] = usage["output_tokens"]
+        # LangChain zeroes the cost of responses served from the LLM cache
+        if usage.get("total_cost") == 0:
+            attributes["cache_hit"] = True
+
+        span = self._end(run_id, **attributes)
+        if span is None:
+            return
+        with self._lock:
+            for direction in ("input", "output"):
+                self._counters[("model_tokens_total", span.agent, direction)] += attributes.get(
+                    f"{direction}_tokens", 0)
+            if attributes.get("cache_hit"):
+                self._counters[("model_cache_hits_total", span.agent)] += 1
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error", error=type(error).__name__)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._start(run_id, parent_run_id, "tool", name, _agent_of(tags))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        text = getattr(output, "content", output)
+        chars = len(text if isinstance(text, str) else str(text))
+        # Same 4 characters per token estimate as count_tokens_approximately
+        tokens = math.ceil(chars / 4)
+
+        span = self._end(run_id, output_chars=chars, output_tokens=tokens)
+        if span is None:
+            return
+        with self._lock:
+            self._counters[("tool_output_chars_total", span.agent, span.name)] += chars
+            self._counters[("tool_output_tokens_total", span.agent, span.name)] += tokens
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "error", error=type(error).__name__)
+
+    # Export
+
+    def register_stats(self, name: str, stats):
+        """Export the numeric values of stats() (or None) as <namespace>_<name>_<key> gauges"""
+        with self._lock:
+            self._stats_sources[name] = stats
+
+    def traces(self, limit: int | None = None) -> list:
+        """Span trees of the most recent finished requests, newest first"""
+        with self._lock:
+            finished = list(self._traces)[::-1][:limit]
+        return [root.to_dict(root.start) for root in finished]
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        prefix = self.namespace
+        lines = [
+            f"# HELP {prefix}_span_duration_seconds Duration of model calls, subagent runs, tool calls and requests",
+            f"# TYPE {prefix}_span_duration_seconds histogram",
+        ]
+
+        with self._lock:
+            durations = {labels: (list(h.counts), h.count, h.sum) for labels, h in self._durations.items()}
+            counters = dict(self._counters)
+            sources = dict(self._stats_sources)
+
+        for (kind, agent, name), (counts, count, total) in sorted(durations.items()):
+            labels = {"kind": kind, "agent": agent, "name": name}
+            for bound, bucket_count in zip(BUCKETS, counts):
+                lines.append(f"{prefix}_span_duration_seconds_bucket{_labels(**labels, le=bound)} {bucket_count}")
+            lines.append(f"{prefix}_span_duration_seconds_bucket{_labels(**labels, le='+Inf')} {count}")
+            lines.append(f"{prefix}_span_duration_seconds_sum{_labels(**labels)} {total}")
+            lines.append(f"{prefix}_span_duration_seconds_count{_labels(**labels)} {count}")
+
+        counter_labels = {
+            "errors_total": ("kind", "agent", "name"),
+            "model_tokens_total": ("agent", "direction"),
+            "model_cache_hits_total": ("agent",),
+            "tool_output_chars_total": ("agent", "name"),
+            "tool_output_tokens_total": ("agent", "name"),
+        }
+        for metric, label_names in counter_labels.items():
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for key, value in sorted(counters.items()):
+                if key[0] == metric:
+                    lines.append(f"{prefix}_{metric}{_labels(**dict(zip(label_names, key[1:])))} {value:g}")
+
+        for source, stats in sources.items():
+            for key, value in sorted((stats() or {}).items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{source}_{key} gauge")
+                    lines.append(f"{prefix}_{source}_{key} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write the metrics to a file atomically (e.g. for node_exporter's textfile collector)"""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(temporary, path)
+
+
+def format_trace(trace: dict) -> str:
+    """A trace tree as indented text, one span per line"""
+    lines = []
+
+    def visit(span: dict, depth: int):
+        details = []
+        attributes = span.get("attributes", {})
+        if "input_tokens" in attributes:
+            details.append(f"{attributes['input_tokens']}→{attributes['output_tokens']} tokens")
+        if attributes.get("cache_hit"):
+            details.append("cached")
+        if "output_chars" in attributes:
+            details.append(f"{attributes['output_chars']} chars")
+        if span["status"] != "ok":
+            details.append(span["status"])
+        duration = f"{span['duration_s'] * 1000:.1f}ms" if span["duration_s"] is not None else "running"
+        label = span["name"] if span["agent"] in ("supervisor", span["name"]) else f"{span['agent']}/{span['name']}"
+
+        lines.append(f"{'  ' * depth}{span['kind']} {label} {duration}"
+                     + (f" ({', '.join(details)})" if details else ""))
+        for child in span["children"]:
+            visit(child, depth + 1)
+
+    visit(trace, 0)
+    return "\n".join(lines)
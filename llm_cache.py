@@ -0,0 +1,211 @@
+"""
+LLM Response Cache
+
+A two-tier cache for chat model responses, plugged into LangChain's model
+cache hook (the ``cache=`` field of every chat model):
+
+- a small in-memory LRU tier for the hottest prompts
+- a SQLite tier on disk that survives restarts and is shared between
+  processes on the same machine
+
+Entries are keyed on the model configuration (provider, model name and
+parameters), the bound tool schemas and the conversation messages. Fields
+that change on every call without changing the meaning of a message - ids,
+token usage and provider metadata, and the request timeout - are left out
+of the key, so a replayed multi-step agent run keeps hitting the cache
+after its first step.
+
+Usage:
+    cache = TieredLLMCache(".cache/llm.sqlite")
+    model = init_chat_model("openai:gpt-4o-mini", cache=cache)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+
+# Message fields that don't affect what the model would answer
+VOLATILE_MESSAGE_FIELDS = ("id", "usage_metadata", "response_metadata")
+
+# Call parameters that don't either: a deadline's time left is passed as the request timeout
+VOLATILE_PARAM_PATTERN = re.compile(r", \('timeout', [^()]*\)|\('timeout', [^()]*\)(?:, )?")
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Stable key for a serialized prompt and model configuration"""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        messages = None
+
+    if isinstance(messages, list):
+        for message in messages:
+            if isinstance(message, dict) and isinstance(message.get("kwargs"), dict):
+                for name in VOLATILE_MESSAGE_FIELDS:
+                    message["kwargs"].pop(name, None)
+        prompt = json.dumps(messages, sort_keys=True)
+
+    llm_string = VOLATILE_PARAM_PATTERN.sub("", llm_string)
+    return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+
+def _serialize(generations: RETURN_VAL_TYPE) -> str:
+    return json.dumps([
+        {"message": message_to_dict(g.message), "generation_info": g.generation_info}
+        if isinstance(g, ChatGeneration) else
+        {"text": g.text, "generation_info": g.generation_info}
+        for g in generations
+    ])
+
+def _deserialize(value: str) -> RETURN_VAL_TYPE:
+    return [
+        ChatGeneration(message=messages_from_dict([g["message"]])[0], generation_info=g["generation_info"])
+        if "message" in g else
+        Generation(text=g["text"], generation_info=g["generation_info"])
+        for g in json.loads(value)
+    ]
+
+
+class TieredLLMCache(BaseCache):
+    """In-memory LRU in front of an optional SQLite store.
+
+    Args:
+        path: SQLite database file, or None for a memory-only cache
+        max_memory_entries: Responses kept in the memory tier
+        max_disk_entries: Responses kept on disk; the least recently used
+            are evicted beyond this
+    """
+
+    def __init__(
+        self,
+        path: str | None = ".cache/llm_cache.sqlite",
+        max_memory_entries: int = 1024,
+        max_disk_entries: int = 100_000
+    ):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()  # key -> serialized generations
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # One transaction, so processes opening the same file at once agree on the row count
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            # Rows in responses, kept by triggers so no writer (in any process) has to count them
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_count (id INTEGER PRIMARY KEY CHECK (id = 0), n INTEGER NOT NULL)"
+            )
+            self._db.execute("INSERT OR IGNORE INTO response_count VALUES (0, (SELECT COUNT(*) FROM responses))")
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_inserted AFTER INSERT ON responses"
+                " BEGIN UPDATE response_count SET n = n + 1; END"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_deleted AFTER DELETE ON responses"
+                " BEGIN UPDATE response_count SET n = n - 1; END"
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, value: str):
+        """Put a value in the memory tier, evicting the least recently used"""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        key = cache_key(prompt, llm_string)
+
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return _deserialize(value)
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return _deserialize(row[0])
+
+            self.misses += 1
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        key = cache_key(prompt, llm_string)
+        value = _serialize(return_val)
+
+        with self._lock:
+            self._remember(key, value)
+            if self._db is None:
+                return
+
+            # An upsert rather than INSERT OR REPLACE: REPLACE's delete doesn't fire the count trigger
+            self._db.execute(
+                "INSERT INTO responses (key, value, accessed) VALUES (?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value, accessed = excluded.accessed",
+                (key, value, time.time()),
+            )
+            # Read in the insert's write transaction, so it includes every other process's rows
+            excess = self._db.execute("SELECT n FROM response_count").fetchone()[0] - self.max_disk_entries
+            if excess > 0:
+                evicted = self._db.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                    (excess,),
+                ).rowcount
+                self.evictions += evicted
+            self._db.commit()
+
+    def clear(self, **kwargs):
+        """Drop every cached response from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Hit, miss and size counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            disk_entries = (
+                self._db.execute("SELECT n FROM response_count").fetchone()[0] if self._db is not None else 0
+            )
+            return {
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
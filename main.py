@@ -1,46 +1,229 @@
+import argparse
 import uuid
-from supervisor import create_supervisor_agent
+from startup import LazyAgent
+from tools.formatting import OUTPUT_MODES, set_output_mode
 
 
 def stream_response(agent, query: str, config: dict):
 
-    """Stream the agent's response and print messages"""
+    """Stream the agent's response and print tokens and progress as they arrive"""
+    from streaming import stream_events
+
     print(f"📝 User: {query}\n")
     print("-" * 50)
 
-    for step in agent.stream(
+    answering = False
+    for event in stream_events(
+        agent,
         {"messages": [{"role": "user", "content": query}]},
         config=config
     ):
-        for update in step.values():
-            if isinstance(update, dict):
-                for message in update.get("messages", []):
-                    # Check and print tool call
-                    if hasattr(message, "tool_calls") and message.tool_calls:
-                        for tool_call in message.tool_calls:
-                            print(f"\n🔧 Calling: {tool_call['name']}")
+        kind = event["type"]
+
+        if kind == "token":
+            if not answering:
+                print("\n🤖 Assistant:")
+                answering = True
+            print(event["text"], end="", flush=True)
+            continue
+
+        if answering:
+            print()
+            answering = False
+
+        if kind == "tool_call":
+            print(f"\n🔧 Calling: {event['name']}")
+        elif kind == "subagent_start":
+            print(f"   ↳ {event['agent']} started")
+        elif kind == "subagent_tool":
+            print(f"   ↳ {event['agent']} → {event['tool']}")
+        elif kind == "subagent_end":
+            print(f"   ✓ {event['agent']} done ({event['elapsed_s']:.1f}s)")
+        elif kind == "deadline_exceeded":
+            print(f"   ⏱️  {event['agent']} ran out of time")
+        elif kind == "message":
+            print(f"\n🤖 Assistant:\n{event['text']}")
+
+    if answering:
+        print()
+
+
+def print_router_stats(stats: dict):
+    """Print the fast router's hit rate and saved latency"""
+    print(f"\n⚡ Fast router: {stats['hits']}/{stats['queries']} queries answered without the LLM "
+          f"({stats['hit_rate']:.0%})")
+    if stats["latency_saved_s"] is not None:
+        print(f"   Avg fast path: {stats['avg_fast_latency_s'] * 1000:.1f}ms | "
+              f"Avg agent: {stats['avg_agent_latency_s']:.2f}s | "
+              f"Saved: {stats['latency_saved_s']:.2f}s")
+
+
+def print_cache_stats(stats: dict):
+    """Print the subagent result cache's hit rate and size"""
+    print(f"\n🗄️  Result cache: {stats['hits']}/{stats['hits'] + stats['misses']} lookups hit "
+          f"({stats['hit_rate']:.0%}) | {stats['entries']} entries, {stats['bytes'] / 1024:.1f} KB | "
+          f"{stats['evictions']} evicted, {stats['expirations']} expired")
 
-                    elif hasattr(message, "text") and message.text:
-                        if message.__class__.__name__ == "AIMessage":
-                            print(f"\n🤖 Assistant:\n{message.text}")
+
+def print_history_stats(stats: dict):
+    """Print the supervisor's context size per model call"""
+    if not stats["model_calls"]:
+        return
+    print(f"\n📏 Context: ~{stats['last_tokens']} tokens last call | "
+          f"avg ~{stats['avg_tokens_after']:.0f} sent vs ~{stats['avg_tokens_before']:.0f} before compaction "
+          f"({stats['compactions']}/{stats['model_calls']} calls compacted)")
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Smart Travel Planner")
+    parser.add_argument(
+        "--mode",
+        choices=["react", "plan"],
+        default="react",
+        help="Orchestration mode: supervisor tool loop (react) or plan-and-execute (plan)"
+    )
+    parser.add_argument(
+        "--no-fast-router",
+        action="store_true",
+        help="Send every query to the agent, even simple fully specified ones"
+    )
+    parser.add_argument(
+        "--llm-cache",
+        metavar="PATH",
+        help="Cache model responses in this SQLite file (reused across runs)"
+    )
+    parser.add_argument(
+        "--checkpoint-db",
+        metavar="PATH",
+        help="Keep conversation memory in this SQLite file instead of process memory"
+    )
+    parser.add_argument(
+        "--thread-ttl",
+        type=float,
+        metavar="SECONDS",
+        help="Delete conversations stored in --checkpoint-db after this long without activity"
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Print the timing tree of model, subagent and tool calls after each answer (react mode)"
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="Write Prometheus metrics to this file after each answer (react mode)"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="Write a CPU profile (cProfile, collapsed stacks) and allocation report per turn to DIR"
+    )
+    parser.add_argument(
+        "--fast-model",
+        metavar="MODEL",
+        help="Send simple subagent model calls to this smaller, faster model (see tiering.py)"
+    )
+    parser.add_argument(
+        "--agent-model",
+        action="append",
+        metavar="AGENT=MODEL",
+        dest="agent_models",
+        help="Model for one agent: supervisor, flights, hotels, activities or itinerary (repeatable)"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Answer with whatever has been found so far once a query has taken this long"
+    )
+    parser.add_argument(
+        "--hedge",
+        type=float,
+        metavar="PERCENTILE",
+        help="Send a second copy of model calls running longer than this percentile of recent "
+             "latencies (e.g. 95); the first answer wins"
+    )
+    parser.add_argument(
+        "--tool-output",
+        choices=OUTPUT_MODES,
+        help="How domain tools report results to the models: prose (pretty) or "
+             "token-saving records (compact); defaults to TRAVEL_TOOL_OUTPUT or pretty"
+    )
+    return parser.parse_args()
+
+
+def build_agent(args, instrumentation=None):
+    """Create the agent the command line options ask for, with every subagent compiled"""
+    from deadline import HedgePolicy
+    from llm_cache import TieredLLMCache
+    from router import FastRouter
+    from supervisor import get_agents
+    from tiering import parse_agent_models, two_tier_policy
+
+    llm_cache = TieredLLMCache(args.llm_cache) if args.llm_cache else None
+    agent_models = parse_agent_models(",".join(args.agent_models or []))
+    tiering = two_tier_policy("openai:gpt-4o-mini", args.fast_model) if args.fast_model else None
+    hedging = HedgePolicy(args.hedge) if args.hedge else None
+
+    if args.mode == "plan":
+        from planner import create_plan_execute_agent
+
+        agent = create_plan_execute_agent(model_name="openai:gpt-4o-mini", llm_cache=llm_cache,
+                                          agent_models=agent_models, tiering=tiering, hedging=hedging)
+        agent.agents.prewarm()
+    else:
+        from checkpointer import CompactSqliteSaver
+        from supervisor import create_supervisor_agent
+
+        checkpointer = (
+            CompactSqliteSaver(args.checkpoint_db, thread_ttl=args.thread_ttl)
+            if args.checkpoint_db else None
+        )
+        agent = create_supervisor_agent(
+            model_name="openai:gpt-4o-mini",
+            use_memory=True,
+            llm_cache=llm_cache,
+            checkpointer=checkpointer,
+            instrumentation=instrumentation,
+            agent_models=agent_models,
+            tiering=tiering,
+            hedging=hedging
+        )
+        get_agents().prewarm()
+
+    if not args.no_fast_router:
+        agent = FastRouter(agent)
+    return agent
 
 
 def main():
     """Run an interactive mode for queries"""
+    args = parse_args()
+
     print("\n"+ "=" * 70)
     print("SMART TRAVEL PLANNER - Interactive Mode")
     print("=" * 70 + "\n")
 
-    print("Initializing agents....")
-
     try:
-        supervisor = create_supervisor_agent(
-            model_name="openai:gpt-4o-mini",
-            use_memory=True
-        )
+        if args.tool_output:
+            set_output_mode(args.tool_output)
+
+        instrumentation = None
+        if args.trace or args.metrics:
+            from instrumentation import Instrumentation, format_trace
+            instrumentation = Instrumentation()
+
+        profiler = None
+        if args.profile:
+            from profiling import TurnProfiler
+            profiler = TurnProfiler(args.profile)
+
+        # LangChain is imported and the graphs compiled while the user types
+        supervisor = LazyAgent(build_agent, args, instrumentation).prewarm()
 
         print("✅ Ready! Type your planning questions.\n")
-        print("Commands: 'quit' to exit, 'new' for new conversation\n")
+        print("Commands: 'quit' to exit, 'new' for new conversation, 'stats' for router and cache stats\n")
 
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -58,14 +241,51 @@ def main():
                 print("\n👋 Goodbye! Happy Travels!")
                 break
             elif query.lower() == "new":
+                # The old conversation can't be resumed from here, so free its checkpoints
+                checkpointer = getattr(getattr(supervisor, "agent", supervisor), "checkpointer", None)
+                if checkpointer:
+                    checkpointer.delete_thread(thread_id)
                 thread_id = str(uuid.uuid4())
                 config = {"configurable": {"thread_id": thread_id}}
                 print("🆕 Started new conversation!")
                 continue
+            elif query.lower() == "stats":
+                from supervisor import get_history_middleware, get_result_cache
+
+                if not args.no_fast_router:
+                    print_router_stats(supervisor.stats())
+                if get_result_cache() is not None:
+                    print_cache_stats(get_result_cache().stats())
+                if args.mode == "react" and get_history_middleware() is not None:
+                    print_history_stats(get_history_middleware().stats())
+                continue
             elif not query:
                 continue
 
-            stream_response(supervisor, query, config)
+            try:
+                # Waits for the background build if it hasn't finished
+                supervisor.get()
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                return
+
+            from deadline import deadline
+
+            traced = instrumentation.finished_requests if instrumentation else 0
+            if profiler is not None:
+                with profiler.turn(query), deadline(args.timeout):
+                    stream_response(supervisor, query, config)
+                print(f"\n🔬 Profile written to {args.profile} (turn {profiler.turns})")
+            else:
+                with deadline(args.timeout):
+                    stream_response(supervisor, query, config)
+
+            if instrumentation is not None and args.mode == "react":
+                # Queries answered by the fast router never reach the agent
+                if args.trace and instrumentation.finished_requests > traced:
+                    print("\n⏱️  Trace:\n" + format_trace(instrumentation.traces(1)[0]))
+                if args.metrics:
+                    instrumentation.write_prometheus(args.metrics)
 
         except KeyboardInterrupt:
             print("\n\n👋 Goodbye!")
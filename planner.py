@@ -0,0 +1,395 @@
+"""
+Plan-and-Execute Orchestrator
+
+An alternative to the supervisor's ReAct loop that keeps the number of
+sequential model calls small:
+
+1. Plan - one model call turns the request into a graph of subagent tasks
+2. Execute - tasks run with maximum parallelism; a task only waits for the
+   tasks it depends on (the itinerary waits for flights, hotels and activities)
+3. Synthesize - one model call writes the final answer from the task results
+
+Use compare_modes() (or run this module directly) to compare model call
+counts and latency against the supervisor loop.
+"""
+
+import contextvars
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Literal
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel, Field
+
+from callbacks import ModelCallCounter
+from deadline import partial_answer, remaining, timeout_kwargs
+from supervisor import AgentRegistry, create_supervisor_agent, initialize_agents
+
+if TYPE_CHECKING:
+    from langchain_core.caches import BaseCache
+    from langchain_core.language_models import BaseChatModel
+
+    from deadline import HedgePolicy
+    from scheduler import ModelCallScheduler
+    from tiering import TieringPolicy
+
+
+AgentName = Literal["flights_agent", "hotels_agent", "activities_agent", "itinerary_agent"]
+
+# Supervisor tool each subagent is exposed as, used when reporting progress
+AGENT_TOOL_NAMES = {
+    "flights_agent": "search_flights",
+    "hotels_agent": "search_hotels",
+    "activities_agent": "search_activities",
+    "itinerary_agent": "create_itinerary",
+}
+
+
+class PlannedTask(BaseModel):
+    """A single subagent task in the execution plan"""
+
+    id: str = Field(description="Short unique task id, e.g. 'flights' or 'hotels'")
+    agent: AgentName = Field(description="The specialist that should handle this task")
+    request: str = Field(
+        description="A complete, self-contained request for the specialist, "
+                    "including destination, budget, traveler type and preferences"
+    )
+    depends_on: list[str] = Field(
+        default_factory=list,
+        description="Ids of tasks whose results this task needs before it can start"
+    )
+
+
+class TripPlan(BaseModel):
+    """The dependency graph of subagent tasks for one user request"""
+
+    tasks: list[PlannedTask] = Field(
+        default_factory=list,
+        description="Tasks to run. Leave empty if no specialist is needed."
+    )
+
+
+PLANNER_PROMPT = """You are the planning step of a travel planning assistant. Break the user's request into tasks for these specialists:
+
+- flights_agent - finds and compares flights
+- hotels_agent - finds accommodation for a traveler type and budget
+- activities_agent - finds activities, attractions and restaurants
+- itinerary_agent - organizes the other results into a day-by-day plan
+
+PLANNING RULES:
+- Only include the specialists the request actually needs
+- Each task request must be self-contained: repeat the destination, dates, travelers, budget and interests
+- flights, hotels and activities tasks are independent - never make them depend on each other
+- An itinerary task must depend on every flights, hotels and activities task in the plan
+- Return no tasks if the request is a question you can answer without a specialist"""
+
+
+SYNTHESIS_PROMPT = """You are a professional travel planning assistant. Specialists have already researched the user's request; their findings are below.
+
+- Be conversational and helpful, not robotic
+- Summarize key findings clearly and make specific recommendations
+- Highlight the best matches for the user's needs and note any trade-offs
+- Always consider the user's budget and preferences
+- Ask clarifying questions if the request is vague"""
+
+
+def validate_plan(plan: TripPlan) -> list[PlannedTask]:
+    """Normalize a plan's dependency graph and return its tasks.
+
+    Unknown dependencies are dropped and every itinerary task is made to
+    depend on all search tasks.
+
+    Raises:
+        ValueError: If task ids are duplicated or the dependencies form a cycle
+    """
+    ids = [task.id for task in plan.tasks]
+    if len(ids) != len(set(ids)):
+        raise ValueError(f"Duplicate task ids in plan: {ids}")
+
+    search_ids = [t.id for t in plan.tasks if t.agent != "itinerary_agent"]
+    tasks = []
+
+    for task in plan.tasks:
+        depends_on = [d for d in task.depends_on if d in ids and d != task.id]
+        if task.agent == "itinerary_agent":
+            depends_on = list(dict.fromkeys(depends_on + search_ids))
+        tasks.append(task.model_copy(update={"depends_on": depends_on}))
+
+    # Kahn's algorithm - anything left over sits on a cycle
+    remaining = {t.id: set(t.depends_on) for t in tasks}
+    while True:
+        ready = [tid for tid, deps in remaining.items() if not deps]
+        if not ready:
+            break
+        for tid in ready:
+            del remaining[tid]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    if remaining:
+        raise ValueError(f"Plan has a dependency cycle between tasks: {sorted(remaining)}")
+
+    return tasks
+
+
+def _task_request(task: PlannedTask, results: dict[str, str]) -> str:
+    """Build the request for a task, appending the results it depends on"""
+    if not task.depends_on:
+        return task.request
+
+    context = "\n\n".join(f"Results from '{dep}':\n{results[dep]}" for dep in task.depends_on)
+    return f"{task.request}\n\n{context}"
+
+
+def execute_plan(
+    tasks: list[PlannedTask],
+    agents: dict,
+    max_concurrency: int = 4,
+    config: dict | None = None
+) -> dict[str, str]:
+    """Run planned tasks with maximum parallelism.
+
+    A task is submitted as soon as all of its dependencies have finished.
+
+    Args:
+        tasks: Validated tasks (see validate_plan)
+        agents: Agent set as returned by initialize_agents
+        max_concurrency: Maximum number of subagents running at once
+        config: Optional run config (e.g. callbacks) passed to each subagent
+
+    Returns:
+        Mapping of task id to the subagent's final answer, in plan order
+    """
+    child_config = {k: v for k, v in (config or {}).items() if k != "configurable"}
+    results: dict[str, str] = {}
+    pending = list(tasks)
+    running = {}
+
+    def run(task: PlannedTask) -> str:
+        result = agents[task.agent].invoke(
+            {"messages": [{"role": "user", "content": _task_request(task, results)}]},
+            config={**child_config, "run_name": task.agent},
+        )
+        return result["messages"][-1].text
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        while pending or running:
+            for task in [t for t in pending if all(d in results for d in t.depends_on)]:
+                pending.remove(task)
+                # In the caller's context, so the request deadline reaches the subagent
+                running[executor.submit(contextvars.copy_context().run, run, task)] = task
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                results[task.id] = future.result()
+
+    return {task.id: results[task.id] for task in tasks}
+
+
+def _out_of_time(results: dict[str, str]) -> AIMessage:
+    """The answer when the deadline expires before synthesis: the findings so far"""
+    return AIMessage(partial_answer(list(results.values())), response_metadata={"deadline_exceeded": True})
+
+
+class PlanExecuteAgent:
+    """Plan-and-execute orchestrator with the same invoke/stream surface as the supervisor.
+
+    Conversation history is kept per ``thread_id`` when one is given in the
+    config, so follow-up questions work like they do with the supervisor.
+    Only the max_threads most recently used conversations are kept.
+    """
+
+    def __init__(
+            self,
+            model_name: "str | BaseChatModel" = "openai:gpt-4o-mini",
+            max_concurrency: int = 4,
+            llm_cache: "BaseCache | None" = None,
+            registry: AgentRegistry | None = None,
+            agent_models: dict | None = None,
+            tiering: "TieringPolicy | None" = None,
+            scheduler: "ModelCallScheduler | None" = None,
+            hedging: "HedgePolicy | None" = None,
+            max_threads: int = 1000
+        ):
+        self.agents = initialize_agents(model_name, llm_cache, registry=registry, agent_models=agent_models,
+                                        tiering=tiering, scheduler=scheduler, hedging=hedging)
+        self.model = self.agents["model"]
+        self.planner = self.model.with_structured_output(TripPlan)
+        self.max_concurrency = max_concurrency
+        self.max_threads = max_threads
+        self._threads: OrderedDict[str, list] = OrderedDict()  # thread_id -> messages, in LRU order
+        self._threads_lock = threading.Lock()
+
+    def _history(self, config: dict | None) -> list:
+        """A copy of the conversation so far (empty without a thread_id)"""
+        thread_id = (config or {}).get("configurable", {}).get("thread_id")
+        if thread_id is None:
+            return []
+        with self._threads_lock:
+            history = self._threads.get(thread_id)
+            if history is None:
+                return []
+            self._threads.move_to_end(thread_id)
+            return list(history)
+
+    def _remember(self, config: dict | None, messages: list):
+        """Append a turn to the conversation, forgetting the least recently used ones over max_threads"""
+        thread_id = (config or {}).get("configurable", {}).get("thread_id")
+        if thread_id is None:
+            return
+        with self._threads_lock:
+            self._threads.setdefault(thread_id, []).extend(messages)
+            self._threads.move_to_end(thread_id)
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+
+    def stream(self, input: dict, config: dict | None = None, **kwargs):
+        """Run the three steps, yielding an update after each one.
+
+        Extra keyword arguments (e.g. stream_mode) are accepted for
+        compatibility with graph agents and ignored.
+        """
+        history = self._history(config)
+        query = input["messages"][-1]["content"]
+        run_config = {k: v for k, v in (config or {}).items() if k != "configurable"}
+
+        try:
+            plan = self.planner.invoke(
+                [SystemMessage(PLANNER_PROMPT), *history, HumanMessage(query)],
+                config=run_config,
+                **timeout_kwargs(),
+            )
+        except Exception:
+            if remaining() != 0.0:
+                raise
+            # Out of time before there was a plan
+            answer = _out_of_time({})
+            self._remember(config, [HumanMessage(query), AIMessage(answer.text)])
+            yield {"synthesizer": {"messages": [answer], "results": {}}}
+            return
+        tasks = validate_plan(plan)
+
+        yield {"planner": {"messages": [AIMessage(
+            content="",
+            tool_calls=[
+                {"name": AGENT_TOOL_NAMES[t.agent], "args": {"request": t.request}, "id": t.id}
+                for t in tasks
+            ],
+        )]}}
+
+        results = execute_plan(tasks, self.agents, self.max_concurrency, run_config)
+        findings = "\n\n".join(f"## {tid}\n{text}" for tid, text in results.items())
+
+        try:
+            answer = self.model.invoke(
+                [
+                    SystemMessage(SYNTHESIS_PROMPT),
+                    *history,
+                    HumanMessage(f"{query}\n\nSPECIALIST FINDINGS:\n{findings}" if findings else query),
+                ],
+                config=run_config,
+                **timeout_kwargs(),
+            )
+        except Exception:
+            if remaining() != 0.0:
+                raise
+            # Out of time: the findings themselves are the answer
+            answer = _out_of_time(results)
+
+        self._remember(config, [HumanMessage(query), AIMessage(answer.text)])
+
+        yield {"synthesizer": {"messages": [answer], "results": results}}
+
+    def invoke(self, input: dict, config: dict | None = None) -> dict:
+        """Run the three steps and return the final state"""
+        messages, results = [], {}
+        for step in self.stream(input, config):
+            for update in step.values():
+                messages.extend(update["messages"])
+                results = update.get("results", results)
+
+        return {"messages": messages, "results": results}
+
+
+def create_plan_execute_agent(
+        model_name: "str | BaseChatModel" = "openai:gpt-4o-mini",
+        max_concurrency: int = 4,
+        llm_cache: "BaseCache | None" = None,
+        registry: AgentRegistry | None = None,
+        agent_models: dict | None = None,
+        tiering: "TieringPolicy | None" = None,
+        scheduler: "ModelCallScheduler | None" = None,
+        hedging: "HedgePolicy | None" = None,
+        max_threads: int = 1000
+    ):
+    """Create and return a plan-and-execute orchestrator.
+
+    Args:
+        model_name: The model to use for planning, subagents and synthesis
+        max_concurrency: Maximum number of subagents running at once
+        llm_cache: Model response cache shared by every step (optional)
+        registry: supervisor.AgentRegistry the subagents come from (optional)
+        agent_models: Models for individual agents; "supervisor" plans and
+            synthesizes (optional, see supervisor.initialize_agents)
+        tiering: A tiering.TieringPolicy for the subagents' model calls (optional)
+        scheduler: A scheduler.ModelCallScheduler for the subagents' model
+            calls (optional; the planning and synthesis calls aren't scheduled)
+        hedging: A deadline.HedgePolicy for the subagents' model calls (optional)
+        max_threads: Conversations whose history is kept; the least recently
+            used are forgotten first
+
+    Every step is bounded by the request's deadline (deadline.deadline()).
+    If it expires during synthesis, the findings are returned as is; if it
+    expires while planning, the answer says so.
+
+    Returns:
+        PlanExecuteAgent with invoke/stream like the supervisor agent
+    """
+    return PlanExecuteAgent(model_name, max_concurrency, llm_cache, registry, agent_models, tiering, scheduler,
+                            hedging, max_threads)
+
+
+def compare_modes(query: str, model_name: str = "openai:gpt-4o-mini") -> dict:
+    """Run a query through both orchestration modes and measure each.
+
+    Args:
+        query: The user request to plan
+        model_name: The model to use for both modes
+
+    Returns:
+        {"react": {...}, "plan_execute": {...}} with model_calls and latency_s
+    """
+    agents = {
+        "react": create_supervisor_agent(model_name, use_memory=False),
+        "plan_execute": create_plan_execute_agent(model_name),
+    }
+    report = {}
+
+    for mode, agent in agents.items():
+        counter = ModelCallCounter()
+        start = time.perf_counter()
+        agent.invoke(
+            {"messages": [{"role": "user", "content": query}]},
+            config={"callbacks": [counter], "configurable": {"thread_id": str(uuid.uuid4())}},
+        )
+        report[mode] = {
+            "model_calls": counter.calls,
+            "latency_s": round(time.perf_counter() - start, 3),
+        }
+
+    return report
+
+
+if __name__ == "__main__":
+    query = " ".join(sys.argv[1:]) or (
+        "Plan a 5-day trip to Tokyo for me and my wife. "
+        "We love food and culture. Mid-range budget, around $3000 total."
+    )
+
+    for mode, stats in compare_modes(query).items():
+        print(f"{mode:<14} model calls: {stats['model_calls']:>3} | latency: {stats['latency_s']:.2f}s")
@@ -0,0 +1,255 @@
+"""
+Profiling
+
+Opt-in CPU and memory profiling of each conversation turn, for main.py
+--profile DIR and server.py --profile DIR.
+
+For every turn, TurnProfiler writes to DIR:
+
+- turn-NNN.prof: the cProfile stats (open with pstats or snakeviz)
+- turn-NNN.collapsed: the same profile as collapsed stacks, one
+  "frame;frame;frame microseconds" line per stack, ready for
+  flamegraph.pl or speedscope
+- turn-NNN.memory.txt: what the turn allocated and kept (tracemalloc),
+  ranked by module and package, with the top source lines
+
+and appends a one-line summary (wall and CPU time, memory growth, hottest
+functions and modules) to DIR/turns.jsonl.
+
+cProfile records caller/callee pairs rather than full stacks, so collapsed
+stacks are rebuilt by splitting each function's time across its callers in
+proportion to the time spent under each caller. Times are CPU time of the
+profiled thread, so threads waiting on locks and queues (the supervisor
+while its subagents run) cost nothing. Worker threads started
+during the turn (the tool node's fan-out to subagents) get a profiler of
+their own; on Python 3.12+ the turn's profiler sees every thread already.
+
+Usage:
+    profiler = TurnProfiler("profiles/")
+    with profiler.turn("Plan a trip to Tokyo"):
+        agent.invoke(...)
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# cProfile moved to sys.monitoring in 3.12: one profiler sees every thread,
+# and a second one can't be enabled alongside it
+_PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+def module_of(filename: str) -> str:
+    """Dotted module name of a source file, e.g. "tools.formatting" or "langgraph.pregel.main" """
+    if filename.startswith(PROJECT_ROOT + os.sep):
+        path = os.path.relpath(filename, PROJECT_ROOT)
+    elif "site-packages" + os.sep in filename:
+        path = filename.rsplit("site-packages" + os.sep, 1)[1]
+    elif filename.startswith(("<", "~")):
+        return filename
+    else:
+        path = os.path.basename(filename)
+
+    module = os.path.splitext(path)[0].replace(os.sep, ".")
+    return module.removesuffix(".__init__")
+
+
+def _frame(function: tuple) -> str:
+    filename, line, name = function
+    if filename == "~":
+        # Built-ins, e.g. "<built-in method time.sleep>"
+        return name.strip("<>")
+    return f"{module_of(filename)}:{name}:{line}"
+
+
+def collapsed_stacks(stats: pstats.Stats, min_us: int = 1, max_depth: int = 64) -> dict:
+    """Rebuild "frame;frame;..." -> self time in microseconds from a profile.
+
+    Each function's time is split across its callers in proportion to the
+    cumulative time spent under each of them, starting from functions
+    nobody called (the thread and turn entry points).
+    """
+    entries = stats.stats
+    callees = defaultdict(list)
+    for function, (_, _, _, _, callers) in entries.items():
+        for caller, (_, _, _, caller_cumulative) in callers.items():
+            callees[caller].append((function, caller_cumulative))
+
+    stacks = defaultdict(int)
+
+    def visit(function, path: list, on_path: set, budget: float):
+        own_cumulative = entries[function][3]
+        if own_cumulative <= 0 or budget * 1e6 < min_us:
+            return
+        scale = min(budget / own_cumulative, 1.0)
+        path.append(_frame(function))
+
+        stacks[";".join(path)] += int(entries[function][2] * scale * 1e6)
+        if len(path) < max_depth:
+            on_path.add(function)
+            for callee, cumulative in callees[function]:
+                if callee not in on_path:
+                    visit(callee, path, on_path, cumulative * scale)
+            on_path.discard(function)
+
+        path.pop()
+
+    for function, (_, _, _, cumulative, callers) in entries.items():
+        if not callers:
+            visit(function, [], set(), cumulative)
+
+    return {stack: us for stack, us in stacks.items() if us >= min_us}
+
+
+def allocation_report(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top: int = 25) -> dict:
+    """Memory a turn allocated and kept, ranked by module, package and source line"""
+    differences = after.compare_to(before, "lineno")
+    by_module = defaultdict(lambda: [0, 0])
+    for difference in differences:
+        module = module_of(difference.traceback[0].filename)
+        by_module[module][0] += difference.size_diff
+        by_module[module][1] += difference.count_diff
+
+    by_package = defaultdict(int)
+    for module, (size, _) in by_module.items():
+        by_package[module.split(".")[0]] += size
+
+    modules = sorted(by_module.items(), key=lambda item: abs(item[1][0]), reverse=True)[:top]
+    packages = sorted(by_package.items(), key=lambda item: abs(item[1]), reverse=True)[:top]
+
+    return {
+        "net_bytes": sum(d.size_diff for d in differences),
+        "modules": [(module, size, count) for module, (size, count) in modules],
+        "packages": packages,
+        "lines": [
+            (f"{module_of(d.traceback[0].filename)}:{d.traceback[0].lineno}", d.size_diff, d.count_diff)
+            for d in sorted(differences, key=lambda d: abs(d.size_diff), reverse=True)[:top]
+        ],
+    }
+
+
+class TurnProfiler:
+    """Profile conversation turns one at a time and write a report per turn.
+
+    Args:
+        directory: Where reports are written (created if missing)
+        memory: Also trace allocations (slows the turn down noticeably)
+        top: Entries per ranking in the reports
+    """
+
+    def __init__(self, directory: str, memory: bool = True, top: int = 25):
+        self.directory = directory
+        self.memory = memory
+        self.top = top
+        self.turns = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @contextlib.contextmanager
+    def turn(self, label: str = ""):
+        """Profile the code run inside the block as one turn.
+
+        Turns are profiled one at a time; concurrent callers wait.
+        """
+        with self._lock:
+            self.turns += 1
+            name = f"turn-{self.turns:03d}"
+
+            thread_profilers = []
+            lock = threading.Lock()
+
+            def profile_thread(frame, event, arg):
+                # First event in a new worker thread: hand over to a profiler of its own
+                profiler = cProfile.Profile(time.thread_time)
+                with lock:
+                    thread_profilers.append(profiler)
+                sys.setprofile(None)
+                profiler.enable()
+
+            if self.memory:
+                started_tracing = not tracemalloc.is_tracing()
+                if started_tracing:
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+                before = tracemalloc.take_snapshot()
+
+            profiler = cProfile.Profile(time.thread_time)
+            if not _PROFILES_ALL_THREADS:
+                threading.setprofile(profile_thread)
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                wall_s, cpu_s = time.perf_counter() - wall_start, time.process_time() - cpu_start
+                if not _PROFILES_ALL_THREADS:
+                    threading.setprofile(None)
+
+                memory = None
+                if self.memory:
+                    after = tracemalloc.take_snapshot()
+                    _, peak = tracemalloc.get_traced_memory()
+                    if started_tracing:
+                        tracemalloc.stop()
+                    memory = allocation_report(before, after, self.top)
+                    memory["peak_bytes"] = peak
+
+                stats = pstats.Stats(profiler)
+                with lock:
+                    for thread_profiler in thread_profilers:
+                        stats.add(thread_profiler)
+
+                self._write(name, label, stats, memory, wall_s, cpu_s)
+
+    def _write(self, name: str, label: str, stats: pstats.Stats, memory: dict | None, wall_s: float,
+               cpu_s: float):
+        base = os.path.join(self.directory, name)
+        stats.dump_stats(f"{base}.prof")
+
+        stacks = collapsed_stacks(stats)
+        with open(f"{base}.collapsed", "w") as f:
+            for stack, us in sorted(stacks.items()):
+                f.write(f"{stack} {us}\n")
+
+        own_time = defaultdict(float)
+        for function, (_, _, total, _, _) in stats.stats.items():
+            own_time[module_of(function[0]) if function[0] != "~" else "builtins"] += total
+        hottest = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+
+        summary = {
+            "turn": name,
+            "label": label[:200],
+            "wall_s": round(wall_s, 4),
+            "cpu_s": round(cpu_s, 4),
+            "top_functions": [(_frame(function), round(entry[2], 6)) for function, entry in hottest[:10]],
+            "top_modules": [(module, round(seconds, 6)) for module, seconds in
+                            sorted(own_time.items(), key=lambda item: item[1], reverse=True)[:10]],
+        }
+
+        if memory is not None:
+            summary["net_kb"] = round(memory["net_bytes"] / 1024, 1)
+            summary["peak_kb"] = round(memory["peak_bytes"] / 1024, 1)
+            with open(f"{base}.memory.txt", "w") as f:
+                f.write(f"{name}: {label[:200]}\n")
+                f.write(f"Net allocated: {memory['net_bytes'] / 1024:.1f} KB | "
+                        f"Peak traced: {memory['peak_bytes'] / 1024:.1f} KB\n")
+                for title, rows in (("package", memory["packages"]), ("module", memory["modules"]),
+                                    ("line", memory["lines"])):
+                    f.write(f"\nTop by {title}:\n")
+                    for row in rows:
+                        count = f" {row[2]:>+8} blocks" if len(row) > 2 else ""
+                        f.write(f"  {row[1] / 1024:>+10.1f} KB{count}  {row[0]}\n")
+
+        with open(os.path.join(self.directory, "turns.jsonl"), "a") as f:
+            f.write(json.dumps(summary) + "\n")
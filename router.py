@@ -0,0 +1,335 @@
+"""
+Fast Router
+
+A deterministic intent and slot extractor that sits in front of the
+supervisor. Simple, fully specified queries such as
+
+    "direct flight to Paris under $600"
+    "family hotels in Tokyo under 200"
+
+are answered straight from the domain tools with zero LLM calls. Anything
+the rules don't fully understand falls back to the wrapped agent.
+
+The router only answers when every word of the query is accounted for by a
+known intent, slot or filler word, so it never silently drops a constraint.
+Ranking ("cheapest", "top rated") and numbers it can't place as a budget
+always go to the agent, since the domain tools don't rank.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from subagents import activities, flights, hotels
+from tools.formatting import pretty_output
+from tools.mock_data import list_destinations
+
+
+INTENT_WORDS = {
+    "flights": {"flight", "flights", "fly", "flying", "airfare", "airfares", "plane", "ticket", "tickets"},
+    "hotels": {"hotel", "hotels", "accommodation", "accommodations", "lodging", "stay", "stays"},
+    "activities": {"activity", "activities", "attraction", "attractions", "tour", "tours",
+                   "experience", "experiences", "sightseeing", "things", "do"},
+    "restaurants": {"restaurant", "restaurants", "dining", "eat", "eats", "food", "places"},
+}
+
+TRAVELER_TYPES = {
+    "family": "families", "families": "families", "kids": "families", "children": "families",
+    "couple": "couples", "couples": "couples", "romantic": "couples", "honeymoon": "couples",
+    "solo": "solo", "luxury": "luxury", "luxurious": "luxury", "business": "business",
+}
+
+INTERESTS = {
+    "culture": "culture", "cultural": "culture", "history": "history", "historical": "history",
+    "art": "art", "nature": "nature", "entertainment": "entertainment", "views": "views",
+    "nightlife": "nightlife", "photography": "photography", "shopping": "shopping",
+}
+
+CUISINES = {"sushi", "ramen", "japanese", "french", "italian", "chinese", "thai",
+            "indian", "mexican", "korean", "vegetarian", "vegan", "seafood"}
+
+PRICE_RANGE_WORDS = {"fine dining": "$$$$", "upscale": "$$$", "mid-range": "$$", "midrange": "$$"}
+
+# Words that carry no constraint of their own
+FILLER_WORDS = {
+    "a", "an", "the", "to", "in", "at", "for", "me", "my", "us", "we", "i", "find", "show",
+    "search", "get", "list", "give", "want", "need", "looking", "look", "please", "any",
+    "some", "all", "available", "options", "option", "priced", "price", "prices", "friendly",
+    "of", "per", "night", "usd", "dollars", "can", "what", "are", "is", "there", "where", "which",
+}
+
+# Words asking for an ordering or a limit the domain tools don't apply
+RANKING_WORDS = {
+    "cheap", "cheaper", "cheapest", "lowest", "affordable", "budget", "good", "best", "better",
+    "top", "rated", "highest", "popular", "most", "least", "fastest", "shortest",
+    "under", "below", "less", "more", "than", "max", "maximum", "min", "minimum", "up", "within",
+    "over", "above",
+}
+
+# "under 600" is a budget, "under 3 hours" isn't
+BUDGET_PATTERN = re.compile(
+    r"(?:(?:under|below|less than|max(?:imum)?|up to|within)\s*(?:\$\s?)?(\d[\d,]*)"
+    r"(?![\d,]|\s*(?:hours?|hrs?|minutes?|mins?|days?|nights|weeks?|stars?|stops?|people|adults?|kids?|km|miles?)\b)"
+    r"|\$\s?(\d[\d,]*)|(\d[\d,]*)\s*(?:usd|dollars))(?:\s*(?:usd|dollars))?(?:\s*(?:/|per|a)\s*night)?"
+)
+PRICE_RANGE_PATTERN = re.compile(r"(?<![\w$])(\${1,4})(?![\d$])")
+DIRECT_PATTERN = re.compile(r"\b(?:direct|non-?stop)\b")
+ONE_STOP_PATTERN = re.compile(r"\b(?:one|1)[- ]stop\b")
+
+
+@dataclass
+class Slots:
+    """Structured constraints extracted from a query"""
+
+    destination: str | None = None
+    budget: int | None = None
+    stops: str | None = None
+    traveler_type: str | None = None
+    cuisine: str | None = None
+    price_range: str | None = None
+    interests: list[str] = field(default_factory=list)
+
+
+@dataclass
+class RouteDecision:
+    """The router's verdict for one query"""
+
+    intent: str | None
+    slots: Slots
+    confident: bool
+    reason: str = ""
+
+
+def extract_slots(query: str) -> tuple[Slots, str]:
+    """Extract slots from a query.
+
+    Returns:
+        The slots and the query text left over once every matched slot has
+        been removed from it
+    """
+    text = query.lower().strip().rstrip("?.!")
+    slots = Slots()
+
+    destinations = [d for d in list_destinations() if re.search(rf"\b{re.escape(d)}\b", text)]
+    if len(destinations) == 1:
+        slots.destination = destinations[0].title()
+        text = re.sub(rf"\b{re.escape(destinations[0])}\b", " ", text)
+
+    match = BUDGET_PATTERN.search(text)
+    if match:
+        slots.budget = int(next(g for g in match.groups() if g).replace(",", ""))
+        text = text[:match.start()] + " " + text[match.end():]
+
+    match = PRICE_RANGE_PATTERN.search(text)
+    if match:
+        slots.price_range = match.group(1)
+        text = text[:match.start()] + " " + text[match.end():]
+
+    for phrase, price_range in PRICE_RANGE_WORDS.items():
+        if phrase in text:
+            slots.price_range = slots.price_range or price_range
+            text = text.replace(phrase, " ")
+
+    if DIRECT_PATTERN.search(text):
+        slots.stops = "direct"
+        text = DIRECT_PATTERN.sub(" ", text)
+    elif ONE_STOP_PATTERN.search(text):
+        slots.stops = "one-stop"
+        text = ONE_STOP_PATTERN.sub(" ", text)
+
+    words = []
+    for word in re.findall(r"[a-z][a-z'-]*|\d[\d,.:]*", text):
+        if word in TRAVELER_TYPES and slots.traveler_type in (None, TRAVELER_TYPES[word]):
+            slots.traveler_type = TRAVELER_TYPES[word]
+        elif word in INTERESTS:
+            slots.interests.append(INTERESTS[word])
+        elif word in CUISINES and slots.cuisine is None:
+            slots.cuisine = word.title()
+        else:
+            words.append(word)
+
+    return slots, " ".join(words)
+
+
+def classify(query: str) -> RouteDecision:
+    """Decide whether a query can be answered without the LLM"""
+    slots, rest = extract_slots(query)
+    words = rest.split()
+
+    intents = [name for name, vocab in INTENT_WORDS.items() if vocab & set(words)]
+    # A cuisine on its own ("sushi in Tokyo") is a restaurant search
+    if slots.cuisine and intents in ([], ["activities"]) and "do" not in words:
+        intents = ["restaurants"]
+    # "food" alone is ambiguous between food tours and restaurants
+    if intents == ["activities", "restaurants"] and "food" in words and "restaurants" not in words:
+        intents = ["activities"]
+        slots.interests.append("food")
+        words = [w for w in words if w != "food"]
+
+    if len(intents) != 1:
+        return RouteDecision(None, slots, False, f"ambiguous intent: {intents or 'none'}")
+
+    intent = intents[0]
+
+    if slots.destination is None:
+        return RouteDecision(intent, slots, False, "no known destination")
+
+    # Left-over numbers are constraints the rules couldn't place (dates, counts, durations)
+    numbers = [w for w in words if w[0].isdigit()]
+    if numbers:
+        return RouteDecision(intent, slots, False, f"unhandled numbers: {numbers}")
+
+    ranking = [w for w in words if w in RANKING_WORDS]
+    if ranking:
+        return RouteDecision(intent, slots, False, f"ranking not supported: {ranking}")
+
+    known = FILLER_WORDS | INTENT_WORDS[intent]
+    unknown = [w for w in words if w not in known]
+    if unknown:
+        return RouteDecision(intent, slots, False, f"unhandled words: {unknown}")
+
+    # Slots that the chosen domain tool can't honour
+    unsupported = {
+        "flights": slots.traveler_type or slots.interests or slots.cuisine or slots.price_range,
+        "hotels": slots.stops or slots.interests or slots.cuisine or slots.price_range,
+        "activities": slots.stops or slots.cuisine or slots.price_range
+                      or slots.traveler_type not in (None, "families"),
+        "restaurants": slots.stops or slots.budget or slots.interests or slots.traveler_type,
+    }[intent]
+    if unsupported:
+        return RouteDecision(intent, slots, False, "constraint not supported for this intent")
+
+    return RouteDecision(intent, slots, True)
+
+
+def answer(decision: RouteDecision) -> str:
+    """Answer a confident decision by calling the domain tool directly"""
+    slots = decision.slots
+    args = {"destination": slots.destination}
+
+    if decision.intent == "flights":
+        domain_tool = flights.search_flights
+        args.update(budget_max=slots.budget, preferred_stops=slots.stops)
+    elif decision.intent == "hotels":
+        domain_tool = hotels.search_hotels
+        args.update(budget_per_night=slots.budget, traveler_type=slots.traveler_type)
+    elif decision.intent == "activities":
+        domain_tool = activities.search_activities
+        interests = slots.interests + (["families"] if slots.traveler_type == "families" else [])
+        args.update(interests=interests or None, budget_max=slots.budget)
+    else:
+        domain_tool = activities.search_restaurants
+        args.update(cuisine=slots.cuisine, price_range=slots.price_range)
+
+    # This is the user-facing answer, so render it for people even in compact mode
+    with pretty_output():
+        return domain_tool.invoke({k: v for k, v in args.items() if v is not None})
+
+
+class FastRouter:
+    """Answer simple queries deterministically and delegate the rest to an agent.
+
+    Exposes the same invoke/stream surface as the wrapped agent, so it can be
+    dropped in front of the supervisor or the plan-and-execute agent.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._fast_time = 0.0
+        self._agent_time = 0.0
+
+    def _record(self, hit: bool, elapsed: float):
+        with self._lock:
+            if hit:
+                self._hits += 1
+                self._fast_time += elapsed
+            else:
+                self._misses += 1
+                self._agent_time += elapsed
+
+    def _remember(self, query: str, text: str, config: dict | None):
+        """Add a fast-path exchange to the agent's thread so follow-ups keep context"""
+        if config and getattr(self.agent, "checkpointer", None):
+            self.agent.update_state(
+                config,
+                {"messages": [HumanMessage(query), AIMessage(text)]},
+                as_node="model",
+            )
+
+    def stream(self, input: dict, config: dict | None = None, **kwargs):
+        """Stream a fast-path answer, or the wrapped agent's steps"""
+        start = time.perf_counter()
+        query = input["messages"][-1]["content"]
+        decision = classify(query)
+
+        if decision.confident:
+            text = answer(decision)
+            self._record(True, time.perf_counter() - start)
+            self._remember(query, text, config)
+            yield {"fast_router": {"messages": [AIMessage(text)]}}
+            return
+
+        yield from self.agent.stream(input, config=config, **kwargs)
+        self._record(False, time.perf_counter() - start)
+
+    async def astream(self, input: dict, config: dict | None = None, **kwargs):
+        """Async stream(); the wrapped agent must support astream"""
+        start = time.perf_counter()
+        query = input["messages"][-1]["content"]
+        decision = classify(query)
+
+        if decision.confident:
+            text = await asyncio.to_thread(answer, decision)
+            self._record(True, time.perf_counter() - start)
+            await asyncio.to_thread(self._remember, query, text, config)
+            yield {"fast_router": {"messages": [AIMessage(text)]}}
+            return
+
+        async for item in self.agent.astream(input, config=config, **kwargs):
+            yield item
+        self._record(False, time.perf_counter() - start)
+
+    def invoke(self, input: dict, config: dict | None = None, **kwargs) -> dict:
+        """Return a fast-path answer, or the wrapped agent's final state"""
+        start = time.perf_counter()
+        query = input["messages"][-1]["content"]
+        decision = classify(query)
+
+        if decision.confident:
+            text = answer(decision)
+            self._record(True, time.perf_counter() - start)
+            self._remember(query, text, config)
+            return {"messages": [HumanMessage(query), AIMessage(text)]}
+
+        result = self.agent.invoke(input, config=config, **kwargs)
+        self._record(False, time.perf_counter() - start)
+        return result
+
+    def stats(self) -> dict:
+        """Hit rate and the latency saved by answering without the agent.
+
+        Saved latency is estimated from the average latency of queries that
+        went to the agent; it is None until at least one query has.
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            avg_fast = self._fast_time / self._hits if self._hits else 0.0
+            avg_agent = self._agent_time / self._misses if self._misses else None
+
+            return {
+                "queries": total,
+                "hits": self._hits,
+                "hit_rate": self._hits / total if total else 0.0,
+                "avg_fast_latency_s": avg_fast,
+                "avg_agent_latency_s": avg_agent,
+                "latency_saved_s": (
+                    self._hits * max(avg_agent - avg_fast, 0.0) if avg_agent is not None else None
+                ),
+            }
@@ -0,0 +1,422 @@
+"""
+Model Call Scheduler
+
+One scheduler shared by every agent in the process (supervisor and
+subagents, across all sessions) so parallel subagents and concurrent
+conversations can't flood the provider:
+
+- rate limits: token buckets for requests per minute and tokens per minute.
+  A call reserves its estimated tokens (prompt plus expected output) before
+  it starts, and the estimate is corrected with the reported usage after
+- adaptive concurrency: an AIMD limit on calls in flight. It grows by about
+  one per round of successful calls. It halves on a 429, and shrinks
+  gently when latency climbs well above the best seen, since the provider
+  is queueing
+- fair queuing: calls over the limit wait in one queue per session
+  (thread_id) and slots are handed out round-robin across sessions, so one
+  session fanning out to four subagents can't starve the others
+- retries: a call rejected with a 429 gives its slot back, waits (the
+  provider's Retry-After, else exponential backoff with jitter) and queues
+  again, up to max_retries
+- deadlines: waits for a slot, the rate limits and a retry all end with
+  the request deadline (see deadline.py), and a call whose deadline expires
+  while it waits is dropped rather than sent. A call that is sent carries
+  the time left as its provider timeout
+
+stats() reports queue depth, wait times, the current limit, throttles and
+retries; register it with Instrumentation to export them as metrics.
+
+Usage:
+    scheduler = ModelCallScheduler(requests_per_minute=500, tokens_per_minute=200_000)
+    agent = create_supervisor_agent(scheduler=scheduler)
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.config import get_config
+
+import deadline
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether a provider error is a 429 / rate limit rejection"""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "RateLimit" in type(error).__name__
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Seconds the provider asked us to wait before retrying, if it said"""
+    value = getattr(error, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills per_minute units a minute, up to capacity (default: one minute's worth).
+
+    take() always succeeds and may leave the bucket in debt; the caller waits
+    the returned time, so heavy calls delay later ones instead of failing.
+    """
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.rate = per_minute / 60
+        self.capacity = capacity or per_minute
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, amount: float) -> float:
+        """Take amount and return the seconds to wait until it is covered"""
+        with self._lock:
+            self._refill()
+            self._level -= amount
+            return max(0.0, -self._level / self.rate)
+
+    def give(self, amount: float):
+        """Return unused units (or take more, if amount is negative)"""
+        with self._lock:
+            self._refill()
+            self._level = min(self.capacity, self._level + amount)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._level
+
+
+class AIMDLimiter:
+    """Additive-increase, multiplicative-decrease limit on calls in flight.
+
+    Args:
+        initial: Starting limit
+        minimum, maximum: Bounds of the limit
+        backoff: Factor the limit is multiplied by on a 429
+        latency_tolerance: Latency over this multiple of the best smoothed
+            latency counts as congestion and trims the limit by 10%
+        latency_slack_s: ...as long as it is also this much over it, so
+            jitter on very fast calls isn't taken for congestion
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 64, backoff: float = 0.5,
+                 latency_tolerance: float = 2.0, latency_slack_s: float = 0.05):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.latency_slack_s = latency_slack_s
+        self._limit = float(initial)
+        self._baseline = None
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        with self._lock:
+            return max(self.minimum, int(self._limit))
+
+    def on_success(self, latency: float):
+        with self._lock:
+            if self._baseline is None:
+                self._baseline = latency
+            else:
+                # Follows drops at once and rises slowly, so it tracks the uncongested latency
+                self._baseline = min(latency, self._baseline + 0.05 * (latency - self._baseline))
+
+            congested = latency > max(self._baseline * self.latency_tolerance,
+                                      self._baseline + self.latency_slack_s)
+            if congested:
+                self._limit = max(self.minimum, self._limit * 0.9)
+            else:
+                self._limit = min(self.maximum, self._limit + 1 / self._limit)
+
+    def on_throttle(self):
+        with self._lock:
+            self._limit = max(self.minimum, self._limit * self.backoff)
+
+
+class _Ticket:
+    """A queued call, woken when it is given a slot"""
+
+    __slots__ = ("session", "enqueued", "granted", "event", "loop", "future")
+
+    def __init__(self, session: str, loop: asyncio.AbstractEventLoop | None = None):
+        self.session = session
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+    def grant(self):
+        self.granted = True
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+
+class ModelCallScheduler:
+    """Rate limits, an adaptive concurrency limit and fair queuing for model calls.
+
+    Args:
+        requests_per_minute: Request rate limit (None = unlimited)
+        tokens_per_minute: Token rate limit, prompt plus output (None = unlimited)
+        initial_concurrency: Starting limit on calls in flight
+        max_concurrency: Ceiling of the adaptive limit
+        max_retries: Retries of a call rejected with a 429
+        expected_output_tokens: Output tokens reserved per call until the
+            actual usage is known
+        backoff_s: Base of the exponential backoff when the provider gives
+            no Retry-After
+    """
+
+    def __init__(self, requests_per_minute: float | None = None, tokens_per_minute: float | None = None,
+                 initial_concurrency: int = 4, max_concurrency: int = 64, max_retries: int = 5,
+                 expected_output_tokens: int = 400, backoff_s: float = 0.5):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.limiter = AIMDLimiter(initial_concurrency, maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.expected_output_tokens = expected_output_tokens
+        self.backoff_s = backoff_s
+
+        self._lock = threading.Lock()
+        self._queues = OrderedDict()  # session -> deque of waiting tickets, in round-robin order
+        self._in_flight = 0
+        self._calls = 0
+        self._throttled = 0
+        self._failed = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._rate_wait_total = 0.0
+        self._waits = 0
+
+    # Fair queue
+
+    def _dispatch(self):
+        # Lock held: hand free slots to the sessions in turn
+        while self._queues and self._in_flight < self.limiter.limit:
+            session, queue = self._queues.popitem(last=False)
+            ticket = queue.popleft()
+            if queue:
+                self._queues[session] = queue
+            self._in_flight += 1
+            ticket.grant()
+
+    def _enqueue(self, ticket: _Ticket):
+        with self._lock:
+            self._queues.setdefault(ticket.session, deque()).append(ticket)
+            self._dispatch()
+
+    def _withdraw(self, ticket: _Ticket):
+        """Forget a cancelled ticket, giving its slot back if it had one"""
+        with self._lock:
+            if ticket.granted:
+                self._in_flight -= 1
+            else:
+                queue = self._queues.get(ticket.session)
+                if queue is not None and ticket in queue:
+                    queue.remove(ticket)
+                    if not queue:
+                        del self._queues[ticket.session]
+            self._dispatch()
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._dispatch()
+
+    def _granted(self, ticket: _Ticket):
+        waited = time.monotonic() - ticket.enqueued
+        with self._lock:
+            self._waits += 1
+            self._queue_wait_total += waited
+            self._queue_wait_max = max(self._queue_wait_max, waited)
+
+    # Rate limits
+
+    def _reserve(self, tokens: int) -> float:
+        """Take one request and the estimated tokens; seconds to wait before calling"""
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.take(1)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.take(tokens))
+        if wait:
+            with self._lock:
+                self._rate_wait_total += wait
+        return wait
+
+    def _settle(self, estimated: int, response, latency: float):
+        self.limiter.on_success(latency)
+        if self.tokens is not None:
+            used = _total_tokens(response)
+            if used is not None:
+                self.tokens.give(estimated - used)
+        with self._lock:
+            self._calls += 1
+
+    def _retry_delay(self, error: BaseException, attempt: int) -> float | None:
+        """Seconds to wait before retrying a failed call, or None to give up"""
+        if not is_rate_limit_error(error) or attempt >= self.max_retries:
+            with self._lock:
+                self._failed += 1
+            return None
+
+        self.limiter.on_throttle()
+        with self._lock:
+            self._throttled += 1
+        delay = retry_after(error)
+        return delay if delay is not None else self.backoff_s * 2 ** attempt * random.uniform(0.5, 1.0)
+
+    # Calls
+
+    def call(self, session: str, estimated_tokens: int, fn):
+        """Run fn() (a model call) once a slot and the rate limits allow it"""
+        attempt = 0
+        while True:
+            ticket = _Ticket(session)
+            self._enqueue(ticket)
+            if not ticket.event.wait(deadline.remaining()):
+                self._withdraw(ticket)
+                raise deadline.DeadlineExceeded("Deadline exceeded while queued for a model call")
+            self._granted(ticket)
+
+            try:
+                # The caller may have given up on this call while it was queued
+                deadline.check()
+                deadline.sleep(self._reserve(estimated_tokens))
+                start = time.monotonic()
+                response = fn()
+            except deadline.DeadlineExceeded:
+                self._release()
+                raise
+            except Exception as e:
+                self._release()
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                deadline.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self._release()
+                raise
+
+            self._settle(estimated_tokens, response, time.monotonic() - start)
+            self._release()
+            return response
+
+    async def acall(self, session: str, estimated_tokens: int, fn):
+        """Async call(): fn() returns an awaitable"""
+        attempt = 0
+        while True:
+            ticket = _Ticket(session, asyncio.get_running_loop())
+            self._enqueue(ticket)
+            try:
+                await asyncio.wait_for(ticket.future, deadline.remaining())
+            except asyncio.TimeoutError:
+                self._withdraw(ticket)
+                raise deadline.DeadlineExceeded("Deadline exceeded while queued for a model call") from None
+            except asyncio.CancelledError:
+                self._withdraw(ticket)
+                raise
+            self._granted(ticket)
+
+            try:
+                deadline.check()
+                await deadline.asleep(self._reserve(estimated_tokens))
+                start = time.monotonic()
+                response = await fn()
+            except deadline.DeadlineExceeded:
+                self._release()
+                raise
+            except Exception as e:
+                self._release()
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await deadline.asleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self._release()
+                raise
+
+            self._settle(estimated_tokens, response, time.monotonic() - start)
+            self._release()
+            return response
+
+    def stats(self) -> dict:
+        """Queue depth and waits, calls in flight against the limit, throttles and bucket levels"""
+        with self._lock:
+            stats = {
+                "queue_depth": sum(len(queue) for queue in self._queues.values()),
+                "waiting_sessions": len(self._queues),
+                "in_flight": self._in_flight,
+                "calls": self._calls,
+                "throttled": self._throttled,
+                "failed": self._failed,
+                "avg_queue_wait_s": self._queue_wait_total / self._waits if self._waits else 0.0,
+                "max_queue_wait_s": self._queue_wait_max,
+                "rate_wait_s": self._rate_wait_total,
+            }
+        stats["concurrency_limit"] = self.limiter.limit
+        if self.requests is not None:
+            stats["requests_available"] = self.requests.available
+        if self.tokens is not None:
+            stats["tokens_available"] = self.tokens.available
+        return stats
+
+
+def _total_tokens(response) -> int | None:
+    for message in getattr(response, "result", None) or [response]:
+        usage = getattr(message, "usage_metadata", None)
+        if usage and "total_tokens" in usage:
+            return usage["total_tokens"]
+    return None
+
+
+def _session() -> str:
+    """The conversation the current model call belongs to"""
+    try:
+        return get_config().get("configurable", {}).get("thread_id") or "default"
+    except RuntimeError:
+        return "default"
+
+
+class SchedulerMiddleware(AgentMiddleware):
+    """Runs each of an agent's model calls through a shared ModelCallScheduler"""
+
+    def __init__(self, scheduler: ModelCallScheduler):
+        super().__init__()
+        self.scheduler = scheduler
+
+    def _estimate(self, request) -> int:
+        messages = [request.system_message, *request.messages] if request.system_message else request.messages
+        return count_tokens_approximately(messages) + self.scheduler.expected_output_tokens
+
+    def wrap_model_call(self, request, handler):
+        # The provider timeout is taken when the call is sent, so time spent queued counts against it
+        return self.scheduler.call(_session(), self._estimate(request),
+                                   lambda: handler(deadline.with_timeout(request)))
+
+    async def awrap_model_call(self, request, handler):
+        return await self.scheduler.acall(_session(), self._estimate(request),
+                                          lambda: handler(deadline.with_timeout(request)))
@@ -0,0 +1,325 @@
+"""
+Travel Planner Server
+
+ASGI entry point for serving many conversations from one process, for the
+web frontend. Each conversation is a thread_id; turns on the same thread run
+one at a time, different threads run concurrently.
+
+Endpoints:
+    POST /chat      {"message": "...", "thread_id": "...", "timeout_s": 20} -> Server-Sent Events
+    GET  /health    status, active runs and configuration
+    GET  /metrics   Prometheus metrics (model, subagent and tool spans, caches)
+    GET  /traces    span trees of the latest requests (?limit=20)
+
+Each SSE event's name is the streaming event type (token, tool_call,
+subagent_start, ...; see streaming.py) and its data the event as JSON. A run
+starts with a "session" event carrying the thread_id and ends with "done" or
+"error".
+
+Usage:
+    python server.py [--port 8000] [--workers 1] [--max-concurrent-runs 100]
+
+Run several workers only with --checkpoint-db, so every worker sees every
+conversation.
+
+With --timeout (or a shorter "timeout_s" in the request) a turn that runs
+out of time answers with what has been found so far (see deadline.py);
+--hedge duplicates model calls slower than a latency percentile.
+
+With --rpm / --tpm every model call of a worker goes through one
+scheduler.ModelCallScheduler (split the provider's limits between workers).
+
+With --profile DIR each turn is profiled (see profiling.py); profiled turns
+run one at a time per worker, so use it on a test deployment.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from checkpointer import CompactSqliteSaver
+from deadline import HedgePolicy, deadline
+from instrumentation import Instrumentation
+from llm_cache import TieredLLMCache
+from profiling import TurnProfiler
+from router import FastRouter
+from scheduler import ModelCallScheduler
+from streaming import astream_events
+from supervisor import create_supervisor_agent, get_agents
+from tiering import parse_agent_models, two_tier_policy
+from tools.formatting import OUTPUT_MODES, set_output_mode
+
+
+# Settings are passed to worker processes through the environment
+SETTINGS = {
+    "model": ("TRAVEL_MODEL", "openai:gpt-4o-mini", str),
+    "max_concurrent_runs": ("TRAVEL_MAX_CONCURRENT_RUNS", 100, int),
+    "subagent_concurrency": ("TRAVEL_SUBAGENT_CONCURRENCY", 32, int),
+    "threads": ("TRAVEL_THREADS", 64, int),
+    "checkpoint_db": ("TRAVEL_CHECKPOINT_DB", None, str),
+    "thread_ttl": ("TRAVEL_THREAD_TTL", None, float),
+    "llm_cache": ("TRAVEL_LLM_CACHE", None, str),
+    "fast_router": ("TRAVEL_FAST_ROUTER", True, lambda v: v.lower() not in ("0", "false", "no")),
+    "instrument": ("TRAVEL_INSTRUMENT", True, lambda v: v.lower() not in ("0", "false", "no")),
+    "profile": ("TRAVEL_PROFILE_DIR", None, str),
+    "tool_output": ("TRAVEL_TOOL_OUTPUT", "pretty", str),
+    "fast_model": ("TRAVEL_FAST_MODEL", None, str),
+    "agent_models": ("TRAVEL_AGENT_MODELS", {}, parse_agent_models),
+    "rpm": ("TRAVEL_RPM", None, float),
+    "tpm": ("TRAVEL_TPM", None, float),
+    "model_concurrency": ("TRAVEL_MODEL_CONCURRENCY", 4, int),
+    "timeout": ("TRAVEL_TIMEOUT", None, float),
+    "hedge": ("TRAVEL_HEDGE_PERCENTILE", None, float),
+}
+
+
+def settings_from_env() -> dict:
+    """Server settings, from TRAVEL_* environment variables or defaults"""
+    settings = {}
+    for name, (variable, default, parse) in SETTINGS.items():
+        value = os.environ.get(variable)
+        settings[name] = default if value in (None, "") else parse(value)
+    return settings
+
+
+def build_agent(settings: dict, instrumentation: Instrumentation | None = None):
+    """Create the supervisor (behind the fast router) for the server"""
+    set_output_mode(settings["tool_output"])
+    checkpointer = (
+        CompactSqliteSaver(settings["checkpoint_db"], thread_ttl=settings["thread_ttl"])
+        if settings["checkpoint_db"] else None
+    )
+    scheduler = (
+        ModelCallScheduler(settings["rpm"], settings["tpm"], initial_concurrency=settings["model_concurrency"])
+        if settings["rpm"] or settings["tpm"] else None
+    )
+    agent = create_supervisor_agent(
+        model_name=settings["model"],
+        use_memory=True,
+        max_concurrency=settings["subagent_concurrency"],
+        llm_cache=TieredLLMCache(settings["llm_cache"]) if settings["llm_cache"] else None,
+        checkpointer=checkpointer,
+        instrumentation=instrumentation,
+        agent_models=settings["agent_models"],
+        tiering=two_tier_policy(settings["model"], settings["fast_model"]) if settings["fast_model"] else None,
+        scheduler=scheduler,
+        hedging=HedgePolicy(settings["hedge"]) if settings["hedge"] else None,
+    )
+    if not settings["fast_router"]:
+        return agent
+
+    router = FastRouter(agent)
+    if instrumentation is not None:
+        instrumentation.register_stats("router", router.stats)
+    return router
+
+
+def sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def create_app(settings: dict | None = None, agent=None, instrumentation: Instrumentation | None = None) -> Starlette:
+    """Build the ASGI app.
+
+    Args:
+        settings: Server settings (defaults to settings_from_env())
+        agent: Agent to serve (defaults to build_agent(settings)); must
+            support astream
+        instrumentation: Source of /metrics and /traces (defaults to a new
+            one attached to the built agent if settings["instrument"])
+
+    Returns:
+        The Starlette application
+    """
+    settings = settings or settings_from_env()
+    if instrumentation is None and agent is None and settings.get("instrument"):
+        instrumentation = Instrumentation()
+    # Subagents of an agent built here are compiled at startup rather than by the first requests
+    prewarm = agent is None
+    agent = agent or build_agent(settings, instrumentation)
+
+    run_slots = asyncio.Semaphore(settings["max_concurrent_runs"])
+    # One lock per conversation, dropped once no request holds it
+    thread_locks = weakref.WeakValueDictionary()
+    stats = {"active_runs": 0, "waiting_runs": 0, "completed_runs": 0, "failed_runs": 0}
+    started = time.time()
+
+    profiler = TurnProfiler(settings["profile"]) if settings.get("profile") else None
+    profile_lock = asyncio.Lock()
+
+    @contextlib.asynccontextmanager
+    async def profiled(message: str):
+        if profiler is None:
+            yield
+            return
+        # A profile covers everything the event loop runs, so keep turns apart
+        async with profile_lock:
+            with profiler.turn(message):
+                yield
+
+    async def run_turn(thread_id: str, message: str, timeout: float | None, arrived: float):
+        lock = thread_locks.setdefault(thread_id, asyncio.Lock())
+        config = {"configurable": {"thread_id": thread_id}}
+
+        yield sse("session", {"thread_id": thread_id})
+
+        stats["waiting_runs"] += 1
+        started_run = False
+        try:
+            async with lock, run_slots:
+                stats["waiting_runs"] -= 1
+                stats["active_runs"] += 1
+                started_run = True
+                try:
+                    # The deadline counts from the request's arrival, including its wait for a slot
+                    left = None if timeout is None else max(0.0, timeout - (time.monotonic() - arrived))
+                    async with profiled(message):
+                        with deadline(left):
+                            async for event in astream_events(
+                                agent, {"messages": [{"role": "user", "content": message}]}, config
+                            ):
+                                yield sse(event["type"], event)
+                    stats["completed_runs"] += 1
+                    yield sse("done", {"thread_id": thread_id})
+                except Exception as error:
+                    stats["failed_runs"] += 1
+                    yield sse("error", {"message": str(error)})
+                finally:
+                    stats["active_runs"] -= 1
+        finally:
+            # The client went away before the run could start
+            if not started_run:
+                stats["waiting_runs"] -= 1
+
+    async def chat(request: Request):
+        arrived = time.monotonic()
+        try:
+            body = await request.json()
+        except ValueError:
+            return JSONResponse({"error": "Body must be JSON"}, status_code=400)
+
+        message = body.get("message") if isinstance(body, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            return JSONResponse({"error": "'message' is required"}, status_code=400)
+
+        timeout = body.get("timeout_s", settings.get("timeout"))
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, int | float) or timeout <= 0):
+            return JSONResponse({"error": "'timeout_s' must be a positive number"}, status_code=400)
+        if settings.get("timeout") is not None and timeout is not None:
+            # Clients may ask for less time than the server allows, not more
+            timeout = min(timeout, settings["timeout"])
+
+        thread_id = str(body.get("thread_id") or uuid.uuid4())
+        return StreamingResponse(
+            run_turn(thread_id, message.strip(), timeout, arrived),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def health(request: Request):
+        return JSONResponse({
+            "status": "ok",
+            "uptime_s": round(time.time() - started, 1),
+            **stats,
+            "max_concurrent_runs": settings["max_concurrent_runs"],
+        })
+
+    async def metrics(request: Request):
+        if instrumentation is None:
+            return JSONResponse({"error": "Instrumentation is disabled"}, status_code=404)
+        return PlainTextResponse(instrumentation.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    async def traces(request: Request):
+        if instrumentation is None:
+            return JSONResponse({"error": "Instrumentation is disabled"}, status_code=404)
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            return JSONResponse({"error": "'limit' must be an integer"}, status_code=400)
+        return JSONResponse({"traces": instrumentation.traces(limit)})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # Sync tools and subagents run in the default executor; size it for
+        # many concurrent conversations rather than the CPU count
+        executor = ThreadPoolExecutor(settings["threads"], thread_name_prefix="travel-agent")
+        asyncio.get_running_loop().set_default_executor(executor)
+        if prewarm:
+            await asyncio.get_running_loop().run_in_executor(executor, get_agents().prewarm)
+        yield
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return Starlette(
+        routes=[
+            Route("/chat", chat, methods=["POST"]),
+            Route("/health", health, methods=["GET"]),
+            Route("/metrics", metrics, methods=["GET"]),
+            Route("/traces", traces, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Smart Travel Planner - HTTP/SSE server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--model", help="Chat model, e.g. openai:gpt-4o-mini")
+    parser.add_argument("--max-concurrent-runs", type=int, help="Agent runs in progress per worker; more wait")
+    parser.add_argument("--subagent-concurrency", type=int, help="Subagents running at once per worker")
+    parser.add_argument("--threads", type=int, help="Threads for tools and subagents per worker")
+    parser.add_argument("--checkpoint-db", metavar="PATH", help="Keep conversations in this SQLite file")
+    parser.add_argument("--thread-ttl", type=float, metavar="SECONDS", help="Expire idle conversations")
+    parser.add_argument("--llm-cache", metavar="PATH", help="Cache model responses in this SQLite file")
+    parser.add_argument("--no-fast-router", action="store_true", help="Send every query to the agent")
+    parser.add_argument("--no-instrument", action="store_true", help="Disable /metrics and /traces")
+    parser.add_argument("--profile", metavar="DIR", help="Write a CPU and memory profile per turn to DIR")
+    parser.add_argument("--tool-output", choices=OUTPUT_MODES, help="Domain tool output for the models")
+    parser.add_argument("--fast-model", help="Send simple subagent model calls to this model (see tiering.py)")
+    parser.add_argument("--agent-model", action="append", metavar="AGENT=MODEL", dest="agent_models",
+                        help="Model for one agent (supervisor, flights, hotels, activities, itinerary)")
+    parser.add_argument("--rpm", type=float, help="Model requests per minute per worker; more are queued")
+    parser.add_argument("--tpm", type=float, help="Model tokens per minute per worker; more are queued")
+    parser.add_argument("--model-concurrency", type=int,
+                        help="Starting limit on model calls in flight with --rpm/--tpm (adapts to 429s)")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                        help="Answer with the results so far once a turn has taken this long")
+    parser.add_argument("--hedge", type=float, metavar="PERCENTILE",
+                        help="Duplicate model calls slower than this latency percentile, e.g. 95")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.workers > 1 and not args.checkpoint_db:
+        raise SystemExit("--workers > 1 needs --checkpoint-db so conversations are shared")
+
+    overrides = {name: getattr(args, name) for name in SETTINGS if name not in ("fast_router", "instrument")}
+    overrides["fast_router"] = False if args.no_fast_router else None
+    overrides["instrument"] = False if args.no_instrument else None
+    overrides["agent_models"] = ",".join(args.agent_models) if args.agent_models else None
+    try:
+        parse_agent_models(overrides["agent_models"] or "")
+    except ValueError as e:
+        raise SystemExit(str(e))
+    for name, value in overrides.items():
+        if value is not None:
+            os.environ[SETTINGS[name][0]] = str(value)
+
+    uvicorn.run("server:create_app", factory=True, host=args.host, port=args.port, workers=args.workers)
@@ -0,0 +1,86 @@
+"""
+Startup
+
+Importing LangChain and LangGraph and compiling the supervisor and its four
+subagent graphs takes a few seconds. LazyAgent moves that work off the
+critical path: the CLI shows its prompt straight away while a background
+thread builds the agent, and the first query only waits for whatever is
+still left to do.
+
+This module only imports the standard library, so an entry point that
+imports nothing else up front starts in milliseconds; the agent's own
+imports happen inside the build function.
+
+Usage:
+    def build():
+        from supervisor import create_supervisor_agent, get_agents
+        agent = create_supervisor_agent()
+        get_agents().prewarm()
+        return agent
+
+    agent = LazyAgent(build).prewarm()
+    ...
+    agent.stream(...)   # waits for the build if it hasn't finished
+"""
+
+import threading
+import time
+
+
+class LazyAgent:
+    """An agent built on first use, or ahead of it on a background thread.
+
+    Stands in for the agent build() returns: attribute lookups (invoke,
+    stream, astream, checkpointer, ...) wait for the build and are forwarded
+    to the agent.
+
+    Args:
+        build: Function returning the agent
+        *args, **kwargs: Arguments for build
+    """
+
+    def __init__(self, build, *args, **kwargs):
+        self._build = build
+        self._args = args
+        self._kwargs = kwargs
+        self._agent = None
+        self._error = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self.build_time_s = None
+
+    def get(self):
+        """The agent, built now if no prewarm has done it yet"""
+        if self._agent is None:
+            with self._lock:
+                if self._agent is None:
+                    if self._error is not None:
+                        raise self._error
+                    start = time.perf_counter()
+                    self._agent = self._build(*self._args, **self._kwargs)
+                    self.build_time_s = time.perf_counter() - start
+        return self._agent
+
+    def _prewarm(self):
+        try:
+            self.get()
+        except Exception as e:
+            # Raised again to the first caller of get()
+            self._error = e
+
+    def prewarm(self, background: bool = True) -> "LazyAgent":
+        """Build the agent now, on a daemon thread if background"""
+        if not background:
+            self.get()
+        elif self._thread is None:
+            self._thread = threading.Thread(target=self._prewarm, name="prewarm-agent", daemon=True)
+            self._thread.start()
+        return self
+
+    @property
+    def ready(self) -> bool:
+        """Whether the agent has been built"""
+        return self._agent is not None
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
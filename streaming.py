@@ -0,0 +1,136 @@
+"""
+Streaming Events
+
+A frontend-neutral event stream over any of the planner's agents (supervisor,
+FastRouter, plan-and-execute). stream_events() turns LangGraph's "messages",
+"updates" and "custom" stream modes into plain dicts:
+
+    {"type": "token", "text": ...}                  supervisor answer tokens
+    {"type": "message", "text": ...}                a complete answer (no token stream)
+    {"type": "tool_call", "name": ..., "args": ...} the supervisor called a tool
+    {"type": "subagent_start", "agent": ..., "request": ...}
+    {"type": "subagent_tool", "agent": ..., "tool": ..., "args": ...}
+    {"type": "subagent_end", "agent": ..., "elapsed_s": ...}
+    {"type": "deadline_exceeded", "agent": ...}    an agent ran out of time (see deadline.py)
+
+astream_events() is the async equivalent for servers.
+
+Subagent events are emitted from inside tool calls with emit(), which is a
+no-op when no stream is listening (e.g. a tool called outside a graph).
+"""
+
+import asyncio
+import contextvars
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langgraph.config import get_stream_writer
+
+
+STREAM_MODES = ["updates", "messages", "custom"]
+
+# Graph nodes whose token stream is shown as the answer
+ANSWER_NODES = {"model"}
+
+
+def emit(event: dict):
+    """Send a custom event to the caller's stream, if there is one"""
+    try:
+        writer = get_stream_writer()
+    except (RuntimeError, KeyError):
+        # Not running inside a graph
+        return
+    writer(event)
+
+
+def _is_root_answer(metadata: dict) -> bool:
+    """Whether a streamed message chunk comes from the top-level model node.
+
+    Subagents run inside the supervisor's tool calls, so their model calls
+    have a nested checkpoint namespace ("tools:<id>|model:<id>").
+    """
+    return metadata.get("langgraph_node") in ANSWER_NODES and "|" not in metadata.get("langgraph_checkpoint_ns", "")
+
+
+def _events_from_update(update: dict, streamed_tokens: bool):
+    for node, values in update.items():
+        if not isinstance(values, dict):
+            continue
+
+        for message in values.get("messages", []):
+            if not isinstance(message, AIMessage):
+                continue
+
+            for tool_call in message.tool_calls:
+                yield {"type": "tool_call", "name": tool_call["name"], "args": tool_call["args"]}
+
+            # Answers from the model node were already streamed token by token
+            if message.text and not message.tool_calls and not (node in ANSWER_NODES and streamed_tokens):
+                yield {"type": "message", "text": message.text}
+
+
+class _EventMapper:
+    """Turns raw stream items into events, tracking whether tokens were streamed"""
+
+    def __init__(self):
+        self.streamed_tokens = False
+
+    def __call__(self, item) -> list:
+        # Agents that aren't LangGraph graphs yield plain update dicts
+        mode, chunk = item if isinstance(item, tuple) else ("updates", item)
+
+        if mode == "messages":
+            message, metadata = chunk
+            if isinstance(message, AIMessageChunk | AIMessage) and message.text and _is_root_answer(metadata):
+                self.streamed_tokens = True
+                return [{"type": "token", "text": message.text}]
+
+        elif mode == "custom":
+            if isinstance(chunk, dict) and "type" in chunk:
+                return [chunk]
+
+        elif mode == "updates":
+            events = list(_events_from_update(chunk, self.streamed_tokens))
+            if "model" in chunk:
+                self.streamed_tokens = False
+            return events
+
+        return []
+
+
+def stream_events(agent, input: dict, config: dict | None = None):
+    """Run an agent and yield its progress as event dicts (see module docstring)"""
+    to_events = _EventMapper()
+    for item in agent.stream(input, config=config, stream_mode=STREAM_MODES):
+        yield from to_events(item)
+
+
+async def astream_events(agent, input: dict, config: dict | None = None):
+    """Async stream_events(); agents without astream() run in a worker thread"""
+    if hasattr(agent, "astream"):
+        to_events = _EventMapper()
+        async for item in agent.astream(input, config=config, stream_mode=STREAM_MODES):
+            for event in to_events(item):
+                yield event
+        return
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+
+    def produce():
+        try:
+            for event in stream_events(agent, input, config):
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        except BaseException as error:
+            loop.call_soon_threadsafe(queue.put_nowait, error)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    # Copy the context so a deadline set by the caller holds in the worker thread
+    producer = loop.run_in_executor(None, contextvars.copy_context().run, produce)
+    while (event := await queue.get()) is not done:
+        if isinstance(event, BaseException):
+            await producer
+            raise event
+        yield event
+    await producer
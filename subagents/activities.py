@@ -9,10 +9,33 @@ Handles natural language queries about experiences and dining.
 - get_activity_recommendations
 """
 
-from langchain.agents import create_agent
-from langchain.tools import tool
-
-from tools.mock_data import get_activities, get_restaurants
+from langchain_core.tools import tool
+
+from tools.formatting import clip, compact_output, compact_records
+from tools.mock_data import get_activities, query_activities, query_restaurants
+
+# Compact output field -> activity record key (or value)
+ACTIVITY_FIELDS = {
+    "name": "name",
+    "cat": "category",
+    "dur": "duration",
+    "price": "price",
+    "rating": "rating",
+    "loc": "location",
+    "for": "best_for",
+    "note": lambda activity: clip(activity["description"], 60),
+}
+
+# Compact output field -> restaurant record key (or value)
+RESTAURANT_FIELDS = {
+    "name": "name",
+    "cuisine": "cuisine",
+    "price": "price_range",
+    "rating": "rating",
+    "area": "neighborhood",
+    "for": "best_for",
+    "note": lambda restaurant: clip(restaurant["description"], 60),
+}
 
 @tool
 def search_activities(
@@ -32,32 +55,18 @@ def search_activities(
         Available activities with details
     """
 
-    activities = get_activities(destination)
+    # Filter by interests and budget through the inventory index
+    activities = query_activities(destination, interests, budget_max)
 
-    if not activities:
+    if activities is None:
         return f"No activities found in {destination}. Please check the destination name"
-    
-    # Filter by interests if specified
-    if interests:
-        interests_lower = [i.lower() for i in interests]
-
-        filtered = []
-
-        for activity in activities:
-            if any(interest in [bf.lower() for bf in activity.get("best_for", [])] for interest in interests_lower):
-                filtered.append(activity)
-            elif any(interest in activity.get("category", "").lower() for interest in interests_lower):
-                filtered.append(activity)
-
-        if filtered:
-            activities = filtered
-
-    # Filter by budget if specified
-    if budget_max:
-        activities = [a for a in activities if a["price"] <= budget_max]
 
     if not activities:
         return "No activities match your criteria. Try adjusting your interests or budget"
+
+    if compact_output():
+        return compact_records("activities", destination, activities, ACTIVITY_FIELDS,
+                               sort_key=lambda a: -a["rating"])
     
     # Format results
     results = [f"Found {len(activities)} activity/activities in {destination}:\n"]
@@ -97,22 +106,18 @@ def search_restaurants(
         Restaurant recommendations with details
     """
 
-    restaurants = get_restaurants(destination)
+    # Filter by cuisine and price range through the inventory index
+    restaurants = query_restaurants(destination, cuisine, price_range)
 
-    if not restaurants:
+    if restaurants is None:
         return f"No restaurant data available for {destination}"
-    
-    # Filter by cuisine if specified
-    if cuisine:
-        cuisine_lower = cuisine.lower()
-        restaurants = [r for r in restaurants if cuisine_lower in r['cuisine'].lower()]
-
-    # Filter by price range if specified
-    if price_range:
-        restaurants = [r for r in restaurants if r["price_range"] == price_range]
 
     if not restaurants:
         return "No restaurants match your criteria. Try adjusting your filters"
+
+    if compact_output():
+        return compact_records("restaurants", destination, restaurants, RESTAURANT_FIELDS,
+                               sort_key=lambda r: -r["rating"])
     
     # Format Results
     results = [f"Found {len(restaurants)} restaurant(s) in {destination}:\n"]
@@ -216,12 +221,14 @@ Be enthusiastic but practical. Help travelers make the most of their time with s
 Consider logistics - don't recommend activities on opposite sides of the city for the same day."""
 
 
-def create_activities_agent(model):
+def create_activities_agent(model, middleware=()):
     """Create and return the activities agent"""
+    from langchain.agents import create_agent
 
     return create_agent(
         model,
         tools=[search_activities, search_restaurants, get_activity_recommendations],
-        system_prompt=ACTIVITIES_AGENT_PROMPT
+        system_prompt=ACTIVITIES_AGENT_PROMPT,
+        middleware=middleware
     )
 
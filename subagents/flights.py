@@ -7,10 +7,25 @@ It handles natural language queries about flight options, prices, and schedules
 - compare_flight_prices
 """
 
-from langchain.agents import create_agent
-from langchain.tools import tool
-
-from tools.mock_data import get_flights
+from langchain_core.tools import tool
+
+from tools.formatting import compact_output, compact_records
+from tools.mock_data import get_flight_table, query_flights
+
+# Compact output field -> flight record key
+FLIGHT_FIELDS = {
+    "no": "flight_number",
+    "airline": "airline",
+    "from": "departure_city",
+    "to": "arrival_city",
+    "dep": "departure_time",
+    "arr": "arrival_time",
+    "dur": "duration",
+    "stops": "stops",
+    "via": "layover",
+    "price": "price",
+    "class": "class",
+}
 
 @tool
 def search_flights(
@@ -29,23 +44,17 @@ def search_flights(
         Available flight options with details
     """
 
-    flights = get_flights(destination)
+    # Filter by budget and stops through the inventory index
+    flights = query_flights(destination, budget_max, preferred_stops)
 
-    if not flights:
+    if flights is None:
         return f"No flights found to {destination}. Please check the destination name."
-    
-    # Filter By budget if specified
-    if budget_max:
-        flights = [f for f in flights if f["price"] <= budget_max]
-
-    # Filter by stops if specified
-    if preferred_stops == "direct":
-        flights = [f for f in flights if f["stops"] == 0]
-    elif preferred_stops == "one-stop":
-        flights = [f for f in flights if f["stops"] == 1]
 
     if not flights:
         return "No flights match your criteria. Try adjusting your budget or stop preferences"
+
+    if compact_output():
+        return compact_records("flights", destination, flights, FLIGHT_FIELDS, sort_key=lambda f: f["price"])
     
     # Format and Build Results
     results = [f"Found {len(flights)} flight(s) to {destination}:\n"]
@@ -73,18 +82,19 @@ def compare_flight_prices(destination: str) -> str:
         Price comparison summary with cheapest and recommended options
     """
 
-    flights = get_flights(destination)
+    table = get_flight_table(destination)
 
-    if not flights:
+    if table is None or len(table) == 0:
         return f"No flights found to {destination}"
     
-    # Sort by price
-    sorted_flights = sorted(flights, key=lambda x: x['price'])
-    cheapest = sorted_flights[0]
+    # Cheapest overall, and best value (direct flight with good price)
+    all_flights = table.filter()
+    cheapest = table.records(table.top_k(all_flights))[0]
 
-    # Find the best value (direct flght with good price)
-    direct_flights = [f for f in flights if f["stops"] == 0]
-    best_value = min(direct_flights, key=lambda x: x['price']) if direct_flights else cheapest
+    direct_flights = table.top_k(table.filter(stops="direct"))
+    best_value = table.records(direct_flights)[0] if len(direct_flights) else cheapest
+
+    lowest_price, highest_price = table.price_range(all_flights)
 
     result = f"""Flight Price Comparison to {destination}:
 
@@ -96,7 +106,7 @@ def compare_flight_prices(destination: str) -> str:
    {best_value['airline']} {best_value['flight_number']} - ${best_value['price']}
    {best_value['duration']} | Direct flight
 
-📊 Price Range: ${sorted_flights[0]['price']} - ${sorted_flights[-1]['price']}
+📊 Price Range: ${lowest_price} - ${highest_price}
 """
     
     return result
@@ -117,11 +127,14 @@ When responding:
 
 Be concise but informative. Focus on actionable recommendations."""
 
-def create_flights_agent(model):
+def create_flights_agent(model, middleware=()):
     """Create and return the flight agent"""
+    from langchain.agents import create_agent
+
     return create_agent(
         model,
         tools=[search_flights, compare_flight_prices],
-        system_prompt=FLIGHTS_AGENT_PROMPT
+        system_prompt=FLIGHTS_AGENT_PROMPT,
+        middleware=middleware
     )
 
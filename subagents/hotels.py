@@ -8,10 +8,22 @@ Handles natural language queries about hotels, amenities, and locations.
 - get_hotel_recommendation
 """
 
-from langchain.agents import create_agent
-from langchain.tools import tool
-
-from tools.mock_data import get_hotels
+from langchain_core.tools import tool
+
+from tools.formatting import clip, compact_output, compact_records
+from tools.mock_data import get_hotel_table, query_hotels
+
+# Compact output field -> hotel record key (or value)
+HOTEL_FIELDS = {
+    "name": "name",
+    "area": "neighborhood",
+    "rating": "rating",
+    "reviews": "reviews",
+    "night": "price_per_night",
+    "for": "traveler_type",
+    "amenities": lambda hotel: hotel["amenities"][:4],
+    "note": lambda hotel: clip(hotel["description"], 60),
+}
 
 @tool
 def search_hotels(
@@ -31,22 +43,17 @@ def search_hotels(
         Available hotel options with details
     """
 
-    hotels = get_hotels(destination)
+    # Filter by budget and traveler type through the inventory index
+    hotels = query_hotels(destination, budget_per_night, traveler_type)
 
-    if not hotels:
+    if hotels is None:
         return f"No hotels found in {destination}. Please check the destination name"
-    
-    # Filter by budget if specified
-    if budget_per_night:
-        hotels = [h for h in hotels if h['price_per_night'] <= budget_per_night]
-
-    # Filter by traveler type if specified
-    if traveler_type:
-        traveler_type_lower = traveler_type.lower()
-        hotels = [h for h in hotels if traveler_type_lower in h.get("traveler_type", [])]
 
     if not hotels:
         return "No hotels match your criteria. try adjusting your budget or preferences"
+
+    if compact_output():
+        return compact_records("hotels", destination, hotels, HOTEL_FIELDS, sort_key=lambda h: -h["rating"])
     
     # Format results
     results = [f"Found {len(hotels)} hotel(s) in {destination}:\n"]
@@ -88,28 +95,19 @@ def get_hotel_recommendation(
         Top hotel recommendation with explanation
     """
 
-    hotels = get_hotels(destination)
+    table = get_hotel_table(destination)
 
-    if not hotels:
+    if table is None or len(table) == 0:
         return f"No hotels found in {destination}"
     
     # Filter by traveler type if specified
-    traveler_type_lower = traveler_type.lower()
-    matching_hotels = [h for h in hotels if traveler_type_lower in h.get("traveler_type", [])]
+    matching_hotels = table.filter(traveler_type=traveler_type)
 
-    if not matching_hotels:
-        matching_hotels = hotels
+    if not len(matching_hotels):
+        matching_hotels = table.filter()
 
-    # Sort by priority
-    if priority == "price":
-        matching_hotels.sort(key=lambda x: x['price_per_night'])
-    elif priority == "rating":
-        matching_hotels.sort(key=lambda x: x['rating'], reverse=True)
-    else:
-        # Balanced: score based on rating and price
-        matching_hotels.sort(key=lambda x: x['rating'] / (x['price_per_night'] / 100), reverse=True)
-
-    top_pick = matching_hotels[0]
+    # Top two by priority (price, rating, or balanced rating-per-price score)
+    top_pick, *runners_up = table.records(table.top_k(matching_hotels, priority, k=2))
 
     result = f"""🌟 TOP RECOMMENDATION for {traveler_type} traveler(s) in {destination}:
 
@@ -124,14 +122,14 @@ Why this hotel:
 
 """
     # Add runner up if available
-    if len(matching_hotels) > 1:
-        runner_up = matching_hotels[1]
+    if runners_up:
+        runner_up = runners_up[0]
         result += f"""
 🥈 RUNNER-UP: {runner_up['name']}
    ${runner_up['price_per_night']}/night | ⭐ {runner_up['rating']}/5
 """
         
-        return result
+    return result
     
 HOTELS_AGENT_PROMPT = """You are a hotel and accommodation specialist. Your job is to help users find the perfect place to stay.
 
@@ -151,11 +149,14 @@ When responding:
 Be helpful and specific. If someone is traveling with kids, prioritize family-friendly options. 
 For couples, consider romantic or boutique hotels. For budget travelers, focus on value."""
 
-def create_hotels_agent(model):
+def create_hotels_agent(model, middleware=()):
     """Create and return hotels agent"""
+    from langchain.agents import create_agent
+
     return create_agent(
         model,
         tools=[search_hotels, get_hotel_recommendation],
-        system_prompt=HOTELS_AGENT_PROMPT
+        system_prompt=HOTELS_AGENT_PROMPT,
+        middleware=middleware
     )
 
@@ -9,8 +9,9 @@ Handles optimization of timing, logistics, and flow.
 - generate_trip_summary
 """
 
-from langchain.agents import create_agent
-from langchain.tools import tool
+from langchain_core.tools import tool
+
+from tools.formatting import compact_fields, compact_output
 
 @tool
 def create_daily_schedule(
@@ -120,6 +121,17 @@ def generate_trip_summary(
         Complete trip summary document
     """
 
+    if compact_output():
+        # The supervisor writes the user-facing summary from these fields
+        return compact_fields(
+            trip=destination,
+            days=num_days,
+            flight=flight_info,
+            hotel=hotel_info,
+            activities=activities_info,
+            budget=total_budget,
+        )
+
     result = f"""
 ═══════════════════════════════════════════════════════════════
                     🌏 TRIP TO {destination.upper()} 🌏
@@ -186,13 +198,15 @@ Your goal is to create a realistic, enjoyable schedule - not an exhausting check
 Quality experiences matter more than quantity."""
 
 
-def create_itinerary_agent(model):
+def create_itinerary_agent(model, middleware=()):
     """Create and return the itinerary agent"""
+    from langchain.agents import create_agent
 
     return create_agent(
         model,
         tools=[create_daily_schedule, optimize_route, generate_trip_summary],
-        system_prompt=ITINERARY_AGENT_PROMPT
+        system_prompt=ITINERARY_AGENT_PROMPT,
+        middleware=middleware
     )
 
 
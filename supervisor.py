@@ -10,119 +10,561 @@ This implements the SubAgents pattern where:
 - Results flow back to supervisor for synthesis
 """
 
-from langchain.agents import create_agent
-from langchain.tools import tool
-from langchain.chat_models import init_chat_model
-from langgraph.checkpoint.memory import InMemorySaver
+import threading
+import time
+from collections.abc import Mapping
+from typing import TYPE_CHECKING
 
+from langchain_core.tools import tool
+
+from cache import ResultCache, normalize_request
+from instrumentation import Instrumentation
+from streaming import emit
+from tools.formatting import get_output_mode
 from subagents import (
+    activities,
+    flights,
+    hotels,
+    itinerary,
     create_flights_agent,
     create_hotels_agent,
     create_activities_agent,
     create_itinerary_agent,
 )
 
+if TYPE_CHECKING:
+    from langchain_core.caches import BaseCache
+    from langchain_core.language_models import BaseChatModel
+    from langgraph.checkpoint.base import BaseCheckpointSaver
+
+    from deadline import HedgePolicy
+    from history import HistoryCompactionMiddleware
+    from scheduler import ModelCallScheduler
+    from tiering import TieringPolicy
+
+# Agents, result cache and history stage of the most recently created
+# supervisor, for get_agents(), get_result_cache() and get_history_middleware().
+# The supervisor's own tools are bound to its agents and never read these.
 _agents = None
 
-def initialize_agents(model_name: str = "openai:gpt-4o-mini"):
+# Subagent results shared by every session in the process (None = disabled)
+_result_cache = ResultCache()
+
+# Compacts the supervisor's conversation history (None = disabled)
+_history = None
+
+def _init_model(model: "str | BaseChatModel", **kwargs) -> "BaseChatModel":
+    """A chat model from a "provider:model" name, or a copy of a model instance with kwargs applied"""
+    if isinstance(model, str):
+        from langchain.chat_models import init_chat_model
+        return init_chat_model(model, **kwargs)
+    return model.model_copy(update=kwargs) if kwargs else model
+
+SUBAGENT_FACTORIES = {
+    "flights_agent": ("flights", create_flights_agent),
+    "hotels_agent": ("hotels", create_hotels_agent),
+    "activities_agent": ("activities", create_activities_agent),
+    "itinerary_agent": ("itinerary", create_itinerary_agent),
+}
+
+class AgentSet(Mapping):
+    """The supervisor's model and the four subagents, each built the first time it is used.
+
+    Behaves like a read-only dict with the keys "model_name", "model",
+    "flights_agent", "hotels_agent", "activities_agent" and
+    "itinerary_agent". A subagent graph is compiled on first lookup (or by
+    prewarm()) and reused by every session afterwards.
+
+    Args:
+        model_name: Model of every agent without one in agent_models
+        llm_cache: Response cache shared by every agent's model (optional)
+        uncached_agents: Agents whose model bypasses llm_cache
+        agent_models: Agent ("supervisor", "flights", ...) -> its model
+        tiering: A tiering.TieringPolicy picking each subagent model call's
+            model from its tiers (optional)
+        scheduler: A scheduler.ModelCallScheduler every subagent model call
+            goes through (optional)
+        hedging: A deadline.HedgePolicy for duplicating slow subagent model
+            calls (optional)
+    """
+
+    def __init__(self, model_name: "str | BaseChatModel", llm_cache: "BaseCache | None" = None,
+                 uncached_agents: tuple = (), agent_models: dict | None = None,
+                 tiering: "TieringPolicy | None" = None, scheduler: "ModelCallScheduler | None" = None,
+                 hedging: "HedgePolicy | None" = None):
+        self.model_name = model_name
+        self.llm_cache = llm_cache
+        self.uncached_agents = tuple(uncached_agents)
+        self.agent_models = dict(agent_models or {})
+        self.tiering = tiering
+        self.scheduler = scheduler
+        self.hedging = hedging
+        self._built = {}
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _get(self, key, build):
+        value = self._built.get(key)
+        if value is None:
+            with self._locks_lock:
+                lock = self._locks.setdefault(key, threading.Lock())
+            with lock:
+                value = self._built.get(key)
+                if value is None:
+                    value = self._built[key] = build()
+        return value
+
+    def _model(self, spec: "str | BaseChatModel", cached: bool) -> "BaseChatModel":
+        key = ("model", spec if isinstance(spec, str) else id(spec), cached)
+        if self.llm_cache is None:
+            return self._get(key, lambda: _init_model(spec))
+        return self._get(key, lambda: _init_model(spec, cache=self.llm_cache if cached else False))
+
+    def model_for(self, agent: str) -> "BaseChatModel":
+        """The model an agent ("supervisor", "flights", ...) calls when no tiering policy picks one"""
+        return self._model(self.agent_models.get(agent, self.model_name), agent not in self.uncached_agents)
+
+    def model_name_for(self, agent: str) -> str:
+        """Name of an agent's model"""
+        spec = self.agent_models.get(agent, self.model_name)
+        return spec if isinstance(spec, str) else spec._llm_type
+
+    def _build_subagent(self, agent: str, factory):
+        from deadline import DeadlineMiddleware
+
+        # Outermost, so a hedged duplicate is scheduled like any other call
+        middleware = [DeadlineMiddleware(agent, self.hedging)]
+        if self.scheduler is not None:
+            from scheduler import SchedulerMiddleware
+            middleware.append(SchedulerMiddleware(self.scheduler))
+
+        if self.tiering is not None:
+            from tiering import TieringMiddleware
+
+            cached = agent not in self.uncached_agents
+            models = {tier.name: self._model(tier.model, cached) for tier in self.tiering.tiers}
+            middleware.append(TieringMiddleware(self.tiering, models))
+
+        return factory(self.model_for(agent), middleware=middleware)
+
+    def __getitem__(self, key: str):
+        if key == "model_name":
+            return self.model_name_for("supervisor")
+        if key == "model":
+            return self.model_for("supervisor")
+        if key not in SUBAGENT_FACTORIES:
+            raise KeyError(key)
+
+        agent, factory = SUBAGENT_FACTORIES[key]
+        return self._get(key, lambda: self._build_subagent(agent, factory))
+
+    def __iter__(self):
+        return iter(("model_name", "model", *SUBAGENT_FACTORIES))
+
+    def __len__(self):
+        return 2 + len(SUBAGENT_FACTORIES)
+
+    def prewarm(self, agents=None):
+        """Build the model and the given subagents (default: all) now rather than on first use"""
+        self["model"]
+        for key in agents or SUBAGENT_FACTORIES:
+            self[key]
+
+    def built(self) -> list:
+        """Subagents compiled so far"""
+        return [key for key in SUBAGENT_FACTORIES if key in self._built]
+
+class AgentRegistry:
+    """Agent sets by configuration, safe to use from any thread.
+
+    Every supervisor, plan-and-execute agent and session asking for the same
+    models, LLM cache, uncached agents, tiering, scheduler and hedging policies
+    gets the same AgentSet, so a process can serve several model
+    configurations (or tenants, each with a registry of its own) without
+    building anything twice. Sets for chat model
+    instances (fakes, cassettes) carry per-run state and aren't shared.
+    """
 
-    """Initialize the model and all subagents"""
-    model = init_chat_model(model_name)
+    def __init__(self):
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def get(
+            self,
+            model_name: "str | BaseChatModel" = "openai:gpt-4o-mini",
+            llm_cache: "BaseCache | None" = None,
+            uncached_agents: tuple = (),
+            agent_models: dict | None = None,
+            tiering: "TieringPolicy | None" = None,
+            scheduler: "ModelCallScheduler | None" = None,
+            hedging: "HedgePolicy | None" = None
+        ) -> AgentSet:
+        """The agent set for a configuration, created (unbuilt) on first request"""
+        agent_models = agent_models or {}
+        config = (model_name, llm_cache, uncached_agents, agent_models, tiering, scheduler, hedging)
+        if not all(isinstance(spec, str) for spec in (model_name, *agent_models.values())):
+            return AgentSet(*config)
+
+        key = (model_name, id(llm_cache), tuple(uncached_agents), tuple(sorted(agent_models.items())),
+               id(tiering), id(scheduler), id(hedging))
+        with self._lock:
+            if key not in self._sets:
+                # The set references the objects keyed by id, so their ids aren't reused while the key exists
+                self._sets[key] = AgentSet(*config)
+            return self._sets[key]
+
+    def configurations(self) -> list:
+        """Model names of the registered sets, with how many subagents each has built"""
+        with self._lock:
+            sets = list(self._sets.values())
+        return [{"model_name": agents["model_name"], "built": len(agents.built())} for agents in sets]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sets)
+
+# Registry used when none is passed
+default_registry = AgentRegistry()
+
+def initialize_agents(
+        model_name: "str | BaseChatModel" = "openai:gpt-4o-mini",
+        llm_cache: "BaseCache | None" = None,
+        uncached_agents: tuple = (),
+        registry: AgentRegistry | None = None,
+        agent_models: dict | None = None,
+        tiering: "TieringPolicy | None" = None,
+        scheduler: "ModelCallScheduler | None" = None,
+        hedging: "HedgePolicy | None" = None
+    ) -> AgentSet:
+    """Get the model and subagents for a configuration
+
+    Nothing is built here: each subagent is compiled the first time it is
+    used (or by prewarm()). Sets for a model name are shared by every caller
+    passing the same configuration.
 
-    return {
-        "model": model,
-        "flights_agent": create_flights_agent(model),
-        "hotels_agent": create_hotels_agent(model),
-        "activities_agent": create_activities_agent(model),
-        "itinerary_agent": create_itinerary_agent(model),
-    }
+    Args:
+        model_name: The model to use for the supervisor and every subagent,
+            as a "provider:model" name or a chat model instance (e.g. the
+            scripted fake model in benchmarks.fake_model)
+        llm_cache: Response cache shared by every agent's model (optional)
+        uncached_agents: Agents that always call the provider, out of
+            "supervisor", "flights", "hotels", "activities" and "itinerary"
+        registry: Registry to get the set from (default: default_registry)
+        agent_models: Models for individual agents, out of "supervisor",
+            "flights", "hotels", "activities" and "itinerary" (the others use
+            model_name), e.g. tiering.tiered_models(strong, fast)
+        tiering: A tiering.TieringPolicy choosing each subagent model call's
+            tier from its complexity and the tiers' latency (optional)
+        scheduler: A scheduler.ModelCallScheduler rate limiting and queuing
+            every subagent model call (optional)
+        hedging: A deadline.HedgePolicy sending a duplicate of subagent model
+            calls slower than its latency percentile (optional)
+    """
+    registry = registry if registry is not None else default_registry
+    return registry.get(model_name, llm_cache, uncached_agents, agent_models, tiering, scheduler, hedging)
 
-def get_agents():
-    """Get or initialize agents"""
+def get_agents() -> AgentSet:
+    """The agents of the most recent supervisor (the default model's if none was created yet)"""
     global _agents
     if _agents is None:
+        # The registry hands every racing caller the same set
         _agents = initialize_agents()
 
     return _agents
 
-# Wrap Each SubAgent in a Tool
+def prewarm(
+        model_name: "str | BaseChatModel" = "openai:gpt-4o-mini",
+        llm_cache: "BaseCache | None" = None,
+        uncached_agents: tuple = (),
+        background: bool = False,
+        registry: AgentRegistry | None = None
+    ) -> AgentSet | threading.Thread:
+    """Import LangChain and compile every subagent ahead of the first request.
 
-@tool
-def search_flights(request: str) -> str:
-    """Search for flights to a destination.
-    
-    Use this when the user needs to find flights. Pass the full context including:
-    - Destination city
-    - Travel dates (if mentioned)
-    - Budget constraints (if mentioned)
-    - Preferences (direct flights, specific airlines, etc.)
-    
-    Example: "Find flights to Tokyo, budget around $800, prefer direct flights"
+    Servers call this at startup; calling it before forking worker processes
+    lets the workers share the compiled graphs.
+
+    Args:
+        model_name, llm_cache, uncached_agents, registry: As for initialize_agents
+        background: Build on a daemon thread and return it instead of blocking
+
+    Returns:
+        The prewarmed agent set, or the thread building it
     """
+    agents = initialize_agents(model_name, llm_cache, uncached_agents, registry)
+    if background:
+        thread = threading.Thread(target=agents.prewarm, name="prewarm-agents", daemon=True)
+        thread.start()
+        return thread
 
-    agents = get_agents()
+    agents.prewarm()
+    return agents
 
-    result = agents["flights_agent"].invoke({
-        "messages": [{"role": "user", "content": request}]
-    })
+def _run_subagent(agents: AgentSet, slots: threading.BoundedSemaphore, agent_key: str,
+                  request: str) -> tuple[str, bool]:
+    """Invoke a subagent with a free-text request and return its final answer.
 
-    return result["messages"][-1].text
+    Independent tool calls from one supervisor turn are executed concurrently
+    by the tool node, so this only waits for a free slot before invoking.
+    Progress (start, domain tool calls, end) is emitted to the caller's
+    stream as it happens.
 
-@tool
-def search_hotels(request: str) -> str:
-    """Search for hotels and accommodations.
-    
-    Use this when the user needs to find places to stay. Pass the full context including:
-    - Destination city
-    - Traveler type (solo, couple, family, etc.)
-    - Budget per night (if mentioned)
-    - Preferences (amenities, location, etc.)
-    
-    Example: "Find family-friendly hotels in Tokyo, budget $200/night, need pool"
+    Returns:
+        The answer, and whether it may be cached: a partial answer given at
+        the request deadline, or no answer at all, may not
     """
-    agents = get_agents()
-    result = agents["hotels_agent"].invoke({
-        "messages": [{"role": "user", "content": request}]
-    })
-    return result["messages"][-1].text
-
-@tool
-def search_activities(request: str) -> str:
-    """Search for things to do, attractions, and restaurants.
-    
-    Use this when the user wants to discover activities, experiences, or dining options. 
-    Pass the full context including:
-    - Destination city
-    - Interests (culture, food, nature, adventure, etc.)
-    - Trip style (relaxed, packed, foodie, etc.)
-    - Any specific requests
-    
-    Example: "Find cultural activities and good sushi restaurants in Tokyo"
+    with slots:
+        start = time.perf_counter()
+        emit({"type": "subagent_start", "agent": agent_key, "request": request})
+
+        answer = None
+        for update in agents[agent_key].stream(
+            {"messages": [{"role": "user", "content": request}]},
+            config={"run_name": agent_key, "tags": [agent_key]},
+            stream_mode="updates",
+        ):
+            for message in update.get("model", {}).get("messages", []):
+                for tool_call in message.tool_calls:
+                    emit({"type": "subagent_tool", "agent": agent_key,
+                          "tool": tool_call["name"], "args": tool_call["args"]})
+                answer = message
+
+        emit({"type": "subagent_end", "agent": agent_key, "elapsed_s": time.perf_counter() - start})
+
+    if answer is None:
+        # The subagent's run ended without a model turn (e.g. it was interrupted)
+        return f"The {agent_key} returned no answer. Try the request again or rephrase it.", False
+    return answer.text, not answer.response_metadata.get("deadline_exceeded")
+
+def get_result_cache() -> ResultCache | None:
+    """The most recent supervisor's subagent result cache, or None if caching is disabled"""
+    return _result_cache
+
+def get_history_middleware() -> "HistoryCompactionMiddleware | None":
+    """The most recent supervisor's history compaction stage, or None if disabled"""
+    return _history
+
+def _cached(result_cache: ResultCache | None, model_name: str, domain: str, request: str, run, **slots) -> str:
+    """Return a cached result for a normalized request, or run() and cache it.
+
+    run() returns the result and whether it may be cached.
     """
-    agents = get_agents()
-    result = agents["activities_agent"].invoke({
-        "messages": [{"role": "user", "content": request}]
-    })
-    return result["messages"][-1].text
-
-@tool
-def create_itinerary(request: str) -> str:
-    """Create and organize a trip itinerary.
-    
-    Use this to organize flights, hotels, and activities into a cohesive plan.
-    Pass the full context including:
-    - All selected components (flight, hotel, activities)
-    - Number of days
-    - Trip pace preference (relaxed, moderate, packed)
-    - Any scheduling preferences
-    
-    Example: "Create a 5-day Tokyo itinerary with the selected hotel and activities"
+    if result_cache is None:
+        return run()[0]
+
+    from deadline import remaining
+
+    def run_once():
+        value, cacheable = run()
+        # Anything that finished at the deadline may be cut short; it's only good for this request
+        return value, cacheable and remaining() != 0.0
+
+    key = normalize_request(domain, request, model_name, **slots)
+    if key is not None:
+        # Pretty and compact tool output shouldn't be served for one another, nor
+        # a domain tool's direct output (the tools run it when given a destination)
+        # for a subagent's summary
+        key += (get_output_mode(), "tool" if slots.get("destination") else "agent")
+    return result_cache.get_or_run(key, run_once)
+
+def _run_domain_tool(domain_tool, **kwargs) -> str:
+    """Call a subagent's domain tool directly, skipping the subagent LLM.
+
+    Used when the supervisor already supplied structured arguments, so there
+    is nothing left for the subagent model to extract.
     """
-    agents = get_agents()
-    result = agents["itinerary_agent"].invoke({
-        "messages": [{"role": "user", "content": request}]
-    })
-    return result["messages"][-1].text
+    return domain_tool.invoke({k: v for k, v in kwargs.items() if v is not None})
+
+# Wrap Each SubAgent in a Tool
+
+def create_supervisor_tools(
+        agents: AgentSet,
+        max_concurrency: int = 3,
+        result_cache: ResultCache | None = None
+    ) -> list:
+    """The supervisor's four tools, bound to one agent set
+
+    Each supervisor gets tools of its own, so supervisors with different
+    models in one process never run each other's subagents.
+
+    Args:
+        agents: Subagents the tools delegate to
+        max_concurrency: Maximum number of subagents running at once
+        result_cache: Cache for subagent results (None = disabled)
+    """
+    # Bounds how many subagents may run at once when the supervisor fans out
+    # several tool calls in a single turn
+    subagent_slots = threading.BoundedSemaphore(max_concurrency)
+
+    def run_subagent(agent_key: str, request: str) -> tuple[str, bool]:
+        return _run_subagent(agents, subagent_slots, agent_key, request)
+
+    def cached(domain: str, request: str, run, **slots) -> str:
+        return _cached(result_cache, agents.model_name_for(domain), domain, request, run, **slots)
+
+
+    @tool
+    def search_flights(
+        request: str,
+        destination: str | None = None,
+        budget_max: int | None = None,
+        preferred_stops: str | None = None
+    ) -> str:
+        """Search for flights to a destination.
+
+        Use this when the user needs to find flights. Pass the full context including:
+        - Destination city
+        - Travel dates (if mentioned)
+        - Budget constraints (if mentioned)
+        - Preferences (direct flights, specific airlines, etc.)
+
+        Example: "Find flights to Tokyo, budget around $800, prefer direct flights"
+
+        If the request is fully described by a destination, a maximum price per person
+        in USD (budget_max) and a stops preference ("direct", "one-stop" or "any"),
+        also pass those as arguments to get results faster. Leave them empty when
+        the request has other preferences (airlines, times, comparisons).
+        """
+        def run():
+            if destination:
+                return _run_domain_tool(
+                    flights.search_flights,
+                    destination=destination,
+                    budget_max=budget_max,
+                    preferred_stops=preferred_stops,
+                ), True
+            return run_subagent("flights_agent", request)
+
+        return cached("flights", request, run, destination=destination, budget=budget_max, stops=preferred_stops)
+
+    @tool
+    def search_hotels(
+        request: str,
+        destination: str | None = None,
+        budget_per_night: int | None = None,
+        traveler_type: str | None = None
+    ) -> str:
+        """Search for hotels and accommodations.
+
+        Use this when the user needs to find places to stay. Pass the full context including:
+        - Destination city
+        - Traveler type (solo, couple, family, etc.)
+        - Budget per night (if mentioned)
+        - Preferences (amenities, location, etc.)
+
+        Example: "Find family-friendly hotels in Tokyo, budget $200/night, need pool"
+
+        If the request is fully described by a destination, a budget_per_night in USD
+        and a traveler_type ("solo", "couples", "families", "luxury", "budget"),
+        also pass those as arguments to get results faster. Leave them empty when
+        the request has other preferences (amenities, neighborhoods).
+        """
+        def run():
+            if destination:
+                return _run_domain_tool(
+                    hotels.search_hotels,
+                    destination=destination,
+                    budget_per_night=budget_per_night,
+                    traveler_type=traveler_type,
+                ), True
+            return run_subagent("hotels_agent", request)
+
+        return cached(
+            "hotels", request, run,
+            destination=destination, budget=budget_per_night, traveler_type=traveler_type,
+        )
+
+    @tool
+    def search_activities(
+        request: str,
+        destination: str | None = None,
+        interests: list[str] | None = None,
+        budget_max: int | None = None,
+        cuisine: str | None = None,
+        price_range: str | None = None
+    ) -> str:
+        """Search for things to do, attractions, and restaurants.
+
+        Use this when the user wants to discover activities, experiences, or dining options. 
+        Pass the full context including:
+        - Destination city
+        - Interests (culture, food, nature, adventure, etc.)
+        - Trip style (relaxed, packed, foodie, etc.)
+        - Any specific requests
+
+        Example: "Find cultural activities and good sushi restaurants in Tokyo"
+
+        If the request is fully described by a destination, a list of interests and
+        a budget_max per activity in USD, also pass those as arguments to get results
+        faster. Add cuisine (e.g. "Sushi") and/or price_range ("$" to "$$$$") to
+        include matching restaurants. Leave them empty for open-ended requests
+        (trip styles, curated picks).
+        """
+        def run():
+            if destination:
+                result = _run_domain_tool(
+                    activities.search_activities,
+                    destination=destination,
+                    interests=interests,
+                    budget_max=budget_max,
+                )
+                if cuisine or price_range:
+                    result += "\n\n" + _run_domain_tool(
+                        activities.search_restaurants,
+                        destination=destination,
+                        cuisine=cuisine,
+                        price_range=price_range,
+                    )
+                return result, True
+            return run_subagent("activities_agent", request)
+
+        return cached(
+            "activities", request, run,
+            destination=destination, interests=interests, budget=budget_max,
+            cuisine=cuisine, price_range=price_range,
+        )
+
+    @tool
+    def create_itinerary(
+        request: str,
+        destination: str | None = None,
+        num_days: int | None = None,
+        flight_info: str | None = None,
+        hotel_info: str | None = None,
+        activities_info: str | None = None,
+        total_budget: int | None = None
+    ) -> str:
+        """Create and organize a trip itinerary.
+
+        Use this to organize flights, hotels, and activities into a cohesive plan.
+        Pass the full context including:
+        - All selected components (flight, hotel, activities)
+        - Number of days
+        - Trip pace preference (relaxed, moderate, packed)
+        - Any scheduling preferences
+
+        Example: "Create a 5-day Tokyo itinerary with the selected hotel and activities"
+
+        If only a trip summary is needed and you already know the destination,
+        num_days and the selected flight_info, hotel_info and activities_info, also
+        pass those (and total_budget if known) as arguments to get it faster.
+        Leave them empty when a day-by-day schedule or route planning is wanted.
+        """
+        if destination and num_days and flight_info and hotel_info and activities_info:
+            return _run_domain_tool(
+                itinerary.generate_trip_summary,
+                destination=destination,
+                num_days=num_days,
+                flight_info=flight_info,
+                hotel_info=hotel_info,
+                activities_info=activities_info,
+                total_budget=total_budget,
+            )
+
+        answer, _ = run_subagent("itinerary_agent", request)
+        return answer
+
+    return [search_flights, search_hotels, search_activities, create_itinerary]
 
 
 SUPERVISOR_PROMPT = """You are a professional travel planning assistant. Your job is to help users plan their perfect trip by coordinating specialized travel experts.
@@ -137,10 +579,13 @@ WORKFLOW GUIDELINES:
 
 For a complete trip planning request:
 1. First, understand the user's needs (destination, dates, travelers, budget, interests)
-2. Search for flights to get travel options
-3. Search for hotels matching their traveler type and budget
-4. Search for activities based on their interests
-5. Create an itinerary to organize everything
+2. Search for flights, hotels and activities at the same time - they don't depend on each other,
+   so call search_flights, search_hotels and search_activities together in a single step
+3. Create an itinerary to organize everything once those results are back
+
+When you already know the structured details (destination, budget, stops, traveler type,
+interests), pass them as tool arguments as well as in the request - the specialist can then
+answer directly. Leave them empty for open-ended or ambiguous requests.
 
 For partial requests (e.g., "just find hotels"):
 - Only call the relevant specialist
@@ -166,28 +611,109 @@ Add value by making thoughtful recommendations based on the user's specific situ
 
 
 def create_supervisor_agent(
-        model_name: str = "openai:gpt-4o-mini",
-        use_memory: bool = True
+        model_name: "str | BaseChatModel" = "openai:gpt-4o-mini",
+        use_memory: bool = True,
+        max_concurrency: int = 3,
+        cache_results: bool = True,
+        llm_cache: "BaseCache | None" = None,
+        uncached_agents: tuple = (),
+        checkpointer: "BaseCheckpointSaver | None" = None,
+        history_budget: int | None = 3000,
+        instrumentation: Instrumentation | None = None,
+        registry: AgentRegistry | None = None,
+        agent_models: dict | None = None,
+        tiering: "TieringPolicy | None" = None,
+        scheduler: "ModelCallScheduler | None" = None,
+        hedging: "HedgePolicy | None" = None
     ):
     """Create and return the supervisor agent.
     
     Args:
-        model_name: The model to use for the supervisor
+        model_name: The model to use for the supervisor, as a "provider:model"
+            name or a chat model instance
         use_memory: Whether to enable conversation memory (checkpointing)
+        max_concurrency: Maximum number of subagents run in parallel when the
+            supervisor requests several of them in one turn (1 = sequential)
+        cache_results: Whether to reuse recent flight, hotel and activity
+            results for equivalent requests (shared across sessions)
+        llm_cache: Model response cache shared by the supervisor and all
+            subagents, e.g. llm_cache.TieredLLMCache (optional)
+        uncached_agents: Agents that bypass llm_cache, out of "supervisor",
+            "flights", "hotels", "activities" and "itinerary"
+        checkpointer: Where conversation memory is kept, e.g. a
+            checkpointer.CompactSqliteSaver (defaults to in-process memory)
+        history_budget: Approximate token budget for the conversation history
+            sent to the supervisor model; older tool results are summarized and
+            old turns folded into a digest to stay under it (None = send it all)
+        instrumentation: Records spans, metrics and traces of every run,
+            including subagent and tool calls (optional)
+        registry: Where the model and subagents for this configuration are
+            kept and shared (default: default_registry)
+        agent_models: Models for individual agents ("supervisor", "flights",
+            "hotels", "activities", "itinerary"); the others use model_name
+        tiering: A tiering.TieringPolicy picking the model of each subagent
+            model call (optional); it takes precedence over agent_models for
+            the subagents, and the supervisor keeps its own model
+        scheduler: A scheduler.ModelCallScheduler shared by every agent (and
+            session) that rate limits, bounds and fairly queues model calls
+            (optional)
+        hedging: A deadline.HedgePolicy duplicating model calls slower than
+            its latency percentile, for every agent (optional)
+
+    Model calls are bounded by the deadline of the request, if the caller
+    set one with deadline.deadline(); an agent out of time answers with the
+    results it has so far.
     
     Returns:
         Configured supervisor agent
     """
 
-    global _agents
-    _agents = initialize_agents(model_name)
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    from langchain.agents import create_agent
+    from langgraph.checkpoint.memory import InMemorySaver
+
+    from deadline import DeadlineMiddleware
+    from history import HistoryCompactionMiddleware
+    from scheduler import SchedulerMiddleware
+
+    global _agents, _result_cache, _history
+    agents = initialize_agents(model_name, llm_cache, uncached_agents, registry, agent_models, tiering, scheduler,
+                               hedging)
+    result_cache = (_result_cache or ResultCache()) if cache_results else None
+    history = HistoryCompactionMiddleware(max_tokens=history_budget) if history_budget else None
+    _agents, _result_cache, _history = agents, result_cache, history
 
     supervisor = create_agent(
-        _agents["model"],
-        tools=[search_flights, search_hotels, search_activities, create_itinerary],
+        agents["model"],
+        tools=create_supervisor_tools(agents, max_concurrency, result_cache),
         system_prompt=SUPERVISOR_PROMPT,
-        checkpointer = InMemorySaver() if use_memory else None
+        middleware=[
+            m for m in (history, DeadlineMiddleware("supervisor", hedging),
+                        SchedulerMiddleware(scheduler) if scheduler else None) if m
+        ],
+        checkpointer = (checkpointer or InMemorySaver()) if use_memory else None
     )
 
-    return supervisor
+    # Size the tool node's thread pool so fanned-out subagent calls run together
+    config = {"max_concurrency": max_concurrency}
+    if instrumentation is not None:
+        # Subagent and tool runs inherit the callback from the supervisor run
+        config["callbacks"] = [instrumentation]
+        if result_cache is not None:
+            instrumentation.register_stats("result_cache", result_cache.stats)
+        if history is not None:
+            instrumentation.register_stats("history", history.stats)
+        if llm_cache is not None and hasattr(llm_cache, "stats"):
+            instrumentation.register_stats("llm_cache", llm_cache.stats)
+        if tiering is not None:
+            instrumentation.register_stats("tiering", tiering.stats)
+        if scheduler is not None:
+            instrumentation.register_stats("scheduler", scheduler.stats)
+        if hedging is not None:
+            instrumentation.register_stats("hedging", hedging.stats)
+
+    return supervisor.with_config(config)
+
 
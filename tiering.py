@@ -0,0 +1,220 @@
+"""
+Model Tiering
+
+Most subagent model calls are argument extraction ("find flights to Tokyo
+under $800" -> search_flights(destination="Tokyo", budget_max=800)) and
+short summaries of tool output, which a small fast model does as well as a
+large one. Tiering sends those calls to a cheaper tier and keeps the large
+model for the supervisor, which plans and writes the final answer.
+
+Two levels of control:
+
+- per-agent models: create_supervisor_agent(agent_models={...}) gives each of
+  "supervisor", "flights", "hotels", "activities" and "itinerary" a model of
+  its own (see tiered_models for the usual split)
+- a TieringPolicy: each subagent model call goes to the first tier able to
+  handle the request's estimated complexity. If that tier's recent latency
+  is over the latency budget, it goes to the fastest able tier instead.
+  A tier left alone that way still gets one probe call per probe interval,
+  so it's moved back once it recovers.
+
+Complexity is a deterministic score in [0, 1] from the request's length,
+the constraints it states (prices, durations, stops), words asking for
+reasoning (compare, recommend, schedule...) and the amount of tool output
+the model has to read. No model calls are made to score a request.
+
+Usage:
+    policy = TieringPolicy([
+        Tier("fast", "openai:gpt-4.1-nano", max_complexity=0.5),
+        Tier("strong", "openai:gpt-4o-mini"),
+    ], latency_budget_s=2.0)
+    agent = create_supervisor_agent("openai:gpt-4o-mini", tiering=policy)
+
+main.py and server.py take --fast-model (a two-tier policy with the main
+model as the strong tier) and --agent-model AGENT=MODEL.
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, ToolMessage
+
+
+AGENT_NAMES = ("supervisor", "flights", "hotels", "activities", "itinerary")
+
+CONSTRAINT_PATTERN = re.compile(
+    r"\$\s?\d|\b\d+[\s-]*(?:days?|nights?|stars?|stops?|people|adults?|kids?|children|hours?)\b",
+    re.IGNORECASE,
+)
+
+REASONING_WORDS = {
+    "compare", "comparison", "versus", "vs", "between", "tradeoff", "tradeoffs", "trade-off",
+    "best", "recommend", "recommendation", "recommendations", "why", "explain", "balance",
+    "optimize", "schedule", "itinerary", "route", "plan", "prioritize",
+}
+
+
+def estimate_complexity(messages: list) -> float:
+    """How demanding a model call is, from 0 (trivial extraction) to 1"""
+    turn_start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=None)
+    if turn_start is None:
+        return 1.0
+
+    request = messages[turn_start].text
+    words = re.findall(r"[\w$'-]+", request.lower())
+    tool_chars = sum(len(m.text) for m in messages[turn_start:] if isinstance(m, ToolMessage))
+
+    score = min(len(words) / 80, 1.0) * 0.35
+    score += min(len(CONSTRAINT_PATTERN.findall(request)) * 0.1, 0.3)
+    score += min(len(REASONING_WORDS.intersection(words)) * 0.1, 0.3)
+    # Summarizing long tool output needs more than extracting arguments
+    score += min(tool_chars / 8000, 0.2)
+    return min(score, 1.0)
+
+
+@dataclass
+class Tier:
+    """A model tier: calls up to max_complexity may be sent to it"""
+    name: str
+    model: str | BaseChatModel
+    max_complexity: float = 1.0
+
+
+class TieringPolicy:
+    """Pick a tier per model call from request complexity and measured latency.
+
+    Args:
+        tiers: Tiers from cheapest to most capable; the last one takes any
+            request no other tier can
+        latency_budget_s: Move a call off a tier whose recent latency is over
+            this many seconds, to the fastest tier able to handle it (None =
+            ignore latency)
+        smoothing: Weight of the newest call in each tier's latency average
+        probe_interval_s: A tier over the latency budget gets one call this
+            often anyway, to measure whether it has recovered
+    """
+
+    def __init__(self, tiers: list, latency_budget_s: float | None = None, smoothing: float = 0.3,
+                 probe_interval_s: float = 30.0):
+        if not tiers:
+            raise ValueError("A tiering policy needs at least one tier")
+        if len({tier.name for tier in tiers}) != len(tiers):
+            raise ValueError("Tier names must be unique")
+        self.tiers = list(tiers)
+        self.latency_budget_s = latency_budget_s
+        self.smoothing = smoothing
+        self.probe_interval_s = probe_interval_s
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._sampled_at = {}  # tier -> time.monotonic() of its last sample
+        self._probed_at = {}  # tier -> time.monotonic() of its last probe
+        self._calls = {tier.name: 0 for tier in self.tiers}
+        self._complexity_total = 0.0
+        self._rerouted = 0
+        self._probes = 0
+
+    def choose(self, messages: list) -> Tier:
+        """The tier for a model call on these messages"""
+        complexity = estimate_complexity(messages)
+        able = [tier for tier in self.tiers if complexity <= tier.max_complexity] or self.tiers[-1:]
+
+        with self._lock:
+            tier = able[0]
+            if self.latency_budget_s is not None and self._latency.get(tier.name, 0.0) > self.latency_budget_s:
+                # Unmeasured tiers count as fast, so they get tried
+                fastest = min(able, key=lambda t: self._latency.get(t.name, 0.0))
+                now = time.monotonic()
+                last = max(self._sampled_at.get(tier.name, 0.0), self._probed_at.get(tier.name, 0.0))
+                if fastest is not tier and now - last >= self.probe_interval_s:
+                    # Rerouted calls never measure this tier; send it this one to find out if it recovered
+                    self._probed_at[tier.name] = now
+                    self._probes += 1
+                elif fastest is not tier:
+                    tier = fastest
+                    self._rerouted += 1
+            self._calls[tier.name] += 1
+            self._complexity_total += complexity
+        return tier
+
+    def observe(self, tier: str, seconds: float):
+        """Record how long a call on a tier took"""
+        with self._lock:
+            now = time.monotonic()
+            previous = self._latency.get(tier)
+            # An average older than the probe interval says little about the tier now
+            stale = now - self._sampled_at.get(tier, now) >= self.probe_interval_s
+            self._latency[tier] = seconds if previous is None or stale else (
+                self.smoothing * seconds + (1 - self.smoothing) * previous)
+            self._sampled_at[tier] = now
+
+    def stats(self) -> dict:
+        """Calls and smoothed latency per tier, mean complexity, latency reroutes and probes"""
+        with self._lock:
+            calls = sum(self._calls.values())
+            stats = {
+                "calls": calls,
+                "avg_complexity": self._complexity_total / calls if calls else 0.0,
+                "rerouted": self._rerouted,
+                "probes": self._probes,
+            }
+            for tier in self.tiers:
+                stats[f"{tier.name}_calls"] = self._calls[tier.name]
+                if tier.name in self._latency:
+                    stats[f"{tier.name}_latency_s"] = self._latency[tier.name]
+            return stats
+
+
+class TieringMiddleware(AgentMiddleware):
+    """Sends each of an agent's model calls to the tier its policy picks.
+
+    Args:
+        policy: Picks the tier and collects latencies
+        models: Tier name -> chat model
+    """
+
+    def __init__(self, policy: TieringPolicy, models: dict):
+        super().__init__()
+        self.policy = policy
+        self.models = models
+
+    def wrap_model_call(self, request, handler):
+        tier = self.policy.choose(request.messages)
+        start = time.perf_counter()
+        try:
+            return handler(request.override(model=self.models[tier.name]))
+        finally:
+            self.policy.observe(tier.name, time.perf_counter() - start)
+
+    async def awrap_model_call(self, request, handler):
+        tier = self.policy.choose(request.messages)
+        start = time.perf_counter()
+        try:
+            return await handler(request.override(model=self.models[tier.name]))
+        finally:
+            self.policy.observe(tier.name, time.perf_counter() - start)
+
+
+def two_tier_policy(strong: str | BaseChatModel, fast: str | BaseChatModel, max_complexity: float = 0.5,
+                    latency_budget_s: float | None = None) -> TieringPolicy:
+    """A policy sending calls up to max_complexity to the fast model and the rest to the strong one"""
+    return TieringPolicy([Tier("fast", fast, max_complexity), Tier("strong", strong)], latency_budget_s)
+
+
+def tiered_models(strong: str | BaseChatModel, fast: str | BaseChatModel) -> dict:
+    """agent_models keeping the strong model for the supervisor and giving every subagent the fast one"""
+    return {agent: strong if agent == "supervisor" else fast for agent in AGENT_NAMES}
+
+
+def parse_agent_models(spec: str) -> dict:
+    """agent_models from "flights=openai:gpt-4.1-nano,hotels=openai:gpt-4.1-nano" """
+    models = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        agent, sep, model = item.partition("=")
+        if not sep or agent.strip() not in AGENT_NAMES or not model.strip():
+            raise ValueError(f"Expected AGENT=MODEL with AGENT one of {AGENT_NAMES}, not {item!r}")
+        models[agent.strip()] = model.strip()
+    return models
@@ -0,0 +1,247 @@
+"""
+Columnar Inventory
+
+NumPy column store for flight and hotel inventory. Numeric attributes live in
+contiguous arrays and set-valued attributes (traveler types, amenities) in
+bitmask columns, so filter, sort and top-k run as vectorized operations
+instead of per-row dict access. A bitmask column is one uint64 per row for up
+to 64 distinct values, and a (rows, words) array of them beyond that.
+
+Rows keep their original order: filters return ascending row positions and
+top-k breaks ties by position, matching a stable sort over the row list.
+"""
+
+import re
+
+import numpy as np
+
+
+DURATION_PATTERN = re.compile(r"(?:(\d+)h)?\s*(?:(\d+)m)?")
+
+# Bitmask columns are stored as uint64 words, one bit per distinct value
+MASK_BITS = 64
+_WORD = (1 << MASK_BITS) - 1
+
+# Nightly prices are clamped to this in value scores, so a free room can't divide by zero
+MIN_SCORED_PRICE = 1.0
+
+
+def parse_duration_minutes(duration: str) -> int:
+    """Convert a duration like "12h 15m" to minutes"""
+    match = DURATION_PATTERN.match(duration.strip())
+    hours, minutes = match.groups() if match else (None, None)
+    return int(hours or 0) * 60 + int(minutes or 0)
+
+
+def build_vocabulary(values_per_row) -> dict:
+    """Assign a bit to every distinct (lowercased) value"""
+    vocabulary = {}
+    for values in values_per_row:
+        for value in values:
+            vocabulary.setdefault(value.lower(), len(vocabulary))
+    return vocabulary
+
+
+def pack_masks(masks: list, bits: int) -> np.ndarray:
+    """Python int bitmasks as a uint64 column: shape (n,) for up to 64 bits, (n, words) beyond"""
+    words = max(1, -(-bits // MASK_BITS))
+    if words == 1:
+        return np.array(masks, dtype=np.uint64)
+    return np.array(
+        [[(mask >> (MASK_BITS * word)) & _WORD for word in range(words)] for mask in masks],
+        dtype=np.uint64,
+    ).reshape(len(masks), words)
+
+
+def encode_masks(values_per_row, vocabulary: dict) -> np.ndarray:
+    """Encode each row's set of values as a bitmask column (see pack_masks)"""
+    masks = []
+    for values in values_per_row:
+        mask = 0
+        for value in values:
+            mask |= 1 << vocabulary[value.lower()]
+        masks.append(mask)
+    return pack_masks(masks, len(vocabulary))
+
+
+def value_scores(rating: np.ndarray, price: np.ndarray) -> np.ndarray:
+    """Rating per $100 of nightly price"""
+    return rating / (np.maximum(price, MIN_SCORED_PRICE) / 100)
+
+
+def top_k(values: np.ndarray, positions: np.ndarray, k: int, descending: bool = False) -> np.ndarray:
+    """Positions of the k best rows by value, ties broken by position.
+
+    Uses a partial partition to find the cut-off value, then sorts only the
+    rows on the winning side of it.
+    """
+    if k <= 0 or len(positions) == 0:
+        return positions[:0]
+
+    keys = values[positions]
+    if descending:
+        keys = -keys
+
+    if k < len(keys):
+        cutoff = np.partition(keys, k - 1)[k - 1]
+        candidates = np.flatnonzero(keys <= cutoff)
+    else:
+        candidates = np.arange(len(keys))
+
+    order = np.lexsort((positions[candidates], keys[candidates]))[:k]
+    return positions[candidates[order]]
+
+
+class FlightTable:
+    """Column store over one destination's flights"""
+
+    def __init__(self, rows, price, stops, duration_minutes):
+        self.rows = rows
+        self.price = price
+        self.stops = stops
+        self.duration_minutes = duration_minutes
+
+    @classmethod
+    def from_records(cls, rows) -> "FlightTable":
+        """Build the columns from a list of flight dicts"""
+        return cls(
+            rows,
+            price=np.fromiter((r["price"] for r in rows), dtype=np.float64, count=len(rows)),
+            stops=np.fromiter((r["stops"] for r in rows), dtype=np.int8, count=len(rows)),
+            duration_minutes=np.fromiter(
+                (parse_duration_minutes(r["duration"]) for r in rows), dtype=np.int32, count=len(rows)
+            ),
+        )
+
+    def __len__(self):
+        return len(self.price)
+
+    def filter(self, budget_max: int | None = None, stops: str | None = None) -> np.ndarray:
+        """Positions of flights within budget and matching the stops preference.
+
+        Args:
+            budget_max: Maximum price per person in USD (ignored if falsy)
+            stops: "direct", "one-stop" or "any"/None
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if budget_max:
+            mask &= self.price <= budget_max
+        if stops == "direct":
+            mask &= self.stops == 0
+        elif stops == "one-stop":
+            mask &= self.stops == 1
+        return np.flatnonzero(mask)
+
+    def top_k(self, positions: np.ndarray, by: str = "price", k: int = 1) -> np.ndarray:
+        """The k cheapest (by="price") or fastest (by="duration") of positions"""
+        column = self.price if by == "price" else self.duration_minutes
+        return top_k(column, positions, k)
+
+    def price_range(self, positions: np.ndarray) -> tuple:
+        """Lowest and highest price among positions, as the records state them"""
+        prices = self.price[positions]
+        return (self.rows[positions[prices.argmin()]]["price"],
+                self.rows[positions[prices.argmax()]]["price"])
+
+    def records(self, positions) -> list:
+        """The flight dicts at positions"""
+        return [self.rows[i] for i in positions]
+
+
+class HotelTable:
+    """Column store over one destination's hotels"""
+
+    def __init__(self, rows, price, rating, reviews, traveler_mask, amenity_mask,
+                 traveler_vocabulary, amenity_vocabulary, value_score=None):
+        self.rows = rows
+        self.price = price
+        self.rating = rating
+        self.reviews = reviews
+        self.traveler_mask = traveler_mask
+        self.amenity_mask = amenity_mask
+        self.traveler_vocabulary = traveler_vocabulary
+        self.amenity_vocabulary = amenity_vocabulary
+        self.value_score = value_scores(rating, price) if value_score is None else value_score
+
+    @classmethod
+    def from_records(cls, rows) -> "HotelTable":
+        """Build the columns from a list of hotel dicts"""
+        traveler_types = [r.get("traveler_type", []) for r in rows]
+        amenities = [r.get("amenities", []) for r in rows]
+        traveler_vocabulary = build_vocabulary(traveler_types)
+        amenity_vocabulary = build_vocabulary(amenities)
+
+        return cls(
+            rows,
+            price=np.fromiter((r["price_per_night"] for r in rows), dtype=np.float64, count=len(rows)),
+            rating=np.fromiter((r["rating"] for r in rows), dtype=np.float64, count=len(rows)),
+            reviews=np.fromiter((r["reviews"] for r in rows), dtype=np.int64, count=len(rows)),
+            traveler_mask=encode_masks(traveler_types, traveler_vocabulary),
+            amenity_mask=encode_masks(amenities, amenity_vocabulary),
+            traveler_vocabulary=traveler_vocabulary,
+            amenity_vocabulary=amenity_vocabulary,
+        )
+
+    def __len__(self):
+        return len(self.price)
+
+    def _has_all(self, masks: np.ndarray, vocabulary: dict, values) -> np.ndarray:
+        """Rows whose bitmask contains every one of values"""
+        wanted = 0
+        for value in values:
+            bit = vocabulary.get(value.lower())
+            if bit is None:
+                return np.zeros(len(masks), dtype=bool)
+            wanted |= 1 << bit
+
+        if masks.ndim == 1:
+            wanted = np.uint64(wanted)
+            return (masks & wanted) == wanted
+
+        matches = np.ones(len(masks), dtype=bool)
+        for word in range(masks.shape[1]):
+            part = np.uint64((wanted >> (MASK_BITS * word)) & _WORD)
+            if part:
+                matches &= (masks[:, word] & part) == part
+        return matches
+
+    def filter(
+        self,
+        budget_max: int | None = None,
+        traveler_type: str | None = None,
+        amenities: list | None = None
+    ) -> np.ndarray:
+        """Positions of hotels within budget that suit the traveler type and amenities.
+
+        Args:
+            budget_max: Maximum price per night in USD (ignored if falsy)
+            traveler_type: Traveler type the hotel must suit (optional)
+            amenities: Amenities the hotel must all have (optional)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if budget_max:
+            mask &= self.price <= budget_max
+        if traveler_type:
+            mask &= self._has_all(self.traveler_mask, self.traveler_vocabulary, [traveler_type])
+        if amenities:
+            mask &= self._has_all(self.amenity_mask, self.amenity_vocabulary, amenities)
+        return np.flatnonzero(mask)
+
+    def top_k(self, positions: np.ndarray, priority: str = "balanced", k: int = 1) -> np.ndarray:
+        """The k best of positions for a priority.
+
+        Args:
+            positions: Candidate row positions
+            priority: "price" (cheapest), "rating" (highest) or anything else
+                for balanced (rating per $100 of nightly price)
+            k: Number of positions to return
+        """
+        if priority == "price":
+            return top_k(self.price, positions, k)
+        if priority == "rating":
+            return top_k(self.rating, positions, k, descending=True)
+        return top_k(self.value_score, positions, k, descending=True)
+
+    def records(self, positions) -> list:
+        """The hotel dicts at positions"""
+        return [self.rows[i] for i in positions]
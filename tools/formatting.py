@@ -0,0 +1,112 @@
+"""
+Tool Output Formatting
+
+Domain tools can answer in one of two output modes:
+
+- "pretty" (default): the emoji-decorated, multi-line prose meant for people
+- "compact": a header naming short fields once, then one JSON array per
+  record with the best top_k records only, and no decoration
+
+Tool output is read by a subagent model and then, through the subagent's
+answer, by the supervisor, so compact records cut prompt tokens (and with
+them latency and cost) at every hop. The user still gets prose: the
+supervisor writes the final answer once, from the records.
+
+The mode is process-wide. Set TRAVEL_TOOL_OUTPUT=compact (and optionally
+TRAVEL_TOOL_TOP_K) or call set_output_mode(). Code that shows tool output
+to the user directly (the fast router) renders it inside pretty_output().
+"""
+
+import contextlib
+import json
+import os
+from contextvars import ContextVar
+
+
+OUTPUT_MODES = ("pretty", "compact")
+
+_mode = os.environ.get("TRAVEL_TOOL_OUTPUT", "pretty").lower()
+_top_k = int(os.environ.get("TRAVEL_TOOL_TOP_K", 5))
+
+if _mode not in OUTPUT_MODES:
+    raise ValueError(f"TRAVEL_TOOL_OUTPUT must be one of {OUTPUT_MODES}, not {_mode!r}")
+
+# Per-context override of the process-wide mode (see pretty_output)
+_mode_override = ContextVar("tool_output_mode", default=None)
+
+
+def set_output_mode(mode: str, top_k: int | None = None):
+    """Switch every domain tool to "pretty" or "compact" output.
+
+    Args:
+        mode: "pretty" or "compact"
+        top_k: Records kept per compact result (optional)
+    """
+    global _mode, _top_k
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"mode must be one of {OUTPUT_MODES}, not {mode!r}")
+    _mode = mode
+    if top_k is not None:
+        _top_k = top_k
+
+
+def get_output_mode() -> str:
+    """The output mode in effect for the current context"""
+    return _mode_override.get() or _mode
+
+
+def compact_output() -> bool:
+    """Whether tools should return compact records"""
+    return get_output_mode() == "compact"
+
+
+@contextlib.contextmanager
+def pretty_output():
+    """Render tool output for people inside the block, whatever the mode"""
+    token = _mode_override.set("pretty")
+    try:
+        yield
+    finally:
+        _mode_override.reset(token)
+
+
+def clip(text: str, limit: int = 80) -> str:
+    """text cut to at most limit characters, on a word boundary"""
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "…"
+
+
+def compact_records(kind: str, destination: str, records: list, fields: dict, sort_key=None) -> str:
+    """Render records as a header, a field list and one compact JSON array per record.
+
+    Args:
+        kind: What the records are, e.g. "flights"
+        destination: The destination searched
+        records: Records from tools.mock_data
+        fields: Output field name -> record key, or a function of the record
+        sort_key: Ranks records before the top_k are taken (optional)
+
+    Returns:
+        e.g. 'flights dest=Tokyo n=4', 'fields: no,airline,price' and
+        '["JL005","Japan Airlines",850]' lines
+    """
+    ranked = sorted(records, key=sort_key) if sort_key else records
+    shown = ranked[:_top_k]
+
+    header = f"{kind} dest={destination} n={len(records)}"
+    if len(records) > len(shown):
+        header += f" shown={len(shown)}"
+
+    lines = [header, "fields: " + ",".join(fields)]
+    for record in shown:
+        row = [source(record) if callable(source) else record.get(source) for source in fields.values()]
+        lines.append(json.dumps(row, ensure_ascii=False, separators=(",", ":")))
+
+    return "\n".join(lines)
+
+
+def compact_fields(**fields) -> str:
+    """One compact JSON object of the non-empty fields"""
+    return json.dumps({k: v for k, v in fields.items() if v not in (None, "")},
+                      ensure_ascii=False, separators=(",", ":"))
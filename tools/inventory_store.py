@@ -0,0 +1,367 @@
+"""
+Inventory Store
+
+A compact on-disk inventory format that is memory-mapped and loaded lazily,
+one destination partition at a time.
+
+Layout (<root> is a symlink to the current version, <root>.v<stamp>):
+
+    <root>/manifest.json                      destinations per kind
+    <root>/<kind>/<partition>/rows.jsonl      one JSON record per line
+    <root>/<kind>/<partition>/offsets.npy     byte offset of each line (n + 1)
+    <root>/<kind>/<partition>/<column>.npy    numeric / bitmask columns
+    <root>/<kind>/<partition>/vocabulary.json bit assignments of mask columns
+
+Columns are opened with np.load(mmap_mode="r") and rows.jsonl with mmap, so
+nothing is read until it is touched and every worker process on the machine
+shares the same page-cache pages - no per-process copies. Records are decoded
+one at a time on access.
+
+Usage:
+    python -m tools.inventory_store convert OUT_DIR
+    python -m tools.inventory_store generate OUT_DIR --flights 1000000 --hotels 100000
+"""
+
+import argparse
+import glob
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from collections.abc import Sequence
+
+import numpy as np
+
+from tools.columnar import FlightTable, HotelTable, pack_masks, parse_duration_minutes, value_scores
+
+
+KINDS = ("flights", "hotels", "activities", "restaurants")
+
+# Seconds a replaced version is kept after the swap. Partitions are opened
+# lazily, so an InventoryStore still reading a version must be reopened
+# within this long
+VERSION_GRACE_S = float(os.environ.get("TRAVEL_STORE_VERSION_GRACE", 3600))
+
+VERSION_PATTERN = re.compile(r"\.v(\d+)-\d+$")
+
+# Numeric columns written for each kind: name -> (dtype, value from record)
+COLUMNS = {
+    "flights": {
+        "price": (np.float64, lambda r: r["price"]),
+        "stops": (np.int8, lambda r: r["stops"]),
+        "duration_minutes": (np.int32, lambda r: parse_duration_minutes(r["duration"])),
+    },
+    "hotels": {
+        "price": (np.float64, lambda r: r["price_per_night"]),
+        "rating": (np.float64, lambda r: r["rating"]),
+        "reviews": (np.int64, lambda r: r["reviews"]),
+    },
+}
+
+# Bitmask columns written for each kind: name -> list field of the record
+MASK_COLUMNS = {
+    "hotels": {"traveler_mask": "traveler_type", "amenity_mask": "amenities"},
+}
+
+
+def partition_name(destination: str) -> str:
+    """File-system safe directory name for a destination"""
+    return re.sub(r"[^a-z0-9_-]+", "_", destination.lower()).strip("_") or "_"
+
+
+class RecordSequence(Sequence):
+    """Read-only sequence of records decoded lazily from a memory-mapped JSONL file"""
+
+    def __init__(self, path: str, offsets: np.ndarray):
+        self._offsets = offsets
+        self._file = open(path, "rb")
+        # mmap can't map an empty file
+        self._data = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if os.path.getsize(path) else b""
+        )
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+
+        return json.loads(self._data[self._offsets[index]:self._offsets[index + 1]])
+
+
+class _PartitionWriter:
+    """Streams records of one partition to disk, building its columns as it goes"""
+
+    def __init__(self, directory: str, kind: str):
+        self.directory = directory
+        self.kind = kind
+        self.offsets = [0]
+        self.values = {name: [] for name in COLUMNS.get(kind, {})}
+        self.masks = {name: [] for name in MASK_COLUMNS.get(kind, {})}
+        self.vocabulary = {name: {} for name in MASK_COLUMNS.get(kind, {})}
+        self._rows = open(os.path.join(directory, "rows.jsonl"), "wb")
+
+    def add(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+        self._rows.write(line)
+        self.offsets.append(self.offsets[-1] + len(line))
+
+        for name, (_, getter) in COLUMNS.get(self.kind, {}).items():
+            self.values[name].append(getter(record))
+
+        for name, field in MASK_COLUMNS.get(self.kind, {}).items():
+            vocabulary, mask = self.vocabulary[name], 0
+            for value in record.get(field, []):
+                mask |= 1 << vocabulary.setdefault(value.lower(), len(vocabulary))
+            self.masks[name].append(mask)
+
+    def close(self):
+        self._rows.close()
+        np.save(os.path.join(self.directory, "offsets.npy"), np.array(self.offsets, dtype=np.int64))
+
+        for name, (dtype, _) in COLUMNS.get(self.kind, {}).items():
+            np.save(os.path.join(self.directory, f"{name}.npy"), np.array(self.values[name], dtype=dtype))
+
+        for name, masks in self.masks.items():
+            np.save(os.path.join(self.directory, f"{name}.npy"), pack_masks(masks, len(self.vocabulary[name])))
+
+        if self.kind == "hotels":
+            price = np.array(self.values["price"], dtype=np.float64)
+            rating = np.array(self.values["rating"], dtype=np.float64)
+            np.save(os.path.join(self.directory, "value_score.npy"), value_scores(rating, price))
+
+        with open(os.path.join(self.directory, "vocabulary.json"), "w") as f:
+            json.dump(self.vocabulary, f)
+
+
+def _swap(root: str, version: str):
+    """Point root at a version directory in one atomic rename"""
+    link = f"{root}.link-{os.getpid()}"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(version), link)
+
+    if os.path.isdir(root) and not os.path.islink(root):
+        # A store from before versioning: a directory can't be renamed over, so move it aside first
+        os.replace(root, f"{root}.v0-{os.getpid()}")
+    os.replace(link, root)
+
+
+def _remove_old_versions(root: str, grace_s: float):
+    """Delete versions replaced more than grace_s ago; newer ones stay for readers that still have them open"""
+    stamps = {}
+    for version in glob.glob(glob.escape(root) + ".v*"):
+        match = VERSION_PATTERN.search(version)
+        if match:
+            stamps[version] = int(match.group(1))
+
+    current = os.path.realpath(root)
+    ordered = sorted(stamps, key=stamps.get)
+    for version, successor in zip(ordered, ordered[1:]):
+        if os.path.realpath(version) == current:
+            continue
+        try:
+            # A version directory's mtime is when its manifest, the last file written, was added
+            replaced_at = os.path.getmtime(successor)
+        except OSError:
+            continue
+        if time.time() - replaced_at > grace_s:
+            shutil.rmtree(version, ignore_errors=True)
+
+
+def write_store(root: str, inventory: dict):
+    """Write an inventory to root, replacing whatever was there.
+
+    The store is written to a new version directory and root, a symlink,
+    is renamed onto it at the end. Readers see either the old store or the
+    new one, never a half-written or missing one. Replaced versions are
+    kept for VERSION_GRACE_S, for InventoryStores that opened them, and
+    deleted by a later write.
+
+    Args:
+        root: Path of the store
+        inventory: {kind: {destination: iterable of records}}; iterables may
+            be generators, so millions of rows never have to sit in memory
+
+    Raises:
+        ValueError: On an unknown kind, or a destination given twice for a
+            kind (destinations are case-insensitive)
+    """
+    root = root.rstrip(os.sep)
+    staging = f"{root}.v{time.time_ns()}-{os.getpid()}"
+    try:
+        manifest = {"version": 1, "kinds": {}}
+
+        for kind, destinations in inventory.items():
+            if kind not in KINDS:
+                raise ValueError(f"Unknown inventory kind: {kind}")
+
+            manifest["kinds"][kind] = {}
+            names = set()
+            for destination, records in destinations.items():
+                if destination.lower() in manifest["kinds"][kind]:
+                    raise ValueError(f"{kind} has more than one destination named {destination.lower()!r}")
+
+                # Destinations differing only in punctuation get numbered partitions
+                name = base = partition_name(destination)
+                while name in names:
+                    name = f"{base}-{len(names) + 1}"
+                names.add(name)
+
+                directory = os.path.join(staging, kind, name)
+                os.makedirs(directory)
+
+                writer = _PartitionWriter(directory, kind)
+                for record in records:
+                    writer.add(record)
+                writer.close()
+
+                manifest["kinds"][kind][destination.lower()] = name
+
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _swap(root, staging)
+    _remove_old_versions(root, VERSION_GRACE_S)
+
+
+class InventoryStore:
+    """Lazily opened, memory-mapped view of an inventory store directory.
+
+    The view is pinned to the version current when it was created. Reopen it
+    within VERSION_GRACE_S of a newer write_store, after which that version
+    may be deleted.
+    """
+
+    def __init__(self, root: str):
+        # Pinned to the current version, so a store written meanwhile doesn't mix with this one
+        self.root = os.path.realpath(root)
+        with open(os.path.join(self.root, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def destinations(self, kind: str | None = None) -> set:
+        """Destinations with inventory of a kind (or of any kind)"""
+        kinds = [kind] if kind else list(self.manifest["kinds"])
+        return {d for k in kinds for d in self.manifest["kinds"].get(k, {})}
+
+    def _partition(self, kind: str, destination: str) -> str | None:
+        name = self.manifest["kinds"].get(kind, {}).get(destination.lower())
+        return None if name is None else os.path.join(self.root, kind, name)
+
+    def _cached(self, key: tuple, load):
+        """Open something once per store and share it between threads"""
+        with self._lock:
+            if key not in self._open:
+                self._open[key] = load()
+            return self._open[key]
+
+    def _column(self, directory: str, name: str) -> np.ndarray:
+        return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+    def rows(self, kind: str, destination: str) -> RecordSequence | None:
+        """Records of a destination partition, or None if it has none"""
+        directory = self._partition(kind, destination)
+        if directory is None:
+            return None
+
+        return self._cached(("rows", directory), lambda: RecordSequence(
+            os.path.join(directory, "rows.jsonl"), self._column(directory, "offsets")
+        ))
+
+    def flight_table(self, destination: str) -> FlightTable | None:
+        """Column table over a destination's flights, backed by the mapped files"""
+        rows = self.rows("flights", destination)
+        if rows is None:
+            return None
+
+        directory = self._partition("flights", destination)
+        return FlightTable(
+            rows,
+            price=self._column(directory, "price"),
+            stops=self._column(directory, "stops"),
+            duration_minutes=self._column(directory, "duration_minutes"),
+        )
+
+    def hotel_table(self, destination: str) -> HotelTable | None:
+        """Column table over a destination's hotels, backed by the mapped files"""
+        rows = self.rows("hotels", destination)
+        if rows is None:
+            return None
+
+        directory = self._partition("hotels", destination)
+        with open(os.path.join(directory, "vocabulary.json")) as f:
+            vocabulary = json.load(f)
+
+        return HotelTable(
+            rows,
+            price=self._column(directory, "price"),
+            rating=self._column(directory, "rating"),
+            reviews=self._column(directory, "reviews"),
+            traveler_mask=self._column(directory, "traveler_mask"),
+            amenity_mask=self._column(directory, "amenity_mask"),
+            traveler_vocabulary=vocabulary["traveler_mask"],
+            amenity_vocabulary=vocabulary["amenity_mask"],
+            value_score=self._column(directory, "value_score"),
+        )
+
+
+def convert_mock_data(root: str):
+    """Write the MOCK_* inventory from tools.mock_data to a store"""
+    from tools.mock_data import MOCK_ACTIVITIES, MOCK_FLIGHTS, MOCK_HOTELS, MOCK_RESTAURANTS
+
+    write_store(root, {
+        "flights": MOCK_FLIGHTS,
+        "hotels": MOCK_HOTELS,
+        "activities": MOCK_ACTIVITIES,
+        "restaurants": MOCK_RESTAURANTS,
+    })
+
+
+def generate_store(root: str, destinations: list, flights: int, hotels: int, seed: int = 0):
+    """Write a synthetic store with the given number of rows per destination"""
+    from tools.synthetic import iter_flights, iter_hotels
+
+    write_store(root, {
+        "flights": {d: iter_flights(flights, d.title(), seed) for d in destinations},
+        "hotels": {d: iter_hotels(hotels, d.title(), seed) for d in destinations},
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an on-disk inventory store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="Convert the MOCK_* data in tools/mock_data.py")
+    convert.add_argument("root", help="Output store directory")
+
+    generate = commands.add_parser("generate", help="Generate a synthetic store")
+    generate.add_argument("root", help="Output store directory")
+    generate.add_argument("--destinations", default="tokyo,paris", help="Comma-separated destinations")
+    generate.add_argument("--flights", type=int, default=1_000_000, help="Flights per destination")
+    generate.add_argument("--hotels", type=int, default=100_000, help="Hotels per destination")
+    generate.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        convert_mock_data(args.root)
+    else:
+        generate_store(args.root, args.destinations.split(","), args.flights, args.hotels, args.seed)
+
+    print(f"✅ Wrote inventory store to {args.root}")
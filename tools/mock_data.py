@@ -6,8 +6,29 @@ In production, these would be replaced with actual API calls to:
 - Amadeus, Skyscanner, Google Flights (flights)
 - Booking.com, Hotels.com, Airbnb (hotels)
 - TripAdvisor, Viator, GetYourGuide (activities)
+
+Each destination's rows are indexed the first time it is queried: flights and
+hotels into NumPy column tables (see tools.columnar), activities and
+restaurants into an InventoryIndex. The query_* functions answer filter
+queries through those structures.
+
+Set TRAVEL_INVENTORY_DIR (or call use_inventory_store) to serve inventory from
+a memory-mapped on-disk store (see tools.inventory_store) instead of the
+MOCK_* literals below. When remote providers are registered (see
+tools.providers), lookups merge their records with the local ones; tables
+built from merged records are reused for REMOTE_TABLE_TTL_S seconds.
 """
 
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict
+
+from tools import providers
+from tools.columnar import FlightTable, HotelTable
+from tools.inventory_store import InventoryStore
+
 # =============================================================================
 # FLIGHT DATA
 # =============================================================================
@@ -433,19 +454,299 @@ MOCK_RESTAURANTS = {
 }
 
 
+# =============================================================================
+# INVENTORY INDEXES
+# =============================================================================
+
+class InventoryIndex:
+    """Lookup structures over one destination's rows, built once per destination.
+
+    - A price-sorted position array, so "price <= budget" is a single bisect
+    - Inverted indexes from (lowercased) attribute value to row positions
+    - Precomputed lowercase values for substring matches
+
+    Filters return sets of row positions (None meaning "every row") so they can
+    be combined with set intersection; select() turns them back into rows in
+    their original order.
+    """
+
+    def __init__(self, rows: list, price_key: str | None, keys: tuple = ()):
+        self.rows = rows
+        self._price_order = (
+            sorted(range(len(rows)), key=lambda i: rows[i][price_key]) if price_key else []
+        )
+        self._prices = [rows[i][price_key] for i in self._price_order]
+        self._inverted = {key: defaultdict(set) for key in keys}
+
+        for position, row in enumerate(rows):
+            for key in keys:
+                values = row.get(key, [])
+                for value in values if isinstance(values, list) else [values]:
+                    self._inverted[key][_normalize(value)].add(position)
+
+    def price_at_most(self, limit) -> set:
+        """Positions of rows priced at or below limit"""
+        return set(self._price_order[:bisect_right(self._prices, limit)])
+
+    def equals(self, key: str, value) -> set:
+        """Positions of rows whose key equals (or, for lists, contains) value"""
+        return self._inverted[key].get(_normalize(value), set())
+
+    def containing(self, key: str, substring: str) -> set:
+        """Positions of rows whose key contains substring, case-insensitively.
+
+        Scans the distinct values of key rather than the rows.
+        """
+        substring = substring.lower()
+        return set().union(*(
+            positions for value, positions in self._inverted[key].items() if substring in value
+        ))
+
+    def select(self, positions: set | None) -> list:
+        """Rows at the given positions, in their original order"""
+        if positions is None:
+            return list(self.rows)
+        return [self.rows[i] for i in sorted(positions)]
+
+
+def _normalize(value):
+    """Lowercase strings so index keys match case-insensitively"""
+    return value.lower() if isinstance(value, str) else value
+
+def _intersect(positions: set | None, other: set) -> set:
+    """Intersect two position sets, where None means every row"""
+    return other if positions is None else positions & other
+
+MOCK_INVENTORY = {
+    "flights": MOCK_FLIGHTS,
+    "hotels": MOCK_HOTELS,
+    "activities": MOCK_ACTIVITIES,
+    "restaurants": MOCK_RESTAURANTS,
+}
+
+# On-disk store served instead of MOCK_INVENTORY when configured
+_store = None
+
+# How long a table built from remote providers' records is served before refetching
+REMOTE_TABLE_TTL_S = float(os.environ.get("TRAVEL_REMOTE_TABLE_TTL", 60))
+
+# Tables and indexes kept at once; the least recently used are dropped first
+MAX_CACHED_TABLES = int(os.environ.get("TRAVEL_MAX_CACHED_TABLES", 256))
+
+# Tables and indexes, built per (kind, destination, remote) on first use:
+# key -> (expires_at or None, table), in LRU order. _tables_lock only guards
+# the dicts; builds hold the lock of their own key, so a slow destination
+# doesn't block others. A key's build lock is dropped once no one is waiting on it.
+_tables = OrderedDict()
+_build_locks = {}  # key -> [lock, callers holding or waiting for it]
+_tables_lock = threading.Lock()
+# Bumped when the inventory source changes, so builds started before don't get cached
+_generation = 0
+
+
+def use_inventory_store(root: str | None):
+    """Serve inventory from the on-disk store at root (None to use MOCK_* again)"""
+    global _store, _generation
+    with _tables_lock:
+        _store = InventoryStore(root) if root else None
+        _tables.clear()
+        _generation += 1
+
+def local_rows(kind: str, destination: str):
+    """A destination's local rows of a kind, or None if it has none"""
+    if _store is not None:
+        return _store.rows(kind, destination)
+    return MOCK_INVENTORY[kind].get(destination.lower())
+
+def _rows(kind: str, destination: str):
+    """A destination's rows of a kind from every provider, or None if it has none"""
+    if providers.has_remote_providers():
+        return providers.fetch_rows(kind, destination)
+    return local_rows(kind, destination)
+
+def _cached_table(key: tuple):
+    with _tables_lock:
+        entry = _tables.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del _tables[key]
+            return None
+        _tables.move_to_end(key)
+        return entry[1]
+
+def _cache_table(key: tuple, expires_at: float | None, table):
+    # Lock held
+    _tables[key] = (expires_at, table)
+    _tables.move_to_end(key)
+    while len(_tables) > MAX_CACHED_TABLES:
+        _tables.popitem(last=False)
+
+def _lazy(kind: str, destination: str, build):
+    """Build a table/index for a destination once and cache it.
+
+    Unknown destinations return None and are not cached. With remote
+    providers the table is built from merged rows and rebuilt once it is
+    REMOTE_TABLE_TTL_S old.
+    """
+    remote = providers.has_remote_providers()
+    key = (kind, destination.lower(), remote)
+    table = _cached_table(key)
+    if table is not None:
+        return table
+
+    with _tables_lock:
+        build_lock = _build_locks.setdefault(key, [threading.Lock(), 0])
+        build_lock[1] += 1
+        generation = _generation
+    try:
+        with build_lock[0]:
+            # Another caller may have built it while this one waited
+            table = _cached_table(key)
+            if table is not None:
+                return table
+
+            rows = _rows(kind, destination) if remote else local_rows(kind, destination)
+            if rows is None:
+                return None
+            table = build(rows)
+
+            with _tables_lock:
+                if generation == _generation:
+                    _cache_table(key, time.monotonic() + REMOTE_TABLE_TTL_S if remote else None, table)
+            return table
+    finally:
+        with _tables_lock:
+            build_lock[1] -= 1
+            if build_lock[1] == 0 and _build_locks.get(key) is build_lock:
+                del _build_locks[key]
+
+
 def get_flights(destination: str) -> list:
     """Get available flights for a destination"""
-    return MOCK_FLIGHTS.get(destination.lower(), [])
+    return _rows("flights", destination) or []
 
 def get_hotels(destination: str) -> list:
     """Get available hotels for a destination"""
-    return MOCK_HOTELS.get(destination.lower(), [])
+    return _rows("hotels", destination) or []
 
 def get_activities(destination: str) -> list:
     """Get available activities for a destination"""
-    return MOCK_ACTIVITIES.get(destination.lower(), [])
+    return _rows("activities", destination) or []
 
 def get_restaurants(destination: str) -> list:
     """Get restaurant recommendations for a destination"""
-    return MOCK_RESTAURANTS.get(destination.lower(), [])
+    return _rows("restaurants", destination) or []
+
+def list_destinations() -> set:
+    """Get every destination that has inventory of any kind"""
+    if _store is not None:
+        return _store.destinations()
+    return set(MOCK_FLIGHTS) | set(MOCK_HOTELS) | set(MOCK_ACTIVITIES) | set(MOCK_RESTAURANTS)
+
+
+def get_flight_table(destination: str) -> FlightTable | None:
+    """Get the column table of flights for a destination"""
+    if _store is not None and not providers.has_remote_providers():
+        return _lazy("flights", destination, lambda rows: _store.flight_table(destination))
+    return _lazy("flights", destination, FlightTable.from_records)
+
+def get_hotel_table(destination: str) -> HotelTable | None:
+    """Get the column table of hotels for a destination"""
+    if _store is not None and not providers.has_remote_providers():
+        return _lazy("hotels", destination, lambda rows: _store.hotel_table(destination))
+    return _lazy("hotels", destination, HotelTable.from_records)
+
+def query_flights(destination: str, budget_max: int | None = None, stops: str | None = None) -> list | None:
+    """Get flights for a destination matching the filters.
+
+    Args:
+        destination: The destination city
+        budget_max: Maximum price per person in USD (optional)
+        stops: "direct", "one-stop" or "any" (optional)
+
+    Returns:
+        Matching flights, or None if the destination has no flights at all
+    """
+    table = get_flight_table(destination)
+    if table is None:
+        return None
+
+    return table.records(table.filter(budget_max, stops))
+
+def query_hotels(destination: str, budget_max: int | None = None, traveler_type: str | None = None) -> list | None:
+    """Get hotels for a destination matching the filters.
+
+    Args:
+        destination: The destination city
+        budget_max: Maximum price per night in USD (optional)
+        traveler_type: Traveler type the hotel must suit, e.g. "families" (optional)
+
+    Returns:
+        Matching hotels, or None if the destination has no hotels at all
+    """
+    table = get_hotel_table(destination)
+    if table is None:
+        return None
+
+    return table.records(table.filter(budget_max, traveler_type))
+
+def query_activities(destination: str, interests: list | None = None, budget_max: int | None = None) -> list | None:
+    """Get activities for a destination matching the filters.
+
+    An activity matches the interests if any of them is in its best_for tags
+    or part of its category. If nothing matches, the interests are ignored.
+
+    Args:
+        destination: The destination city
+        interests: Interests such as "culture" or "food" (optional)
+        budget_max: Maximum price per activity in USD (optional)
+
+    Returns:
+        Matching activities, or None if the destination has no activities at all
+    """
+    index = _lazy(
+        "activities", destination, lambda rows: InventoryIndex(rows, "price", ("best_for", "category"))
+    )
+    if index is None:
+        return None
+
+    positions = None
+    if interests:
+        matched = set()
+        for interest in interests:
+            matched |= index.equals("best_for", interest) | index.containing("category", interest)
+        positions = matched or None
+    if budget_max:
+        positions = _intersect(positions, index.price_at_most(budget_max))
+
+    return index.select(positions)
+
+def query_restaurants(destination: str, cuisine: str | None = None, price_range: str | None = None) -> list | None:
+    """Get restaurants for a destination matching the filters.
+
+    Args:
+        destination: The destination city
+        cuisine: Cuisine the restaurant's cuisine must contain, e.g. "Ramen" (optional)
+        price_range: "$", "$$", "$$$" or "$$$$" (optional)
+
+    Returns:
+        Matching restaurants, or None if the destination has no restaurants at all
+    """
+    index = _lazy(
+        "restaurants", destination, lambda rows: InventoryIndex(rows, None, ("cuisine", "price_range"))
+    )
+    if index is None:
+        return None
+
+    positions = None
+    if cuisine:
+        positions = index.containing("cuisine", cuisine)
+    if price_range:
+        positions = _intersect(positions, index.equals("price_range", price_range))
+
+    return index.select(positions)
+
 
+if os.environ.get("TRAVEL_INVENTORY_DIR"):
+    use_inventory_store(os.environ["TRAVEL_INVENTORY_DIR"])
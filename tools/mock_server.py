@@ -0,0 +1,92 @@
+"""
+Mock Inventory Server
+
+A local stand-in for a remote inventory API, for testing HTTPProvider and the
+multi-provider merge path without real credentials.
+
+    GET /inventory/<kind>?destinations=tokyo,paris  ->  {"tokyo": [...], "paris": [...]}
+    GET /health                                     ->  {"status": "ok"}
+
+Usage:
+    python -m tools.mock_server [--port 8765] [--latency 0.2] [--synthetic 500]
+
+Then point the planner at it with TRAVEL_INVENTORY_PROVIDERS=http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from tools.inventory_store import KINDS
+from tools.mock_data import MOCK_INVENTORY
+from tools.synthetic import generate_flights, generate_hotels
+
+
+def build_inventory(synthetic: int = 0) -> dict:
+    """The inventory served: the MOCK_* data plus optional synthetic rows"""
+    inventory = {kind: {d: list(rows) for d, rows in MOCK_INVENTORY[kind].items()} for kind in KINDS}
+
+    if synthetic:
+        for destination in list(inventory["flights"]):
+            inventory["flights"][destination] += generate_flights(synthetic, destination.title(), seed=1)
+            inventory["hotels"][destination] += generate_hotels(synthetic, destination.title(), seed=1)
+
+    return inventory
+
+
+def make_handler(inventory: dict, latency: float):
+    """Create a request handler serving inventory with simulated latency"""
+
+    class InventoryHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def _send_json(self, status: int, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+
+            if parts == ["health"]:
+                return self._send_json(200, {"status": "ok"})
+
+            if len(parts) != 2 or parts[0] != "inventory" or parts[1] not in inventory:
+                return self._send_json(404, {"error": "not found"})
+
+            time.sleep(latency)
+            destinations = parse_qs(url.query).get("destinations", [""])[0].lower().split(",")
+            rows = inventory[parts[1]]
+            self._send_json(200, {d: rows[d] for d in destinations if d in rows})
+
+        def log_message(self, format, *args):
+            pass
+
+    return InventoryHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, latency: float = 0.0, synthetic: int = 0) -> ThreadingHTTPServer:
+    """Create the server (call serve_forever() on the result to run it)"""
+    return ThreadingHTTPServer((host, port), make_handler(build_inventory(synthetic), latency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in inventory API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of simulated latency per request")
+    parser.add_argument("--synthetic", type=int, default=0, help="Extra synthetic flights/hotels per destination")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency, args.synthetic)
+    print(f"🛰️  Mock inventory API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
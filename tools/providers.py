@@ -0,0 +1,249 @@
+"""
+Inventory Providers
+
+A pluggable provider interface for inventory sources, so the subagent tools
+can query several backends (mock data, Amadeus, Booking.com, TripAdvisor, ...)
+at once without multiplying per-request latency.
+
+- InventoryProvider: async, batched fetch of records for many destinations
+- MockProvider: serves the local inventory from tools.mock_data
+- HTTPProvider: fetches from an HTTP inventory service over a shared,
+  pooled keep-alive client (see tools.mock_server for a local stand-in)
+
+Every provider has its own timeout and concurrency limit. fetch_rows() queries
+all registered providers concurrently and merges their records by id; a
+provider that fails or times out is skipped rather than failing the request.
+
+All provider I/O runs on one background event loop, so the pooled client and
+its connections are shared by every thread and every synchronous tool call.
+
+Set TRAVEL_INVENTORY_PROVIDERS to a comma-separated list of base URLs to add
+HTTP providers at startup.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryProvider(ABC):
+    """Base class for inventory sources.
+
+    Args:
+        name: Name used in logs
+        timeout: Seconds before a fetch from this provider is abandoned
+        max_concurrency: Maximum number of fetches in flight to this provider
+    """
+
+    # Local providers are served without going through the event loop
+    is_local = False
+
+    def __init__(self, name: str, timeout: float = 5.0, max_concurrency: int = 8):
+        self.name = name
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    @abstractmethod
+    async def fetch(self, kind: str, destinations: list) -> dict:
+        """Fetch records of a kind for several destinations in one batch.
+
+        Args:
+            kind: "flights", "hotels", "activities" or "restaurants"
+            destinations: Lowercased destination names
+
+        Returns:
+            {destination: [records]} for the destinations this provider knows
+        """
+
+    async def fetch_limited(self, kind: str, destinations: list) -> dict:
+        """fetch() bounded by this provider's concurrency limit and timeout"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            return await asyncio.wait_for(self.fetch(kind, destinations), self.timeout)
+
+
+class MockProvider(InventoryProvider):
+    """Serves the local inventory (MOCK_* data or the on-disk store)"""
+
+    is_local = True
+
+    def __init__(self, name: str = "mock", timeout: float = 5.0, max_concurrency: int = 64):
+        super().__init__(name, timeout, max_concurrency)
+
+    async def fetch(self, kind: str, destinations: list) -> dict:
+        # Opening store partitions is blocking work, keep it off the event loop
+        return await asyncio.to_thread(self._fetch_local, kind, destinations)
+
+    def _fetch_local(self, kind: str, destinations: list) -> dict:
+        # The rows as local_rows has them: store partitions stay lazy, decoded only as they're read
+        from tools.mock_data import local_rows
+
+        found = {}
+        for destination in destinations:
+            rows = local_rows(kind, destination)
+            if rows is not None:
+                found[destination] = rows
+        return found
+
+
+class HTTPProvider(InventoryProvider):
+    """Fetches inventory from an HTTP service.
+
+    Expects ``GET {base_url}/inventory/{kind}?destinations=a,b`` to return
+    ``{"a": [records], "b": [records]}``.
+    """
+
+    def __init__(self, base_url: str, name: str | None = None, timeout: float = 5.0, max_concurrency: int = 8):
+        super().__init__(name or base_url, timeout, max_concurrency)
+        self.base_url = base_url.rstrip("/")
+
+    async def fetch(self, kind: str, destinations: list) -> dict:
+        response = await get_http_client().get(
+            f"{self.base_url}/inventory/{kind}",
+            params={"destinations": ",".join(destinations)},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+# =============================================================================
+# SHARED EVENT LOOP AND HTTP CLIENT
+# =============================================================================
+
+_loop = None
+_loop_lock = threading.Lock()
+_client = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """The background event loop that owns all provider I/O"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="inventory-providers", daemon=True).start()
+        return _loop
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The pooled keep-alive client shared by all HTTP providers.
+
+    Must be called from the provider event loop.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30),
+        )
+    return _client
+
+
+def run_sync(coroutine, timeout: float | None = None):
+    """Run a coroutine on the provider loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coroutine, _get_loop()).result(timeout)
+
+
+# =============================================================================
+# REGISTRY AND MERGED FETCHES
+# =============================================================================
+
+_providers = [MockProvider()]
+
+
+def register_provider(provider: InventoryProvider):
+    """Add a provider; records from earlier providers win on id clashes"""
+    _providers.append(provider)
+
+def set_providers(providers: list):
+    """Replace every registered provider"""
+    _providers[:] = providers
+
+def get_providers() -> list:
+    """The registered providers, in priority order"""
+    return list(_providers)
+
+def has_remote_providers() -> bool:
+    """Whether any registered provider needs network I/O"""
+    return any(not p.is_local for p in _providers)
+
+
+def _merge(batches: list, destinations: list) -> dict:
+    """Merge per-provider batches, de-duplicating records by id across providers.
+
+    A destination only one provider knows gets that provider's records as
+    they are (lazy store rows stay lazy); merging several reads them all.
+    """
+    merged = {}
+    for destination in destinations:
+        found = [batch[destination] for batch in batches if destination in batch]
+        if not found:
+            continue
+        if len(found) == 1:
+            merged[destination] = found[0]
+            continue
+
+        rows, seen = [], set()
+        for records in found:
+            for record in records:
+                key = record.get("id")
+                if key is None or key not in seen:
+                    seen.add(key)
+                    rows.append(record)
+        merged[destination] = rows
+    return merged
+
+
+async def fetch_many(kind: str, destinations: list) -> dict:
+    """Fetch and merge a kind of inventory for several destinations from every provider.
+
+    Providers are queried concurrently; one that errors or times out is
+    logged and left out of the result.
+
+    Returns:
+        {destination: merged records} for destinations any provider knows
+    """
+    destinations = [d.lower() for d in destinations]
+    current = list(_providers)
+    results = await asyncio.gather(
+        *(p.fetch_limited(kind, destinations) for p in current),
+        return_exceptions=True,
+    )
+
+    batches = []
+    for provider, result in zip(current, results):
+        if isinstance(result, BaseException):
+            logger.warning("Inventory provider %s failed for %s: %r", provider.name, kind, result)
+        else:
+            batches.append(result)
+
+    return _merge(batches, destinations)
+
+
+def fetch_rows(kind: str, destination: str) -> Sequence | None:
+    """Synchronously fetch merged records for one destination from every provider
+
+    Returns:
+        The merged records, or None if no provider knows the destination
+    """
+    return run_sync(fetch_many(kind, [destination])).get(destination.lower())
+
+
+def configure_from_env():
+    """Register an HTTPProvider for each URL in TRAVEL_INVENTORY_PROVIDERS"""
+    for url in filter(None, os.environ.get("TRAVEL_INVENTORY_PROVIDERS", "").split(",")):
+        register_provider(HTTPProvider(url.strip()))
+
+
+configure_from_env()
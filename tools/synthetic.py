@@ -0,0 +1,73 @@
+"""
+Synthetic Inventory
+
+Generates large, realistic-looking flight and hotel inventories in the same
+shape as the MOCK_* records, for load testing and benchmarks.
+"""
+
+import random
+
+AIRLINES = ["Japan Airlines", "ANA", "United Airlines", "Korean Air", "Air France",
+            "Delta", "Lufthansa", "Emirates", "Singapore Airlines", "British Airways"]
+ORIGINS = ["Los Angeles", "New York JFK", "Chicago O'Hare", "San Francisco", "Seattle"]
+LAYOVERS = ["Seoul", "Frankfurt", "Dubai", "Singapore", "London", "Reykjavik"]
+TRAVELER_TYPES = ["solo", "couples", "families", "luxury", "budget", "business", "groups", "kids"]
+AMENITIES = ["Spa", "Pool", "Gym", "Restaurant", "Bar", "Room Service", "Free WiFi",
+             "Laundry", "Kids Club", "Kitchen", "Concierge", "Parking"]
+NEIGHBORHOODS = ["Downtown", "Old Town", "Harbor", "Station", "Museum District", "Riverside"]
+
+
+def generate_flights(n: int, destination: str = "Tokyo", seed: int = 0) -> list:
+    """Generate n flight records to a destination"""
+    return list(iter_flights(n, destination, seed))
+
+
+def generate_hotels(n: int, destination: str = "Tokyo", seed: int = 0) -> list:
+    """Generate n hotel records in a destination"""
+    return list(iter_hotels(n, destination, seed))
+
+
+def iter_flights(n: int, destination: str = "Tokyo", seed: int = 0):
+    """Yield n flight records to a destination one at a time"""
+    rng = random.Random(seed)
+
+    for i in range(n):
+        stops = rng.choices([0, 1, 2], weights=[5, 4, 1])[0]
+        minutes = rng.randint(360, 900) + stops * rng.randint(90, 300)
+        airline = rng.choice(AIRLINES)
+        flight = {
+            "id": f"FL{i:07d}",
+            "airline": airline,
+            "flight_number": f"{airline[:2].upper()}{rng.randint(1, 999):03d}",
+            "departure_city": rng.choice(ORIGINS),
+            "arrival_city": destination,
+            "departure_time": f"{rng.randint(0, 23):02d}:{rng.choice(['00', '15', '30', '45'])}",
+            "arrival_time": f"{rng.randint(0, 23):02d}:{rng.choice(['00', '15', '30', '45'])}+1",
+            "duration": f"{minutes // 60}h {minutes % 60:02d}m",
+            "stops": stops,
+            "class": "Economy",
+            "price": rng.randint(300, 2000) - stops * 80,
+            "currency": "USD",
+        }
+        if stops:
+            flight["layover"] = f"{rng.choice(LAYOVERS)} ({rng.randint(1, 5)}h {rng.choice(['00', '30'])}m)"
+        yield flight
+
+
+def iter_hotels(n: int, destination: str = "Tokyo", seed: int = 0):
+    """Yield n hotel records in a destination one at a time"""
+    rng = random.Random(seed)
+
+    for i in range(n):
+        yield {
+            "id": f"HT{i:07d}",
+            "name": f"{destination} {rng.choice(['Grand', 'Park', 'City', 'Garden', 'Bay'])} Hotel {i}",
+            "neighborhood": rng.choice(NEIGHBORHOODS),
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "reviews": rng.randint(10, 5000),
+            "price_per_night": rng.randint(60, 900),
+            "currency": "USD",
+            "amenities": rng.sample(AMENITIES, rng.randint(2, 6)),
+            "description": f"A {rng.choice(['modern', 'classic', 'boutique', 'family-run'])} hotel in {destination}.",
+            "traveler_type": rng.sample(TRAVELER_TYPES, rng.randint(1, 3)),
+        }